@@ -0,0 +1,91 @@
+"""add product_stats table for maintained product rankings
+
+Revision ID: ver16
+Revises: ver15
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver16"
+down_revision = "ver15"
+branch_labels = None
+depends_on = None
+
+
+def backfill_product_stats(connection):
+    """Tạo 1 dòng thống kê cho mỗi sản phẩm hiện có: tổng đã bán + biến thể giảm giá nhiều nhất"""
+    sold_rows = connection.execute(sa.text("""
+        SELECT p.id AS product_id, COALESCE(SUM(od.number), 0) AS sold_count
+        FROM products p
+        LEFT JOIN product_types pt ON pt.product_id = p.id
+        LEFT JOIN order_details od ON od.product_type_id = pt.id
+        GROUP BY p.id
+    """)).fetchall()
+
+    variant_rows = connection.execute(sa.text("""
+        SELECT pt.id, pt.product_id, pt.price, pt.discount_price
+        FROM product_types pt
+        JOIN products p ON p.id = pt.product_id
+        WHERE pt.deleted_at IS NULL
+          AND p.deleted_at IS NULL
+          AND p.is_active = 1
+          AND pt.price > 0
+          AND pt.discount_price IS NOT NULL
+          AND pt.discount_price < pt.price
+    """)).fetchall()
+
+    best = {}
+    for row in variant_rows:
+        percent = (row.price - row.discount_price) / row.price * 100
+        if row.product_id not in best or best[row.product_id][1] < percent:
+            best[row.product_id] = (row.id, percent)
+
+    params = []
+    for row in sold_rows:
+        discount_type_id, discount_percent = best.get(row.product_id, (None, None))
+        params.append({
+            "id": str(uuid.uuid4()),
+            "product_id": row.product_id,
+            "discount_type_id": discount_type_id,
+            "discount_percent": discount_percent,
+            "sold_count": int(row.sold_count),
+        })
+
+    if params:
+        connection.execute(
+            sa.text("""
+                INSERT INTO product_stats (id, product_id, discount_type_id, discount_percent, sold_count)
+                VALUES (:id, :product_id, :discount_type_id, :discount_percent, :sold_count)
+            """),
+            params,
+        )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_stats",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("product_id", sa.String(36), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("discount_type_id", sa.String(36), sa.ForeignKey("product_types.id"), nullable=True),
+        sa.Column("discount_percent", sa.Float(), nullable=True),
+        sa.Column("sold_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("product_id", name="uq_product_stats_product_id"),
+    )
+    op.create_index("ix_product_stats_discount_percent", "product_stats", ["discount_percent"])
+
+    backfill_product_stats(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_stats_discount_percent", table_name="product_stats")
+    op.drop_table("product_stats")
@@ -0,0 +1,56 @@
+"""add favorite_count and ranking indexes to product_stats
+
+Revision ID: ver17
+Revises: ver16
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver17"
+down_revision = "ver16"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product_stats",
+        sa.Column("favorite_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.create_index("ix_product_stats_sold_count", "product_stats", ["sold_count"])
+    op.create_index("ix_product_stats_favorite_count", "product_stats", ["favorite_count"])
+
+    # sold_count giờ chỉ tính đơn đã hoàn thành -> tính lại từ dữ liệu gốc
+    op.execute("""
+        UPDATE product_stats ps
+        LEFT JOIN (
+            SELECT pt.product_id, SUM(od.number) AS sold
+            FROM order_details od
+            JOIN orders o ON o.id = od.order_id
+            JOIN product_types pt ON pt.id = od.product_type_id
+            WHERE o.status = 'completed' AND o.deleted_at IS NULL
+            GROUP BY pt.product_id
+        ) s ON s.product_id = ps.product_id
+        SET ps.sold_count = COALESCE(s.sold, 0)
+    """)
+    op.execute("""
+        UPDATE product_stats ps
+        JOIN (
+            SELECT pt.product_id, COUNT(wi.id) AS favorites
+            FROM wishlist_items wi
+            JOIN wishlists w ON w.id = wi.wishlist_id
+            JOIN product_types pt ON pt.id = wi.product_type_id
+            WHERE wi.deleted_at IS NULL AND w.deleted_at IS NULL
+            GROUP BY pt.product_id
+        ) f ON f.product_id = ps.product_id
+        SET ps.favorite_count = f.favorites
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_stats_favorite_count", table_name="product_stats")
+    op.drop_index("ix_product_stats_sold_count", table_name="product_stats")
+    op.drop_column("product_stats", "favorite_count")
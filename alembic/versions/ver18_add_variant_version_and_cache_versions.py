@@ -0,0 +1,43 @@
+"""add product_types.version and cache_versions table
+
+Revision ID: ver18
+Revises: ver17
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver18"
+down_revision = "ver17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product_types",
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("1")),
+    )
+
+    op.create_table(
+        "cache_versions",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("1")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+    )
+    op.create_index("ix_cache_versions_name", "cache_versions", ["name"], unique=True)
+    op.execute("INSERT INTO cache_versions (id, name, version) VALUES (UUID(), 'product_types', 1)")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cache_versions_name", table_name="cache_versions")
+    op.drop_table("cache_versions")
+    op.drop_column("product_types", "version")
@@ -0,0 +1,48 @@
+"""add product_co_purchases and product_stats.order_count
+
+Revision ID: ver19
+Revises: ver18
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver19"
+down_revision = "ver18"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "product_stats",
+        sa.Column("order_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+    # Dữ liệu được tính bởi job rebuild_bought_together (chạy ngay khi app khởi động)
+    op.create_table(
+        "product_co_purchases",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("product_id", sa.String(36), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("related_product_id", sa.String(36), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("pair_count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("score", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("product_id", "related_product_id", name="uq_product_co_purchases_pair"),
+    )
+    op.create_index(
+        "ix_product_co_purchases_product_score", "product_co_purchases", ["product_id", "score"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_co_purchases_product_score", table_name="product_co_purchases")
+    op.drop_table("product_co_purchases")
+    op.drop_column("product_stats", "order_count")
@@ -0,0 +1,41 @@
+"""add product_similarities
+
+Revision ID: ver20
+Revises: ver19
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver20"
+down_revision = "ver19"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Dữ liệu được tính bởi job rebuild_similar_products (chạy ngay khi app khởi động)
+    op.create_table(
+        "product_similarities",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("product_id", sa.String(36), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("similar_product_id", sa.String(36), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("product_id", "similar_product_id", name="uq_product_similarities_pair"),
+    )
+    op.create_index(
+        "ix_product_similarities_product_score", "product_similarities", ["product_id", "score"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_similarities_product_score", table_name="product_similarities")
+    op.drop_table("product_similarities")
@@ -0,0 +1,41 @@
+"""add user_recommendations
+
+Revision ID: ver21
+Revises: ver20
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver21"
+down_revision = "ver20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Dữ liệu được tính bởi job rebuild_recommendations (chạy ngay khi app khởi động)
+    op.create_table(
+        "user_recommendations",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("product_id", sa.String(36), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("user_id", "product_id", name="uq_user_recommendations_pair"),
+    )
+    op.create_index(
+        "ix_user_recommendations_user_score", "user_recommendations", ["user_id", "score"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_recommendations_user_score", table_name="user_recommendations")
+    op.drop_table("user_recommendations")
@@ -0,0 +1,72 @@
+"""add category_closures for descendant-aware category filtering
+
+Revision ID: ver22
+Revises: ver21
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver22"
+down_revision = "ver21"
+branch_labels = None
+depends_on = None
+
+
+def backfill_category_closures(connection):
+    """Tạo các cặp (tổ tiên, hậu duệ) cho toàn bộ danh mục hiện có, kể cả danh mục đã xóa mềm"""
+    parents = {
+        row.id: row.parent_id
+        for row in connection.execute(sa.text("SELECT id, parent_id FROM categories")).fetchall()
+    }
+
+    params = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        # Đi ngược lên gốc; dừng nếu gặp vòng lặp hoặc cha không tồn tại
+        while ancestor_id is not None and ancestor_id in parents and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            params.append({
+                "id": str(uuid.uuid4()),
+                "ancestor_id": ancestor_id,
+                "descendant_id": category_id,
+                "depth": depth,
+            })
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+
+    if params:
+        connection.execute(
+            sa.text("""
+                INSERT INTO category_closures (id, ancestor_id, descendant_id, depth)
+                VALUES (:id, :ancestor_id, :descendant_id, :depth)
+            """),
+            params,
+        )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "category_closures",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("ancestor_id", sa.String(36), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("descendant_id", sa.String(36), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("ancestor_id", "descendant_id", name="uq_category_closures_pair"),
+    )
+    op.create_index("ix_category_closures_descendant", "category_closures", ["descendant_id"])
+
+    backfill_category_closures(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_index("ix_category_closures_descendant", table_name="category_closures")
+    op.drop_table("category_closures")
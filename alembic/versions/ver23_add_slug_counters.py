@@ -0,0 +1,37 @@
+"""add slug_counters for unique slug allocation
+
+Revision ID: ver23
+Revises: ver22
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver23"
+down_revision = "ver22"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Bộ đếm được khởi tạo dần ở lần cấp slug đầu tiên của mỗi slug gốc (quét slug hiện có theo prefix)
+    op.create_table(
+        "slug_counters",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("scope", sa.String(50), nullable=False),
+        sa.Column("base", sa.String(100), nullable=False),
+        sa.Column("last_suffix", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("scope", "base", name="uq_slug_counters_scope_base"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("slug_counters")
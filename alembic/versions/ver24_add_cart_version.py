@@ -0,0 +1,26 @@
+"""add carts.version for cart summary cache
+
+Revision ID: ver24
+Revises: ver23
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver24"
+down_revision = "ver23"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "carts",
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("carts", "version")
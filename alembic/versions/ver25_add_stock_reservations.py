@@ -0,0 +1,51 @@
+"""add stock_reservations for pending SePay orders
+
+Revision ID: ver25
+Revises: ver24
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver25"
+down_revision = "ver24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_reservations",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("order_id", sa.String(36), sa.ForeignKey("orders.id"), nullable=False),
+        sa.Column("product_type_id", sa.String(36), sa.ForeignKey("product_types.id"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False, server_default="active"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+    )
+    op.create_index("ix_stock_reservations_status_expires", "stock_reservations", ["status", "expires_at"])
+    op.create_index("ix_stock_reservations_order", "stock_reservations", ["order_id"])
+
+    # Đơn SePay đang chờ thanh toán: tạo giữ hàng hết hạn sau 15 phút kể từ lúc tạo đơn
+    op.execute("""
+        INSERT INTO stock_reservations (id, order_id, product_type_id, quantity, expires_at, status)
+        SELECT UUID(), od.order_id, od.product_type_id, od.number,
+               DATE_ADD(o.created_at, INTERVAL 15 MINUTE), 'active'
+        FROM order_details od
+        JOIN orders o ON o.id = od.order_id
+        WHERE o.status = 'pending' AND o.payment_method = 'SEPAY' AND o.deleted_at IS NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_reservations_order", table_name="stock_reservations")
+    op.drop_index("ix_stock_reservations_status_expires", table_name="stock_reservations")
+    op.drop_table("stock_reservations")
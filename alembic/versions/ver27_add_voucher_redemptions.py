@@ -0,0 +1,46 @@
+"""add voucher_redemptions per-user counters
+
+Revision ID: ver27
+Revises: ver26
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "ver27"
+down_revision = "ver26"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "voucher_redemptions",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("user_id", sa.String(36), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("voucher_id", sa.String(36), sa.ForeignKey("vouchers.id"), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_by", sa.String(36), nullable=True),
+        sa.Column("updated_by", sa.String(36), nullable=True),
+        sa.Column("deleted_by", sa.String(36), nullable=True),
+        sa.UniqueConstraint("user_id", "voucher_id", name="uq_voucher_redemptions_user_voucher"),
+    )
+
+    # Khởi tạo counter từ các đơn chưa hủy đã dùng voucher
+    op.execute("""
+        INSERT INTO voucher_redemptions (id, user_id, voucher_id, count)
+        SELECT UUID(), user_id, voucher_id, COUNT(*)
+        FROM orders
+        WHERE voucher_id IS NOT NULL AND user_id IS NOT NULL
+          AND status <> 'cancelled' AND deleted_at IS NULL
+        GROUP BY user_id, voucher_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("voucher_redemptions")
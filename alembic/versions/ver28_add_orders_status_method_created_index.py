@@ -0,0 +1,26 @@
+"""add orders (status, payment_method, created_at) index for SePay expiry job
+
+Revision ID: ver28
+Revises: ver27
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ver28"
+down_revision = "ver27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_status_method_created",
+        "orders",
+        ["status", "payment_method", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_status_method_created", table_name="orders")
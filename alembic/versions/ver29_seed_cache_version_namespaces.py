@@ -0,0 +1,27 @@
+"""seed cache_versions rows for every namespace
+
+Revision ID: ver29
+Revises: ver28
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ver29"
+down_revision = "ver28"
+branch_labels = None
+depends_on = None
+
+NAMESPACES = ("product_types", "categories", "brands", "types", "roles", "vouchers")
+
+
+def upgrade() -> None:
+    # Tạo sẵn dòng của mọi namespace để bump chỉ còn UPDATE (không insert đồng thời lần đầu)
+    values = ", ".join(f"(UUID(), '{name}', 1)" for name in NAMESPACES)
+    op.execute(f"INSERT IGNORE INTO cache_versions (id, name, version) VALUES {values}")
+
+
+def downgrade() -> None:
+    # Dòng version stamp vô hại, giữ nguyên
+    pass
@@ -0,0 +1,48 @@
+# app/core/cache.py
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Cache in-memory đơn giản có thời gian sống (TTL), an toàn khi dùng từ nhiều thread.
+
+    Dùng cho các payload đọc nhiều, ghi ít (homepage, dữ liệu tham chiếu...).
+    Mỗi worker uvicorn giữ một bản cache riêng nên TTL cần đủ ngắn để chấp nhận dữ liệu cũ.
+    """
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Lấy giá trị còn hạn, trả về None nếu không có hoặc đã hết hạn"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # Hết chỗ: bỏ entry sắp hết hạn nhất
+                oldest_key = min(self._data, key=lambda k: self._data[k][0])
+                del self._data[oldest_key]
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Xóa 1 key, hoặc toàn bộ cache nếu không truyền key"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
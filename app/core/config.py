@@ -25,11 +25,36 @@ class Settings(BaseSettings):
     
     # --- Server Configuration ---
     DEBUG: bool = False
+    STRICT_LOADING: bool = False  # Bật raiseload cho quan hệ ngoài loader profile
     UVICORN_HOST: str = "0.0.0.0"
     UVICORN_PORT: int = 8000
     RELOAD: bool = True
     FRONTEND_URL: str = "http://localhost:5173"  # URL frontend cho reset password link
 
+    # --- Cache Configuration ---
+    HOME_CACHE_TTL_SECONDS: int = 30  # Thời gian cache payload trang chủ (giây)
+    CATEGORY_TREE_CACHE_TTL_SECONDS: int = 600  # Thời gian cache cây danh mục (giây), đã có version stamp nên có thể dài
+    REFERENCE_DATA_CACHE_TTL_SECONDS: int = 600  # Thời gian cache response list brand / type / type value (giây)
+    CART_SUMMARY_CACHE_TTL_SECONDS: int = 300  # Thời gian cache tóm tắt giỏ hàng mỗi user (giây), voucher chỉ làm mới theo TTL
+
+    # --- Background Jobs ---
+    SCHEDULER_ENABLED: bool = True
+    PRODUCT_STATS_RECONCILE_MINUTES: int = 60  # Chu kỳ đối soát counter bán chạy / yêu thích
+    CATEGORY_CLOSURE_REPAIR_MINUTES: int = 60  # Chu kỳ bổ sung các dòng closure danh mục bị thiếu
+    BOUGHT_TOGETHER_REBUILD_HOURS: int = 24  # Chu kỳ tính lại toàn bộ ma trận "thường được mua cùng"
+    BOUGHT_TOGETHER_TOP_K: int = 20  # Số sản phẩm liên quan giữ lại cho mỗi sản phẩm
+    SIMILAR_PRODUCTS_REBUILD_HOURS: int = 6  # Chu kỳ tính lại chỉ mục sản phẩm tương tự (TF-IDF)
+    SIMILAR_PRODUCTS_TOP_K: int = 20
+    RECOMMENDATION_REBUILD_HOURS: int = 24  # Chu kỳ tính lại gợi ý cho toàn bộ user đang hoạt động
+    RECOMMENDATION_REFRESH_MINUTES: int = 5  # Chu kỳ tính lại gợi ý cho user vừa có thay đổi (wishlist, đơn hàng)
+    STOCK_RESERVATION_RELEASE_SECONDS: int = 60  # Chu kỳ trả lại kho cho đơn SePay quá hạn thanh toán
+    STOCK_RESERVATION_BATCH_SIZE: int = 500  # Số giữ hàng xử lý mỗi transaction
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24  # Thời gian lưu response theo Idempotency-Key
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # Request giữ key quá thời gian này (worker chết) thì request khác được xử lý lại
+    IDEMPOTENCY_PURGE_HOURS: int = 6  # Chu kỳ xóa các Idempotency-Key đã hết hạn
+    RECOMMENDATION_ACTIVE_DAYS: int = 180  # User có wishlist / đơn hàng trong khoảng này được tính gợi ý
+    RECOMMENDATION_TOP_N: int = 30
+
     # --- CORS Configuration ---
     CORS_ORIGINS: Any = [] 
 
@@ -0,0 +1,62 @@
+"""
+Fast response - validate 1 lần và serialize thẳng ra bytes
+
+Khi handler trả về BaseResponse, FastAPI validate lại toàn bộ kết quả theo
+response_model rồi mới encode JSON (ORM -> model -> dict -> model -> JSON).
+fast_response() validate dữ liệu đúng 1 lần bằng TypeAdapter đã cache và dùng
+pydantic-core dump_json để ra bytes. Handler vẫn khai báo response_model nên
+OpenAPI schema không đổi; FastAPI bỏ qua bước validate khi nhận Response.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(response_type: Any) -> TypeAdapter:
+    """TypeAdapter cache theo kiểu response (VD: BaseResponse[OrderHistoryResponse])"""
+    return TypeAdapter(response_type)
+
+
+def fast_response(
+    response_type: Any,
+    *,
+    success: bool = True,
+    message: str,
+    data: Any = None,
+    errors: Optional[List[str]] = None,
+    meta: Optional[Dict] = None,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """
+    Build response JSON từ dữ liệu thô (ORM object, dict hoặc model).
+
+    - **response_type**: Kiểu BaseResponse[...] giống response_model của route
+    """
+    content = render_json(response_type, success=success, message=message, data=data, errors=errors, meta=meta)
+    return json_bytes_response(content, status_code=status_code)
+
+
+def render_json(
+    response_type: Any,
+    *,
+    success: bool = True,
+    message: str,
+    data: Any = None,
+    errors: Optional[List[str]] = None,
+    meta: Optional[Dict] = None,
+) -> bytes:
+    """Validate + serialize response ra bytes, dùng khi muốn cache sẵn payload đã serialize"""
+    adapter = get_adapter(response_type)
+    payload = adapter.validate_python(
+        {"success": success, "message": message, "data": data, "errors": errors, "meta": meta},
+        from_attributes=True,
+    )
+    return adapter.dump_json(payload)
+
+
+def json_bytes_response(content: bytes, status_code: int = status.HTTP_200_OK) -> Response:
+    """Trả về bytes JSON đã serialize sẵn (VD: lấy từ cache)"""
+    return Response(content=content, status_code=status_code, media_type="application/json")
@@ -0,0 +1,96 @@
+# app/core/scheduler.py
+import asyncio
+import logging
+from typing import Callable, List
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core import database
+
+logger = logging.getLogger("app")
+
+
+class PeriodicTask:
+    """Job đồng bộ (sync) chạy lặp lại mỗi `interval_seconds` giây trong threadpool"""
+
+    def __init__(
+        self,
+        name: str,
+        interval_seconds: float,
+        func: Callable[[], object],
+        run_on_start: bool = False,
+        single_instance: bool = False
+    ):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.run_on_start = run_on_start
+        self.single_instance = single_instance
+
+
+_registered: List[PeriodicTask] = []
+_running: List[asyncio.Task] = []
+
+
+def register_periodic_task(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], object],
+    run_on_start: bool = False,
+    single_instance: bool = False
+) -> None:
+    """
+    - **run_on_start**: chạy 1 lần ngay khi khởi động thay vì chờ hết chu kỳ đầu tiên
+    - **single_instance**: giữ lock DB (MySQL GET_LOCK) khi chạy; worker khác đang chạy job này thì bỏ qua lần này
+      (dùng cho job rebuild cả bảng, N worker chạy cùng lúc sẽ tranh khóa / deadlock)
+    """
+    _registered.append(PeriodicTask(name, interval_seconds, func, run_on_start, single_instance))
+
+
+async def _run_forever(task: PeriodicTask) -> None:
+    first_run = True
+    while True:
+        if not (first_run and task.run_on_start):
+            await asyncio.sleep(task.interval_seconds)
+        first_run = False
+        try:
+            if task.single_instance:
+                await run_in_threadpool(_run_exclusive, task)
+            else:
+                await run_in_threadpool(task.func)
+        except Exception:
+            # Lỗi 1 lần chạy không được làm dừng job
+            logger.exception("Scheduled task '%s' failed", task.name)
+
+
+def _run_exclusive(task: PeriodicTask) -> None:
+    """Chạy job khi lấy được lock tên `job:<name>` (không chờ); DB không hỗ trợ GET_LOCK thì chạy luôn"""
+    if database.engine.dialect.name != "mysql":
+        task.func()
+        return
+
+    lock_name = f"job:{task.name}"
+    with database.engine.connect() as conn:
+        if not conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": lock_name}).scalar():
+            logger.info("Scheduled task '%s' is running in another worker, skipped", task.name)
+            return
+        try:
+            task.func()
+        finally:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": lock_name})
+
+
+def start_scheduler() -> None:
+    """Khởi động tất cả job đã đăng ký (gọi trong lifespan startup)"""
+    for task in _registered:
+        _running.append(asyncio.create_task(_run_forever(task), name=task.name))
+        logger.info("Scheduled task '%s' every %ss", task.name, task.interval_seconds)
+
+
+async def stop_scheduler() -> None:
+    for running in _running:
+        running.cancel()
+    await asyncio.gather(*_running, return_exceptions=True)
+    _running.clear()
+    _registered.clear()
@@ -1,9 +1,13 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+from app.core.config import settings
+from app.core.scheduler import register_periodic_task, start_scheduler, stop_scheduler
 from app.core.middleware import AuthMiddleware,TraceIdMiddleware
 from app.routers.v1.vouchers import router as vouchers_router
 from app.routers.v1.brands import router as brands_router
@@ -27,6 +31,78 @@ from app.routers.v1.checkout import router as checkout_router
 from app.routers.v1.statistics import router as statistics_router
 from app.routers.v1.notifications import router as notifications_router
 from app.routers.v1.notification_ws import router as notification_ws_router
+from app.routers.v1.home import router as home_router
+from app.services import reference_data_service
+from app.services.product_stat_service import reconcile_product_stats
+from app.services.category_service import repair_category_closures
+from app.services.payment_expiry_service import expire_unpaid_sepay_orders
+from app.services.idempotency_service import purge_expired_idempotency_keys
+from app.services.co_purchase_service import rebuild_bought_together
+from app.services.similar_product_service import rebuild_similar_products
+from app.services.recommendation_service import rebuild_recommendations, refresh_dirty_recommendations
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nạp sẵn snapshot brand / type / role để request đầu tiên không phải chờ
+    await run_in_threadpool(reference_data_service.warm_up)
+
+    # Background jobs (mỗi worker uvicorn chạy 1 bản, các job đều idempotent)
+    if settings.SCHEDULER_ENABLED:
+        register_periodic_task(
+            "reconcile_product_stats",
+            settings.PRODUCT_STATS_RECONCILE_MINUTES * 60,
+            reconcile_product_stats,
+            single_instance=True,
+        )
+        register_periodic_task(
+            "repair_category_closures",
+            settings.CATEGORY_CLOSURE_REPAIR_MINUTES * 60,
+            repair_category_closures,
+            run_on_start=True,
+            single_instance=True,
+        )
+        register_periodic_task(
+            "rebuild_bought_together",
+            settings.BOUGHT_TOGETHER_REBUILD_HOURS * 3600,
+            rebuild_bought_together,
+            run_on_start=True,
+            single_instance=True,
+        )
+        register_periodic_task(
+            "rebuild_similar_products",
+            settings.SIMILAR_PRODUCTS_REBUILD_HOURS * 3600,
+            rebuild_similar_products,
+            run_on_start=True,
+            single_instance=True,
+        )
+        register_periodic_task(
+            "rebuild_recommendations",
+            settings.RECOMMENDATION_REBUILD_HOURS * 3600,
+            rebuild_recommendations,
+            run_on_start=True,
+            single_instance=True,
+        )
+        register_periodic_task(
+            "refresh_dirty_recommendations",
+            settings.RECOMMENDATION_REFRESH_MINUTES * 60,
+            refresh_dirty_recommendations,
+        )
+        register_periodic_task(
+            "expire_unpaid_sepay_orders",
+            settings.STOCK_RESERVATION_RELEASE_SECONDS,
+            expire_unpaid_sepay_orders,
+            run_on_start=True,
+        )
+        register_periodic_task(
+            "purge_expired_idempotency_keys",
+            settings.IDEMPOTENCY_PURGE_HOURS * 3600,
+            purge_expired_idempotency_keys,
+        )
+        start_scheduler()
+    yield
+    await stop_scheduler()
+
 
 app = FastAPI(
     title="WebMyPham API",
@@ -34,6 +110,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 def custom_openapi():
@@ -106,6 +183,7 @@ app.include_router(checkout_router, prefix="/api/v1/checkout", tags=["checkout"]
 app.include_router(statistics_router, prefix="/api/v1/statistics", tags=["statistics"])
 app.include_router(notifications_router, prefix="/api/v1/notifications", tags=["notifications"])
 app.include_router(notification_ws_router)  # WebSocket notification endpoint
+app.include_router(home_router, prefix="/api/v1/home", tags=["home"])
 
 @app.get("/")
 def health_check():
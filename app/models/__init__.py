@@ -6,6 +6,7 @@ from app.models.mixins import AuditMixin
 from app.models.address import Address
 from app.models.brand import Brand
 from app.models.category import Category
+from app.models.categoryClosure import CategoryClosure
 from app.models.product import Product
 from app.models.type import Type
 from app.models.typeValue import TypeValue
@@ -28,6 +29,15 @@ from app.models.notification import Notification
 from app.models.userNotification import UserNotification
 from app.models.conversation import Conversation
 from app.models.message import Message
+from app.models.productStat import ProductStat
+from app.models.cacheVersion import CacheVersion
+from app.models.slugCounter import SlugCounter
+from app.models.stockReservation import StockReservation
+from app.models.idempotencyKey import IdempotencyKey
+from app.models.voucherRedemption import VoucherRedemption
+from app.models.productCoPurchase import ProductCoPurchase
+from app.models.productSimilarity import ProductSimilarity
+from app.models.userRecommendation import UserRecommendation
 
 # Export Base để Alembic sử dụng
 __all__ = ["Base"]
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class CacheVersion(AuditMixin, Base):
+    """
+    Version stamp cho cache in-memory (1 dòng / namespace, VD: "product_types").
+    Mỗi lần dữ liệu nguồn đổi thì tăng version; các worker so version để biết cache đã cũ,
+    kể cả khi thay đổi xảy ra ở worker khác.
+    """
+    __tablename__ = "cache_versions"
+
+    name = Column(String(100), unique=True, index=True, nullable=False)
+    version = Column(Integer, nullable=False, default=1)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -7,5 +7,5 @@ from app.models.mixins import AuditMixin
 class Cart(AuditMixin, Base):
     __tablename__ = "carts"
     user_id = Column(String(36), ForeignKey("users.id"))
+    version = Column(Integer, nullable=False, default=0)  # Tăng mỗi lần thêm / sửa / xóa item (cache tóm tắt giỏ hàng)
     items = relationship("CartItem", back_populates="cart")
-
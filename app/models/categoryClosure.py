@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, Index, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class CategoryClosure(AuditMixin, Base):
+    """
+    Closure table của cây danh mục: mỗi cặp (tổ tiên, hậu duệ) là 1 dòng, kể cả chính nó (depth = 0).
+    Lọc sản phẩm theo danh mục cha chỉ cần 1 join theo ancestor_id thay vì duyệt cây.
+    """
+    __tablename__ = "category_closures"
+    __table_args__ = (
+        UniqueConstraint('ancestor_id', 'descendant_id', name='uq_category_closures_pair'),
+        Index('ix_category_closures_descendant', 'descendant_id'),
+    )
+
+    ancestor_id = Column(String(36), ForeignKey("categories.id"), nullable=False)
+    descendant_id = Column(String(36), ForeignKey("categories.id"), nullable=False)
+    depth = Column(Integer, nullable=False, default=0)  # Số cấp từ ancestor xuống descendant
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, Index, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class IdempotencyKey(AuditMixin, Base):
+    """
+    Kết quả đã lưu của request có Idempotency-Key (tạo đơn, webhook SePay).
+    Request lặp lại cùng key trả về response đã lưu thay vì chạy lại transaction.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key'),
+        Index('ix_idempotency_keys_expires', 'expires_at'),
+    )
+
+    scope = Column(String(50), nullable=False)  # VD: checkout.create_order, sepay.webhook
+    key = Column(String(255), nullable=False)  # Key của client (đã gắn user_id nếu theo user)
+    request_hash = Column(String(64), nullable=False)  # sha256 body request
+    status = Column(String(20), nullable=False, default="processing")  # processing, completed
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON response đã serialize
+    locked_until = Column(DateTime, nullable=False)  # Hết hạn khóa xử lý (worker chết giữa chừng)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, Float
+from sqlalchemy import Column, String, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.mixins import AuditMixin
@@ -6,6 +6,11 @@ from app.models.mixins import AuditMixin
 
 class Order(AuditMixin, Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Job hủy đơn SePay quá hạn quét theo (status, payment_method, created_at)
+        Index('ix_orders_status_method_created', 'status', 'payment_method', 'created_at'),
+    )
+
     user_id = Column(String(36), ForeignKey("users.id"))
     address_id = Column(String(36), ForeignKey("addresses.id"), nullable=True)
     voucher_id = Column(String(36), ForeignKey("vouchers.id"), nullable=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, Index, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class ProductCoPurchase(AuditMixin, Base):
+    """
+    Ma trận đồng mua thưa ("thường được mua cùng"): 1 dòng / cặp (sản phẩm, sản phẩm liên quan).
+    Job rebuild chỉ giữ top K hàng xóm / sản phẩm; đơn hoàn thành mới được cộng dồn giữa 2 lần rebuild.
+    """
+    __tablename__ = "product_co_purchases"
+    __table_args__ = (
+        UniqueConstraint('product_id', 'related_product_id', name='uq_product_co_purchases_pair'),
+        Index('ix_product_co_purchases_product_score', 'product_id', 'score'),
+    )
+
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    related_product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    pair_count = Column(Integer, nullable=False, default=0)  # Số đơn completed chứa cả 2 sản phẩm
+    score = Column(Float, nullable=False, default=0)  # Jaccard: pair_count / (đơn chứa A + đơn chứa B - pair_count)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, ForeignKey, Float, Index, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class ProductSimilarity(AuditMixin, Base):
+    """
+    Sản phẩm tương tự theo nội dung (TF-IDF trên tên, mô tả, loại da, thành phần).
+    Job rebuild ghi đè toàn bộ, mỗi sản phẩm giữ top K hàng xóm có cosine cao nhất.
+    """
+    __tablename__ = "product_similarities"
+    __table_args__ = (
+        UniqueConstraint('product_id', 'similar_product_id', name='uq_product_similarities_pair'),
+        Index('ix_product_similarities_product_score', 'product_id', 'score'),
+    )
+
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    similar_product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    score = Column(Float, nullable=False, default=0)  # Cosine similarity trong khoảng (0, 1]
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, ForeignKey, Float, Integer, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class ProductStat(AuditMixin, Base):
+    """
+    Bảng thống kê được duy trì sẵn cho từng sản phẩm (1 dòng / product).
+    Dùng để đọc các bảng xếp hạng trang chủ bằng index thay vì GROUP BY trên toàn bộ dữ liệu.
+    """
+    __tablename__ = "product_stats"
+    __table_args__ = (
+        UniqueConstraint('product_id', name='uq_product_stats_product_id'),
+        Index('ix_product_stats_discount_percent', 'discount_percent'),
+        Index('ix_product_stats_sold_count', 'sold_count'),
+        Index('ix_product_stats_favorite_count', 'favorite_count'),
+    )
+
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    # Biến thể có phần trăm giảm giá lớn nhất của sản phẩm (NULL nếu không có biến thể giảm giá)
+    discount_type_id = Column(String(36), ForeignKey("product_types.id"), nullable=True)
+    discount_percent = Column(Float, nullable=True)
+    sold_count = Column(Integer, nullable=False, default=0)  # Tổng số lượng đã bán (đơn completed)
+    favorite_count = Column(Integer, nullable=False, default=0)  # Số lượt thêm vào wishlist
+    order_count = Column(Integer, nullable=False, default=0)  # Số đơn completed chứa sản phẩm (mẫu số điểm đồng mua)
+
+    product = relationship("Product")
+    discount_type = relationship("ProductType")
@@ -20,6 +20,7 @@ class ProductType(AuditMixin, Base):
     skin_type = Column(String(100))
     origin = Column(String(100))
     sold = Column(Integer, default=0)  # Số lượng đã bán
+    version = Column(Integer, nullable=False, default=1)  # Tăng mỗi lần sửa giá / tồn kho (optimistic concurrency)
     product = relationship("Product", back_populates="product_types")
     type_value = relationship("TypeValue")  # Thêm relationship để load tên biến thể (màu sắc, dung tích...)
 
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class SlugCounter(AuditMixin, Base):
+    """
+    Bộ đếm hậu tố slug theo (bảng, slug gốc). last_suffix = 0: chưa cấp, 1: đã cấp slug gốc,
+    n >= 2: đã cấp tới "<base>-n". Cấp slug mới chỉ cần khóa + tăng đúng 1 dòng.
+    """
+    __tablename__ = "slug_counters"
+    __table_args__ = (
+        UniqueConstraint('scope', 'base', name='uq_slug_counters_scope_base'),
+    )
+
+    scope = Column(String(50), nullable=False)  # Tên bảng: brands, categories
+    base = Column(String(100), nullable=False)
+    last_suffix = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, DateTime, Index
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class StockReservation(AuditMixin, Base):
+    """
+    Giữ hàng có thời hạn cho đơn SePay chưa thanh toán. Tồn kho đã bị trừ khi tạo đơn,
+    hết hạn mà chưa thanh toán thì job định kỳ hủy đơn và cộng lại tồn kho theo lô.
+    """
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        Index('ix_stock_reservations_status_expires', 'status', 'expires_at'),
+        Index('ix_stock_reservations_order', 'order_id'),
+    )
+
+    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False)
+    product_type_id = Column(String(36), ForeignKey("product_types.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    status = Column(String(20), nullable=False, default="active")  # active, committed (đã thanh toán), released
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, ForeignKey, Float, Index, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class UserRecommendation(AuditMixin, Base):
+    """
+    Top N sản phẩm gợi ý cho từng user, tính sẵn từ sở thích (brand, category, loại da)
+    rút ra từ wishlist và đơn đã hoàn thành.
+    """
+    __tablename__ = "user_recommendations"
+    __table_args__ = (
+        UniqueConstraint('user_id', 'product_id', name='uq_user_recommendations_pair'),
+        Index('ix_user_recommendations_user_score', 'user_id', 'score'),
+    )
+
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    score = Column(Float, nullable=False, default=0)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, ForeignKey, Integer, UniqueConstraint
+from app.core.database import Base
+from app.models.mixins import AuditMixin
+
+
+class VoucherRedemption(AuditMixin, Base):
+    """
+    Số lần mỗi user đã dùng 1 voucher (đơn chưa hủy). Tăng khi tạo đơn có voucher, giảm khi hủy đơn;
+    kiểm tra giới hạn `Voucher.limit` chỉ cần đọc 1 dòng thay vì đếm lại bảng orders.
+    """
+    __tablename__ = "voucher_redemptions"
+    __table_args__ = (
+        UniqueConstraint('user_id', 'voucher_id', name='uq_voucher_redemptions_user_voucher'),
+    )
+
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    voucher_id = Column(String(36), ForeignKey("vouchers.id"), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,62 @@
+from typing import Dict, Iterable
+from sqlalchemy import update, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.cacheVersion import CacheVersion
+from app.repositories.base import BaseRepository
+
+# Namespace version stamp dùng chung giữa nơi ghi dữ liệu và các cache đọc
+PRODUCT_TYPES_VERSION = "product_types"  # Giá / tồn kho / trạng thái biến thể
+CATEGORIES_VERSION = "categories"  # Cây danh mục
+BRANDS_VERSION = "brands"  # Dữ liệu tham chiếu: thương hiệu
+TYPES_VERSION = "types"  # Dữ liệu tham chiếu: Type + TypeValue
+ROLES_VERSION = "roles"  # Dữ liệu tham chiếu: role
+VOUCHERS_VERSION = "vouchers"  # Voucher theo mã (đổi khi admin sửa hoặc voucher hết lượt)
+
+
+class CacheVersionRepository(BaseRepository[CacheVersion]):
+    """
+    Version stamp cho cache. Chỉ flush, caller tự commit cùng transaction với thay đổi dữ liệu
+    để cache không bao giờ thấy version mới trước khi dữ liệu mới được commit.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(CacheVersion, db)
+
+    def get_versions(self, names: Iterable[str]) -> Dict[str, int]:
+        """Trả về {name: version}, namespace chưa từng bump có version 0"""
+        names = list(names)
+        versions = dict.fromkeys(names, 0)
+        rows = self.db.query(CacheVersion.name, CacheVersion.version).filter(
+            CacheVersion.name.in_(names)
+        ).all()
+        versions.update({name: version for name, version in rows})
+        return versions
+
+    def get_version(self, name: str) -> int:
+        return self.get_versions([name])[name]
+
+    def bump(self, *names: str) -> None:
+        """Tăng version các namespace (namespace được seed sẵn trong migration, thiếu thì tạo dòng mới)"""
+        names = sorted(set(names))
+        if not names:
+            return
+        existing = {
+            name for (name,) in self.db.query(CacheVersion.name).filter(CacheVersion.name.in_(names)).all()
+        }
+        for name in names:
+            if name not in existing:
+                try:
+                    # Savepoint: request khác có thể vừa tạo cùng namespace
+                    with self.db.begin_nested():
+                        self.db.add(CacheVersion(name=name, version=0))
+                except IntegrityError:
+                    pass
+
+        table = CacheVersion.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.name == bindparam("stamp_name"))
+            .values(version=table.c.version + 1),
+            [{"stamp_name": name} for name in names]
+        )
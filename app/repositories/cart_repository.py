@@ -1,8 +1,11 @@
 from typing import Optional, List, Tuple
+from sqlalchemy import and_, update
 from sqlalchemy.orm import Session, joinedload
 from app.models.cart import Cart
 from app.models.cartItem import CartItem
+from app.models.product import Product
 from app.models.productType import ProductType
+from app.models.typeValue import TypeValue
 from app.repositories.base import BaseRepository
 
 
@@ -32,6 +35,68 @@ class CartRepository(BaseRepository[Cart]):
             Cart.deleted_at.is_(None),
         ).first()
 
+    def bump_version(self, cart_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Tăng version giỏ hàng (theo id hoặc theo user). Chỉ flush, caller tự commit."""
+        table = Cart.__table__
+        condition = table.c.id == cart_id if cart_id else table.c.user_id == user_id
+        self.db.execute(update(table).where(condition).values(version=table.c.version + 1))
+
+    def get_summary_fingerprint(self, user_id: str) -> List[Tuple]:
+        """
+        Các dòng (cart_id, cart_version, product_type_id, product_type_version) của giỏ hàng,
+        dùng để kiểm tra cache tóm tắt giỏ hàng còn đúng hay không (1 query nhỏ).
+        """
+        return self.db.query(
+            Cart.id.label("cart_id"),
+            Cart.version.label("cart_version"),
+            ProductType.id.label("product_type_id"),
+            ProductType.version.label("product_type_version"),
+        ).outerjoin(
+            CartItem, and_(CartItem.cart_id == Cart.id, CartItem.deleted_at.is_(None))
+        ).outerjoin(
+            ProductType, ProductType.id == CartItem.product_type_id
+        ).filter(
+            Cart.user_id == user_id,
+            Cart.deleted_at.is_(None),
+        ).all()
+
+    def get_summary_rows(self, user_id: str) -> List[Tuple]:
+        """
+        Toàn bộ dữ liệu tóm tắt giỏ hàng trong 1 query phẳng (không dựng ORM object):
+        cart, item, biến thể, tên sản phẩm / thumbnail, tên giá trị biến thể.
+        Giỏ hàng không có item vẫn trả về 1 dòng với các cột item là NULL.
+        """
+        return self.db.query(
+            Cart.id.label("cart_id"),
+            Cart.version.label("cart_version"),
+            CartItem.id.label("item_id"),
+            CartItem.quantity,
+            ProductType.id.label("product_type_id"),
+            ProductType.version.label("product_type_version"),
+            ProductType.price,
+            ProductType.discount_price,
+            ProductType.stock,
+            ProductType.image_path,
+            ProductType.volume,
+            ProductType.deleted_at.label("product_type_deleted_at"),
+            Product.id.label("product_id"),
+            Product.name.label("product_name"),
+            Product.thumbnail,
+            Product.deleted_at.label("product_deleted_at"),
+            TypeValue.name.label("variant_name"),
+        ).outerjoin(
+            CartItem, and_(CartItem.cart_id == Cart.id, CartItem.deleted_at.is_(None))
+        ).outerjoin(
+            ProductType, ProductType.id == CartItem.product_type_id
+        ).outerjoin(
+            Product, Product.id == ProductType.product_id
+        ).outerjoin(
+            TypeValue, TypeValue.id == ProductType.type_value_id
+        ).filter(
+            Cart.user_id == user_id,
+            Cart.deleted_at.is_(None),
+        ).order_by(CartItem.created_at).all()
+
 
 class CartItemRepository(BaseRepository[CartItem]):
     def __init__(self, db: Session):
@@ -46,6 +111,13 @@ class CartItemRepository(BaseRepository[CartItem]):
         items = query.offset(skip).limit(limit).all()
         return items, total
 
+    def get_active_by_cart(self, cart_id: str) -> List[CartItem]:
+        """Toàn bộ item chưa xóa của giỏ (không phân trang)"""
+        return self.db.query(CartItem).filter(
+            CartItem.cart_id == cart_id,
+            CartItem.deleted_at.is_(None),
+        ).all()
+
     def get_by_cart_and_product(self, cart_id: str, product_type_id: str) -> Optional[CartItem]:
         return self.db.query(CartItem).filter(
             CartItem.cart_id == cart_id,
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert, delete, and_
+from sqlalchemy.orm import Session
+from app.models.categoryClosure import CategoryClosure
+from app.models.mixins import generate_uuid_str
+from app.repositories.base import BaseRepository
+
+
+class CategoryClosureRepository(BaseRepository[CategoryClosure]):
+    """
+    Duy trì closure table của cây danh mục. Chỉ flush, caller tự commit cùng transaction
+    với thay đổi trên bảng categories.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(CategoryClosure, db)
+
+    def get_descendant_ids(self, category_id: str) -> List[str]:
+        """ID của danh mục và toàn bộ danh mục con cháu"""
+        rows = self.db.query(CategoryClosure.descendant_id).filter(
+            CategoryClosure.ancestor_id == category_id
+        ).all()
+        return [descendant_id for (descendant_id,) in rows]
+
+    def add_nodes(self, nodes: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """
+        Thêm các danh mục mới (chưa có con): nodes = (category_id, parent_id).
+        Mỗi danh mục nhận dòng của chính nó + 1 dòng cho mỗi tổ tiên của danh mục cha.
+        """
+        nodes = list(nodes)
+        if not nodes:
+            return
+        parent_ids = {parent_id for _, parent_id in nodes if parent_id}
+        ancestors_of = defaultdict(list)
+        if parent_ids:
+            rows = self.db.query(
+                CategoryClosure.descendant_id, CategoryClosure.ancestor_id, CategoryClosure.depth
+            ).filter(CategoryClosure.descendant_id.in_(parent_ids)).all()
+            for descendant_id, ancestor_id, depth in rows:
+                ancestors_of[descendant_id].append((ancestor_id, depth))
+
+        params = []
+        for category_id, parent_id in nodes:
+            params.append(self._row(category_id, category_id, 0))
+            for ancestor_id, depth in ancestors_of.get(parent_id, ()):
+                params.append(self._row(ancestor_id, category_id, depth + 1))
+        self.db.execute(insert(CategoryClosure.__table__), params)
+
+    def move_subtree(self, category_id: str, new_parent_id: Optional[str]) -> None:
+        """
+        Chuyển danh mục (cùng toàn bộ con cháu) sang cha mới.
+        Caller phải kiểm tra trước new_parent_id không nằm trong cây con của category_id.
+        """
+        subtree = self.db.query(CategoryClosure.descendant_id, CategoryClosure.depth).filter(
+            CategoryClosure.ancestor_id == category_id
+        ).all()
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        if not subtree_ids:
+            return
+
+        # Bỏ liên kết giữa cây con với các tổ tiên cũ, giữ nguyên liên kết bên trong cây con
+        self.db.execute(
+            delete(CategoryClosure.__table__).where(
+                and_(
+                    CategoryClosure.__table__.c.descendant_id.in_(subtree_ids),
+                    CategoryClosure.__table__.c.ancestor_id.notin_(subtree_ids),
+                )
+            )
+        )
+        if not new_parent_id:
+            return
+
+        supertree = self.db.query(CategoryClosure.ancestor_id, CategoryClosure.depth).filter(
+            CategoryClosure.descendant_id == new_parent_id
+        ).all()
+        params = [
+            self._row(ancestor_id, descendant_id, ancestor_depth + descendant_depth + 1)
+            for ancestor_id, ancestor_depth in supertree
+            for descendant_id, descendant_depth in subtree
+        ]
+        if params:
+            self.db.execute(insert(CategoryClosure.__table__), params)
+
+    def repair_missing(self, parents: Dict[str, Optional[str]]) -> int:
+        """
+        Bổ sung các cặp (tổ tiên, hậu duệ) còn thiếu theo cây parent_id hiện tại
+        (danh mục được insert thẳng vào DB, không qua service). Không xóa dòng nào.
+
+        - **parents**: {category_id: parent_id} của toàn bộ danh mục
+        Returns: số dòng đã thêm
+        """
+        existing = {
+            (ancestor_id, descendant_id)
+            for ancestor_id, descendant_id in self.db.query(
+                CategoryClosure.ancestor_id, CategoryClosure.descendant_id
+            ).all()
+        }
+        params = []
+        for category_id in parents:
+            ancestor_id, depth, seen = category_id, 0, set()
+            # Đi ngược lên gốc; dừng nếu gặp vòng lặp hoặc cha không tồn tại
+            while ancestor_id is not None and ancestor_id in parents and ancestor_id not in seen:
+                seen.add(ancestor_id)
+                if (ancestor_id, category_id) not in existing:
+                    params.append(self._row(ancestor_id, category_id, depth))
+                ancestor_id, depth = parents[ancestor_id], depth + 1
+        if params:
+            self.db.execute(insert(CategoryClosure.__table__), params)
+        return len(params)
+
+    @staticmethod
+    def _row(ancestor_id: str, descendant_id: str, depth: int) -> dict:
+        return {
+            "id": generate_uuid_str(),
+            "ancestor_id": ancestor_id,
+            "descendant_id": descendant_id,
+            "depth": depth,
+        }
@@ -33,3 +33,7 @@ class CategoryRepository(BaseRepository[Category]):
 
     def list_children(self, parent_id: str) -> List[Category]:
         return self.db.query(Category).filter(Category.parent_id == parent_id, Category.deleted_at.is_(None)).all()
+
+    def list_all_active(self) -> List[Category]:
+        """Toàn bộ danh mục chưa xóa trong 1 query (dùng để dựng cây trong bộ nhớ)"""
+        return self.db.query(Category).filter(Category.deleted_at.is_(None)).order_by(Category.created_at).all()
@@ -0,0 +1,117 @@
+from itertools import permutations
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import insert, update, delete, bindparam
+from sqlalchemy.orm import Session
+from app.models.mixins import generate_uuid_str
+from app.models.orderDetail import OrderDetail
+from app.models.productCoPurchase import ProductCoPurchase
+from app.models.productType import ProductType
+from app.repositories.base import BaseRepository
+from app.repositories.product_stat_repository import ProductStatRepository
+
+_INSERT_CHUNK_SIZE = 1000
+
+
+def jaccard(pair_count: int, count_a: int, count_b: int) -> float:
+    union = count_a + count_b - pair_count
+    return pair_count / union if union > 0 else 0.0
+
+
+class CoPurchaseRepository(BaseRepository[ProductCoPurchase]):
+    """Ma trận "thường được mua cùng". Các hàm ghi chỉ flush, caller tự commit."""
+
+    def __init__(self, db: Session):
+        super().__init__(ProductCoPurchase, db)
+
+    def get_related_ids(self, product_id: str, limit: int = 10) -> List[str]:
+        """Top sản phẩm hay được mua cùng, đọc thẳng từ index (product_id, score)"""
+        rows = self.db.query(ProductCoPurchase.related_product_id).filter(
+            ProductCoPurchase.product_id == product_id
+        ).order_by(
+            ProductCoPurchase.score.desc(),
+            ProductCoPurchase.pair_count.desc()
+        ).limit(limit).all()
+        return [related_id for (related_id,) in rows]
+
+    def replace_all(self, rows: Iterable[Tuple[str, str, int, float]]) -> int:
+        """Thay toàn bộ ma trận bằng kết quả rebuild: rows = (product_id, related_product_id, pair_count, score)"""
+        table = ProductCoPurchase.__table__
+        self.db.execute(delete(table))
+        total = 0
+        batch = []
+        for product_id, related_id, pair_count, score in rows:
+            batch.append({
+                "id": generate_uuid_str(),
+                "product_id": product_id,
+                "related_product_id": related_id,
+                "pair_count": pair_count,
+                "score": score,
+            })
+            if len(batch) >= _INSERT_CHUNK_SIZE:
+                self.db.execute(insert(table), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.db.execute(insert(table), batch)
+            total += len(batch)
+        return total
+
+    def add_order(self, order_id: str) -> None:
+        """
+        Cộng dồn 1 đơn vừa hoàn thành: +1 order_count cho từng sản phẩm, +1 pair_count cho từng cặp
+        rồi tính lại điểm các cặp bị ảnh hưởng. Cặp chưa có (mới hoặc đã bị cắt khỏi top K) được thêm vào;
+        lần rebuild kế tiếp sẽ tính lại chính xác và cắt về top K.
+        """
+        product_ids = sorted({
+            pid for (pid,) in self.db.query(ProductType.product_id)
+            .join(OrderDetail, OrderDetail.product_type_id == ProductType.id)
+            .filter(OrderDetail.order_id == order_id)
+            .all()
+        })
+        if not product_ids:
+            return
+
+        stat_repo = ProductStatRepository(self.db)
+        stat_repo.add_orders(product_ids)
+        if len(product_ids) < 2:
+            return
+
+        order_counts = stat_repo.get_order_counts(product_ids)
+        existing: Dict[Tuple[str, str], int] = {
+            (pid, related_id): pair_count
+            for pid, related_id, pair_count in self.db.query(
+                ProductCoPurchase.product_id,
+                ProductCoPurchase.related_product_id,
+                ProductCoPurchase.pair_count
+            ).filter(
+                ProductCoPurchase.product_id.in_(product_ids),
+                ProductCoPurchase.related_product_id.in_(product_ids)
+            ).all()
+        }
+
+        to_update, to_insert = [], []
+        for pid, related_id in permutations(product_ids, 2):
+            pair_count = existing.get((pid, related_id), 0) + 1
+            score = jaccard(pair_count, order_counts.get(pid, 0), order_counts.get(related_id, 0))
+            if (pid, related_id) in existing:
+                to_update.append({"b_pid": pid, "b_related": related_id, "b_count": pair_count, "b_score": score})
+            else:
+                to_insert.append({
+                    "id": generate_uuid_str(),
+                    "product_id": pid,
+                    "related_product_id": related_id,
+                    "pair_count": pair_count,
+                    "score": score,
+                })
+
+        table = ProductCoPurchase.__table__
+        if to_update:
+            self.db.execute(
+                update(table).where(
+                    table.c.product_id == bindparam("b_pid"),
+                    table.c.related_product_id == bindparam("b_related")
+                ).values(pair_count=bindparam("b_count"), score=bindparam("b_score")),
+                to_update
+            )
+        if to_insert:
+            self.db.execute(insert(table), to_insert)
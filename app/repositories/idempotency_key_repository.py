@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.idempotencyKey import IdempotencyKey
+from app.repositories.base import BaseRepository
+
+IDEMPOTENCY_PROCESSING = "processing"
+IDEMPOTENCY_COMPLETED = "completed"
+
+
+class IdempotencyKeyRepository(BaseRepository[IdempotencyKey]):
+    def __init__(self, db: Session):
+        super().__init__(IdempotencyKey, db)
+
+    def get_by_key(self, scope: str, key: str) -> Optional[IdempotencyKey]:
+        """Tra theo unique index (scope, key)"""
+        return self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+        ).first()
+
+    def try_insert(self, record: IdempotencyKey) -> bool:
+        """Insert bản ghi processing, False nếu request khác vừa giữ cùng key (đụng unique index)"""
+        try:
+            with self.db.begin_nested():
+                self.db.add(record)
+        except IntegrityError:
+            return False
+        return True
+
+    def take_over(self, record_id: str, request_hash: str, now: datetime, locked_until: datetime, expires_at: datetime) -> bool:
+        """
+        Giành lại key đã hết hạn hoặc đang bị khóa quá hạn (worker chết giữa chừng).
+        UPDATE có điều kiện nên chỉ 1 request thắng.
+        """
+        table = IdempotencyKey.__table__
+        result = self.db.execute(
+            update(table)
+            .where(
+                table.c.id == record_id,
+                (table.c.expires_at <= now)
+                | ((table.c.status == IDEMPOTENCY_PROCESSING) & (table.c.locked_until <= now)),
+            )
+            .values(
+                request_hash=request_hash,
+                status=IDEMPOTENCY_PROCESSING,
+                status_code=None,
+                response_body=None,
+                locked_until=locked_until,
+                expires_at=expires_at,
+                updated_at=func.now(),
+            )
+        )
+        return result.rowcount == 1
+
+    def complete(self, record_id: str, status_code: int, response_body: str) -> None:
+        table = IdempotencyKey.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.id == record_id)
+            .values(
+                status=IDEMPOTENCY_COMPLETED,
+                status_code=status_code,
+                response_body=response_body,
+                updated_at=func.now(),
+            )
+        )
+
+    def hold_until_expiry(self, record_id: str) -> None:
+        """Giữ khóa key tới khi key hết hạn (take_over không giành lại được trước đó)"""
+        table = IdempotencyKey.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.id == record_id)
+            .values(locked_until=table.c.expires_at)
+        )
+
+    def remove(self, record_id: str) -> None:
+        """Xóa key, trừ key đã bị hold_until_expiry (thao tác chính đã commit)"""
+        table = IdempotencyKey.__table__
+        self.db.execute(
+            delete(table).where(table.c.id == record_id, table.c.locked_until < table.c.expires_at)
+        )
+
+    def purge_expired(self, now: datetime) -> int:
+        table = IdempotencyKey.__table__
+        result = self.db.execute(delete(table).where(table.c.expires_at <= now))
+        return result.rowcount
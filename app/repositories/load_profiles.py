@@ -0,0 +1,67 @@
+"""
+Loader profiles - bộ eager-load cố định cho từng response schema
+
+Mỗi profile load đúng những quan hệ mà schema tương ứng sẽ đọc khi serialize:
+- Collection dùng selectinload (1 query IN / quan hệ, không nhân bản dòng và
+  không bị bọc subquery khi có LIMIT như joinedload)
+- Khi bật STRICT_LOADING, mọi quan hệ nằm ngoài profile được đặt
+  raiseload: lỡ lazy load trong lúc serialize sẽ ném lỗi thay vì âm thầm N+1
+"""
+from sqlalchemy.orm import selectinload, joinedload, raiseload
+
+from app.core.config import settings
+from app.models.order import Order
+from app.models.product import Product
+from app.models.productType import ProductType
+from app.models.typeValue import TypeValue
+from app.models.userNotification import UserNotification
+
+
+def is_strict_loading() -> bool:
+    return settings.STRICT_LOADING
+
+
+def _strict():
+    # sql_only=True: quan hệ đã có sẵn trong identity map vẫn đọc được, chỉ chặn query phát sinh
+    return (raiseload("*", sql_only=True),) if is_strict_loading() else ()
+
+
+def _profile(*options):
+    return (*options, *_strict())
+
+
+def product_detail():
+    """ProductDetailResponse: brand, category, product_types -> type_value -> type"""
+    return _profile(
+        selectinload(Product.brand),
+        selectinload(Product.category),
+        selectinload(Product.product_types).options(
+            selectinload(ProductType.type_value).options(
+                selectinload(TypeValue.type),
+                *_strict()
+            ),
+            *_strict()
+        ),
+    )
+
+
+def order_history():
+    """OrderResponse (list): chỉ cần details, thông tin biến thể được query riêng theo map"""
+    return _profile(
+        selectinload(Order.details),
+    )
+
+
+def admin_order_history():
+    """OrderResponse (admin list): details + user để hiển thị tên khách hàng"""
+    return _profile(
+        joinedload(Order.user),
+        selectinload(Order.details),
+    )
+
+
+def user_notification():
+    """UserNotificationResponse: kèm notification (many-to-one nên joinedload)"""
+    return _profile(
+        joinedload(UserNotification.notification),
+    )
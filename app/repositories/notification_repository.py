@@ -2,6 +2,7 @@ from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from datetime import datetime
+from app.repositories import load_profiles
 from app.repositories.base import BaseRepository
 from app.models.notification import Notification
 from app.models.userNotification import UserNotification
@@ -64,10 +65,8 @@ class NotificationRepository(BaseRepository[Notification]):
         unread_only: bool = False
     ) -> Tuple[List[UserNotification], int]:
         """Lấy danh sách notifications của user với phân trang"""
-        from sqlalchemy.orm import joinedload
-        
         query = self.db.query(UserNotification).options(
-            joinedload(UserNotification.notification)
+            *load_profiles.user_notification()
         ).filter(
             UserNotification.user_id == user_id,
             UserNotification.deleted_at.is_(None)
@@ -1,9 +1,10 @@
-from typing import Optional, List, Tuple
+from typing import Dict, Iterable, Optional, List, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, func, update
 from app.models.order import Order
 from app.models.orderDetail import OrderDetail
+from app.repositories import load_profiles
 from app.repositories.base import BaseRepository
 
 
@@ -23,7 +24,9 @@ class OrderRepository(BaseRepository[Order]):
         sort_order: str = "desc"
     ) -> Tuple[List[Order], int]:
         """Lấy danh sách đơn hàng của user với phân trang và filter"""
-        query = self.db.query(Order).filter(
+        query = self.db.query(Order).options(
+            *load_profiles.order_history()
+        ).filter(
             Order.user_id == user_id,
             Order.deleted_at.is_(None)
         )
@@ -83,17 +86,56 @@ class OrderRepository(BaseRepository[Order]):
             )\
             .first()
 
-    def get_pending_sepay_expired(self, timeout_minutes: int = 15) -> List[Order]:
-        """Lấy các đơn SEPAY pending đã quá thời gian thanh toán"""
-        cutoff_time = datetime.now() - timedelta(minutes=timeout_minutes)
+    def get_for_update(self, order_id: str) -> Optional[Order]:
+        """Đọc lại đơn (bản mới nhất) và khóa FOR UPDATE tới khi transaction kết thúc"""
         return self.db.query(Order)\
-            .options(joinedload(Order.details))\
+            .filter(Order.id == order_id)\
+            .populate_existing()\
+            .with_for_update()\
+            .first()
+
+    def get_pending_sepay_expired(self, timeout_minutes: int = 15, limit: Optional[int] = None) -> List[str]:
+        """
+        ID các đơn SEPAY pending đã quá thời gian thanh toán (cũ nhất trước), khóa FOR UPDATE.
+        Webhook SePay cũng khóa đơn (get_for_update) và chỉ xác nhận đơn còn pending, nên đơn đã hủy
+        ở đây không thể bị xác nhận thanh toán sau đó. Quét theo index (status, payment_method, created_at).
+        """
+        cutoff_time = datetime.now() - timedelta(minutes=timeout_minutes)
+        query = self.db.query(Order.id)\
             .filter(
                 Order.status == "pending",
                 Order.payment_method == "SEPAY",
                 Order.created_at < cutoff_time,
                 Order.deleted_at.is_(None)
-            ).all()
+            )\
+            .order_by(asc(Order.created_at))
+        if limit:
+            query = query.limit(limit)
+        return [order_id for (order_id,) in query.with_for_update().all()]
+
+    def cancel_pending(self, order_ids: Iterable[str]) -> int:
+        """Hủy các đơn còn pending bằng 1 UPDATE, trả về số đơn đổi trạng thái. Chỉ flush."""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return 0
+        table = Order.__table__
+        result = self.db.execute(
+            update(table)
+            .where(table.c.id.in_(order_ids), table.c.status == "pending")
+            .values(status="cancelled", updated_at=func.now())
+        )
+        return result.rowcount
+
+    def get_quantities_by_product_type(self, order_ids: Iterable[str]) -> Dict[str, int]:
+        """Tổng số lượng từng biến thể trong các đơn (1 query GROUP BY)"""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}
+        rows = self.db.query(OrderDetail.product_type_id, func.sum(OrderDetail.number))\
+            .filter(OrderDetail.order_id.in_(order_ids))\
+            .group_by(OrderDetail.product_type_id)\
+            .all()
+        return {type_id: int(quantity or 0) for type_id, quantity in rows}
 
     def update_status(self, order_id: str, status: str) -> bool:
         """Cập nhật trạng thái đơn hàng"""
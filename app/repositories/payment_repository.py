@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Iterable, Optional, List
+from sqlalchemy import func, update
 from app.models.payment import Payment
 from app.repositories.base import BaseRepository
 
@@ -62,3 +63,16 @@ class PaymentRepository(BaseRepository[Payment]):
         self.db.add(payment)
         self.db.flush()
         return payment
+
+    def cancel_pending_for_orders(self, order_ids: Iterable[str]) -> int:
+        """Hủy các payment pending của nhiều đơn bằng 1 UPDATE. Chỉ flush."""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return 0
+        table = Payment.__table__
+        result = self.db.execute(
+            update(table)
+            .where(table.c.order_id.in_(order_ids), table.c.status == "pending")
+            .values(status="cancelled", updated_at=func.now())
+        )
+        return result.rowcount
@@ -1,14 +1,14 @@
 from typing import Optional, List, Tuple, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, asc, or_, exists
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, asc, or_, exists, select, and_
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.categoryClosure import CategoryClosure
 from app.models.product import Product
+from app.models.productStat import ProductStat
 from app.models.productType import ProductType
-from app.models.typeValue import TypeValue
-from app.models.orderDetail import OrderDetail
 from app.models.review import Review
-from app.models.wishlist import Wishlist
+from app.repositories import load_profiles
 from app.repositories.base import BaseRepository
 from app.schemas.response.product import ProductDetailResponse
 
@@ -16,6 +16,15 @@ class ProductRepository(BaseRepository[Product]):
     def __init__(self, db: Session):
         super().__init__(Product, db)
 
+    def create_product(self, product_data: dict, created_by: Optional[str] = None) -> Product:
+        """Tạo sản phẩm mới (chỉ flush, caller commit cùng dòng product_stats)"""
+        product = Product(**product_data)
+        if created_by is not None:
+            product.created_by = created_by
+        self.db.add(product)
+        self.db.flush()
+        return product
+
     def search_with_filters(
         self,
         keyword: Optional[str] = None,
@@ -35,21 +44,74 @@ class ProductRepository(BaseRepository[Product]):
         """
         
         # Base query with relationships
-        query = self.db.query(Product).filter(Product.deleted_at.is_(None)).options(
-            joinedload(Product.brand),
-            joinedload(Product.category),
-            joinedload(Product.product_types)
+        query = self.db.query(Product).options(*load_profiles.product_detail())
+        query = self._filter_products(
+            query, keyword, brand_id, category_id, min_price, max_price, is_active
         )
         
+        # Get total count before pagination
+        total_count = query.count()
+        
+        # Sorting + Pagination
+        query = self._sort_products(query, sort_by, sort_order)
+        products = query.offset(skip).limit(limit).all()
+        
+        return products, total_count
+
+    def search_cards(
+        self,
+        keyword: Optional[str] = None,
+        brand_id: Optional[str] = None,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        is_active: Optional[bool] = True,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        skip: int = 0,
+        limit: int = 20
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Giống search_with_filters nhưng chỉ select các cột cần cho card (không hydrate ORM, không load biến thể)
+        Returns: (list of card dicts, total count)
+        """
+        filter_args = (keyword, brand_id, category_id, min_price, max_price, is_active)
+
+        total_count = self._filter_products(self.db.query(Product.id), *filter_args).count()
+
+        query = self._filter_products(self._card_query(), *filter_args)
+        query = self._sort_products(query, sort_by, sort_order)
+        rows = query.offset(skip).limit(limit).all()
+
+        return self._build_cards(rows), total_count
+
+    def get_cards_by_ids(self, product_ids: List[str]) -> List[Dict[str, Any]]:
+        """Lấy card của các sản phẩm theo ID, giữ đúng thứ tự truyền vào"""
+        if not product_ids:
+            return []
+        rows = self._card_query().filter(
+            Product.id.in_(product_ids),
+            Product.deleted_at.is_(None),
+            Product.is_active == True
+        ).all()
+        card_map = {card["id"]: card for card in self._build_cards(rows)}
+        return [card_map[pid] for pid in product_ids if pid in card_map]
+
+    def _filter_products(
+        self,
+        query,
+        keyword: Optional[str] = None,
+        brand_id: Optional[str] = None,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        is_active: Optional[bool] = True,
+    ):
+        """Áp dụng các điều kiện lọc sản phẩm dùng chung cho list chi tiết và list card"""
+        query = query.filter(Product.deleted_at.is_(None))
+
         # Chỉ lấy sản phẩm có ít nhất 1 product type
-        from sqlalchemy import select, and_
-        has_product_type = select(ProductType.id).where(
-            and_(
-                ProductType.product_id == Product.id,
-                ProductType.deleted_at.is_(None)
-            )
-        ).correlate(Product).exists()
-        query = query.filter(has_product_type)
+        query = query.filter(self._has_product_type())
         
         # Filter by is_active
         if is_active is not None:
@@ -69,43 +131,108 @@ class ProductRepository(BaseRepository[Product]):
         if brand_id:
             query = query.filter(Product.brand_id == brand_id)
         
-        # Filter by category
+        # Filter by category (gồm cả danh mục con cháu, qua closure table)
         if category_id:
-            query = query.filter(Product.category_id == category_id)
+            query = self._join_category_descendants(query, category_id)
         
-        # Filter by price range (using ProductType's price)
+        # Filter by price range (có ít nhất 1 biến thể nằm trong khoảng giá)
         if min_price is not None or max_price is not None:
-            query = query.join(ProductType, Product.id == ProductType.product_id)
+            price_conditions = []
             if min_price is not None:
-                query = query.filter(ProductType.price >= min_price)
+                price_conditions.append(ProductType.price >= min_price)
             if max_price is not None:
-                query = query.filter(ProductType.price <= max_price)
-            query = query.distinct()
-        
-        # Get total count before pagination
-        total_count = query.count()
-        
-        # Sorting
+                price_conditions.append(ProductType.price <= max_price)
+            query = query.filter(self._has_product_type(*price_conditions))
+
+        return query
+
+    def _join_category_descendants(self, query, category_id: str):
+        """
+        Lọc sản phẩm thuộc danh mục hoặc con cháu (qua closure table). So khớp trực tiếp category_id
+        để danh mục chưa có dòng closure (VD: nạp thẳng bằng file SQL) vẫn ra đúng sản phẩm.
+        """
+        descendants = select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+        return query.filter(
+            or_(
+                Product.category_id == category_id,
+                Product.category_id.in_(descendants),
+            )
+        )
+
+    def _has_product_type(self, *conditions):
+        return select(ProductType.id).where(
+            and_(
+                ProductType.product_id == Product.id,
+                ProductType.deleted_at.is_(None),
+                *conditions
+            )
+        ).correlate(Product).exists()
+
+    def _sort_products(self, query, sort_by: str, sort_order: str):
         sort_column = getattr(Product, sort_by, Product.created_at)
         if sort_order.lower() == "asc":
-            query = query.order_by(asc(sort_column))
-        else:
-            query = query.order_by(desc(sort_column))
-        
-        # Pagination
-        products = query.offset(skip).limit(limit).all()
-        
-        return products, total_count
+            return query.order_by(asc(sort_column))
+        return query.order_by(desc(sort_column))
+
+    def _card_query(self):
+        """Query chỉ gồm các cột hiển thị card: sản phẩm, tên brand / category, counter thống kê"""
+        return self.db.query(
+            Product.id,
+            Product.name,
+            Product.thumbnail,
+            Product.description,
+            Brand.name.label("brand_name"),
+            Category.name.label("category_name"),
+            func.coalesce(ProductStat.sold_count, 0).label("total_sold"),
+            func.coalesce(ProductStat.favorite_count, 0).label("favorite_count"),
+        ).select_from(Product)\
+            .outerjoin(Brand, Brand.id == Product.brand_id)\
+            .outerjoin(Category, Category.id == Product.category_id)\
+            .outerjoin(ProductStat, ProductStat.product_id == Product.id)
+
+    def _build_cards(self, rows) -> List[Dict[str, Any]]:
+        """Gắn khoảng giá và rating cho các card bằng 2 query GROUP BY giới hạn trong ID của trang"""
+        cards = [dict(row._mapping) for row in rows]
+        product_ids = [card["id"] for card in cards]
+        if not product_ids:
+            return cards
+
+        price_rows = self.db.query(
+            ProductType.product_id,
+            func.min(ProductType.price),
+            func.max(ProductType.price),
+            func.min(ProductType.discount_price)
+        ).filter(
+            ProductType.product_id.in_(product_ids),
+            ProductType.deleted_at.is_(None)
+        ).group_by(ProductType.product_id).all()
+        price_map = {pid: (mn, mx, mn_discount) for pid, mn, mx, mn_discount in price_rows}
+
+        rating_rows = self.db.query(
+            Review.product_id,
+            func.avg(Review.rating),
+            func.count(Review.id)
+        ).filter(
+            Review.product_id.in_(product_ids),
+            Review.deleted_at.is_(None)
+        ).group_by(Review.product_id).all()
+        rating_map = {pid: (avg, count) for pid, avg, count in rating_rows}
+
+        for card in cards:
+            min_price, max_price, min_discount_price = price_map.get(card["id"], (None, None, None))
+            avg_rating, review_count = rating_map.get(card["id"], (None, 0))
+            card.update(
+                min_price=min_price,
+                max_price=max_price,
+                min_discount_price=min_discount_price,
+                avg_rating=round(float(avg_rating), 1) if avg_rating is not None else None,
+                review_count=review_count,
+            )
+        return cards
 
     def get_detail(self, product_id: str):
         product = self.db.query(Product)\
-            .options(
-                joinedload(Product.brand),
-                joinedload(Product.category),
-                joinedload(Product.product_types)
-                    .joinedload(ProductType.type_value)
-                    .joinedload(TypeValue.type)
-            )\
+            .options(*load_profiles.product_detail())\
             .filter(
                 Product.id == product_id,
                 Product.deleted_at.is_(None),
@@ -115,41 +242,33 @@ class ProductRepository(BaseRepository[Product]):
             return None
         return ProductDetailResponse.model_validate(product)
 
+    def get_details_by_ids(self, product_ids: List[str]) -> List[Product]:
+        """
+        Lấy nhiều sản phẩm theo danh sách ID.
+        Thứ tự trả về không đảm bảo, caller tự sắp xếp lại.
+        """
+        if not product_ids:
+            return []
+        return self.db.query(Product)\
+            .options(*load_profiles.product_detail())\
+            .filter(
+                Product.id.in_(product_ids),
+                Product.deleted_at.is_(None),
+                Product.is_active == True
+            ).all()
+
     def get_by_brand(self, brand_id: str, limit: int = 20, skip: int = 0):
         """Lấy danh sách sản phẩm theo brand"""
         return self.db.query(Product).filter(
             Product.brand_id == brand_id,
             Product.deleted_at.is_(None),
             Product.is_active == True,
-        ).options(joinedload(Product.product_types)).offset(skip).limit(limit).all()
+        ).options(*load_profiles.product_detail()).offset(skip).limit(limit).all()
 
     def get_by_category(self, category_id: str, limit: int = 20, skip: int = 0):
-        """Lấy danh sách sản phẩm theo category"""
-        return self.db.query(Product).filter(
-            Product.category_id == category_id,
+        """Lấy danh sách sản phẩm theo category (gồm cả danh mục con cháu)"""
+        query = self._join_category_descendants(self.db.query(Product), category_id)
+        return query.filter(
             Product.deleted_at.is_(None),
             Product.is_active == True,
-        ).options(joinedload(Product.product_types)).offset(skip).limit(limit).all()
-
-    def get_best_selling(self, limit: int = 10):
-        return self.db.query(
-                Product,
-                func.sum(OrderDetail.quantity).label("total_sold")
-            )\
-            .join(OrderDetail, OrderDetail.product_id == Product.id)\
-            .filter(Product.deleted_at.is_(None), Product.is_active == True)\
-            .group_by(Product.id)\
-            .order_by(desc("total_sold"))\
-            .limit(limit)\
-            .all()
-
-    def get_most_favorite(self, limit: int = 10) -> List[Tuple[Product, int]]:
-        """Lấy top sản phẩm được yêu thích nhất (dựa vào số lượng trong wishlist)"""
-        return self.db.query(Product, func.count(Wishlist.id).label('favorite_count')).join(
-            Wishlist, Product.id == Wishlist.product_id
-        ).filter(
-            Product.deleted_at.is_(None),
-            Product.is_active == True
-        ).group_by(Product.id).order_by(
-            desc('favorite_count')
-        ).limit(limit).all()
+        ).options(*load_profiles.product_detail()).offset(skip).limit(limit).all()
@@ -0,0 +1,43 @@
+from typing import Iterable, List, Tuple
+from sqlalchemy import insert, delete
+from sqlalchemy.orm import Session
+from app.models.mixins import generate_uuid_str
+from app.models.productSimilarity import ProductSimilarity
+from app.repositories.base import BaseRepository
+
+_INSERT_CHUNK_SIZE = 1000
+
+
+class ProductSimilarityRepository(BaseRepository[ProductSimilarity]):
+    """Top K sản phẩm tương tự theo nội dung. Chỉ flush, caller tự commit."""
+
+    def __init__(self, db: Session):
+        super().__init__(ProductSimilarity, db)
+
+    def get_similar_ids(self, product_id: str, limit: int = 10) -> List[str]:
+        rows = self.db.query(ProductSimilarity.similar_product_id).filter(
+            ProductSimilarity.product_id == product_id
+        ).order_by(ProductSimilarity.score.desc()).limit(limit).all()
+        return [similar_id for (similar_id,) in rows]
+
+    def replace_all(self, rows: Iterable[Tuple[str, str, float]]) -> int:
+        """Thay toàn bộ bảng: rows = (product_id, similar_product_id, score)"""
+        table = ProductSimilarity.__table__
+        self.db.execute(delete(table))
+        total = 0
+        batch = []
+        for product_id, similar_id, score in rows:
+            batch.append({
+                "id": generate_uuid_str(),
+                "product_id": product_id,
+                "similar_product_id": similar_id,
+                "score": score,
+            })
+            if len(batch) >= _INSERT_CHUNK_SIZE:
+                self.db.execute(insert(table), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.db.execute(insert(table), batch)
+            total += len(batch)
+        return total
@@ -0,0 +1,328 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, update, insert, bindparam, case, or_, select
+from sqlalchemy.orm import Session
+from app.models.mixins import generate_uuid_str
+from app.models.order import Order
+from app.models.orderDetail import OrderDetail
+from app.models.product import Product
+from app.models.productStat import ProductStat
+from app.models.productType import ProductType
+from app.models.wishlist import Wishlist
+from app.models.wishlistItem import WishlistItem
+from app.repositories import load_profiles
+from app.repositories.base import BaseRepository
+
+
+class ProductStatRepository(BaseRepository[ProductStat]):
+    """
+    Repository cho bảng product_stats (thống kê duy trì sẵn theo sản phẩm).
+    Các method ghi chỉ flush, việc commit do caller quyết định để đi chung transaction với thay đổi gốc.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(ProductStat, db)
+
+    def get_top_discounted(self, limit: int = 6) -> List[ProductStat]:
+        """Đọc top sản phẩm giảm giá nhiều nhất theo index discount_percent"""
+        return self.db.query(ProductStat).filter(
+            ProductStat.discount_percent.isnot(None),
+            ProductStat.deleted_at.is_(None)
+        ).order_by(ProductStat.discount_percent.desc()).limit(limit).all()
+
+    def get_best_selling(self, limit: int = 10) -> List[Tuple[Product, int]]:
+        """Top sản phẩm bán chạy, đọc theo index sold_count"""
+        return self._get_ranked(ProductStat.sold_count, limit)
+
+    def get_most_favorite(self, limit: int = 10) -> List[Tuple[Product, int]]:
+        """Top sản phẩm được yêu thích, đọc theo index favorite_count"""
+        return self._get_ranked(ProductStat.favorite_count, limit)
+
+    def get_best_selling_ids(self, limit: int = 10) -> List[str]:
+        """Giống get_best_selling nhưng chỉ trả về ID (cho list dạng card)"""
+        return [pid for pid, _ in self._ranked_query(Product.id, ProductStat.sold_count).limit(limit).all()]
+
+    def _get_ranked(self, column, limit: int) -> List[Tuple[Product, int]]:
+        return self._ranked_query(Product, column).options(
+            *load_profiles.product_detail()
+        ).limit(limit).all()
+
+    def _ranked_query(self, entity, column):
+        return self.db.query(entity, column).join(
+            ProductStat, ProductStat.product_id == Product.id
+        ).filter(
+            column > 0,
+            Product.deleted_at.is_(None),
+            Product.is_active == True
+        ).order_by(column.desc())
+
+    def refresh_discounts(self, product_ids: Iterable[str]) -> None:
+        """
+        Tính lại biến thể giảm giá nhiều nhất cho các sản phẩm chỉ định.
+        Gọi sau khi tạo/sửa/xóa biến thể hoặc đổi trạng thái sản phẩm.
+        """
+        product_ids = list(set(pid for pid in product_ids if pid))
+        if not product_ids:
+            return
+
+        best = self._best_discounts(product_ids)
+        stats = self._get_or_create(product_ids)
+        for product_id, stat in stats.items():
+            discount_type_id, discount_percent = best.get(product_id, (None, None))
+            stat.discount_type_id = discount_type_id
+            stat.discount_percent = discount_percent
+        self.db.flush()
+
+    def create_for_new_products(self, product_ids: List[str], variant_rows: List[dict]) -> None:
+        """
+        Tạo dòng thống kê cho sản phẩm vừa tạo hàng loạt (counter = 0) bằng 1 câu INSERT executemany.
+        Discount được tính từ dữ liệu biến thể trong bộ nhớ, không đọc lại DB.
+        - **product_ids**: chỉ các sản phẩm đang active
+        """
+        if not product_ids:
+            return
+        active_ids = set(product_ids)
+        best = _pick_best_discounts(
+            (row["id"], row["product_id"], row.get("price"), row.get("discount_price"))
+            for row in variant_rows
+            if row["product_id"] in active_ids
+        )
+        rows = [
+            {
+                "id": generate_uuid_str(),
+                "product_id": pid,
+                "discount_type_id": best.get(pid, (None, None))[0],
+                "discount_percent": best.get(pid, (None, None))[1],
+                "sold_count": 0,
+                "favorite_count": 0,
+            }
+            for pid in product_ids
+        ]
+        self.db.execute(insert(ProductStat.__table__), rows)
+
+    def add_sold(self, sold_by_product: Dict[str, int]) -> None:
+        """Cộng dồn số lượng đã bán khi đơn hàng hoàn thành"""
+        self._increment(ProductStat.__table__.c.sold_count, sold_by_product)
+
+    def add_sold_for_order(self, order_id: str) -> None:
+        """Cộng số lượng đã bán của toàn bộ sản phẩm trong 1 đơn hàng (gọi khi đơn chuyển sang completed)"""
+        rows = self.db.query(
+            ProductType.product_id,
+            func.sum(OrderDetail.number)
+        ).join(OrderDetail, OrderDetail.product_type_id == ProductType.id).filter(
+            OrderDetail.order_id == order_id
+        ).group_by(ProductType.product_id).all()
+        self.add_sold({pid: int(total or 0) for pid, total in rows})
+
+    def add_favorites(self, favorites_by_product: Dict[str, int]) -> None:
+        """Cộng / trừ lượt yêu thích khi thêm / xóa wishlist item (delta có thể âm)"""
+        self._increment(ProductStat.__table__.c.favorite_count, favorites_by_product)
+
+    def add_orders(self, product_ids: Iterable[str]) -> None:
+        """Cộng 1 đơn completed cho mỗi sản phẩm (mẫu số điểm đồng mua)"""
+        self._increment(ProductStat.__table__.c.order_count, {pid: 1 for pid in set(product_ids)})
+
+    def get_order_counts(self, product_ids: Iterable[str]) -> Dict[str, int]:
+        rows = self.db.query(ProductStat.product_id, ProductStat.order_count).filter(
+            ProductStat.product_id.in_(list(product_ids))
+        ).all()
+        return {pid: count for pid, count in rows}
+
+    def set_order_counts(self, order_counts: Dict[str, int]) -> None:
+        """Ghi đè order_count từ kết quả rebuild; sản phẩm không có trong dict được đặt về 0"""
+        table = ProductStat.__table__
+        self.db.execute(update(table).values(order_count=0))
+        self._get_or_create(list(order_counts))
+        params = [{"pid": pid, "count": count} for pid, count in order_counts.items()]
+        if params:
+            self.db.execute(
+                update(table).where(table.c.product_id == bindparam("pid")).values(order_count=bindparam("count")),
+                params
+            )
+
+    def _increment(self, column, deltas: Dict[str, int]) -> None:
+        """Cộng delta vào 1 cột counter bằng 1 câu UPDATE executemany"""
+        params = [
+            {"pid": product_id, "delta": delta}
+            for product_id, delta in deltas.items()
+            if delta
+        ]
+        if not params:
+            return
+        self._get_or_create([p["pid"] for p in params])
+        table = ProductStat.__table__
+        new_value = column + bindparam("delta")
+        stmt = (
+            update(table)
+            .where(table.c.product_id == bindparam("pid"))
+            .values({column.name: case((new_value < 0, 0), else_=new_value)})
+        )
+        self.db.execute(stmt, params)
+
+    def reconcile(self) -> Dict[str, object]:
+        """
+        Tính lại toàn bộ counter từ dữ liệu gốc (order_details, wishlist_items) và sửa các dòng bị lệch,
+        đồng thời tính lại discount của các sản phẩm lệch với biến thể hiện tại.
+        Counter được ghi bằng 1 câu UPDATE tính lại từ subquery gộp (không ghi đè bằng giá trị đọc trước đó),
+        nên các lượt cộng dồn commit trong lúc job chạy không bị mất.
+        Returns: báo cáo số sản phẩm đã kiểm tra và danh sách lệch
+        """
+        missing = [
+            pid for (pid,) in self.db.query(Product.id)
+            .outerjoin(ProductStat, ProductStat.product_id == Product.id)
+            .filter(ProductStat.id.is_(None))
+            .all()
+        ]
+        if missing:
+            self._get_or_create(missing)
+
+        table = ProductStat.__table__
+        expected_sold = self._sold_subquery(table.c.product_id)
+        expected_favorite = self._favorite_subquery(table.c.product_id)
+        drift_rows = self.db.query(
+            table.c.product_id,
+            table.c.sold_count,
+            expected_sold,
+            table.c.favorite_count,
+            expected_favorite,
+        ).filter(or_(table.c.sold_count != expected_sold, table.c.favorite_count != expected_favorite)).all()
+
+        drift = [
+            {
+                "product_id": product_id,
+                "sold_count": (sold, int(expected_s or 0)),
+                "favorite_count": (favorite, int(expected_f or 0)),
+            }
+            for product_id, sold, expected_s, favorite, expected_f in drift_rows
+        ]
+        if drift:
+            self.db.execute(
+                update(table)
+                .where(table.c.product_id.in_([row["product_id"] for row in drift]))
+                .values(
+                    sold_count=self._sold_subquery(table.c.product_id),
+                    favorite_count=self._favorite_subquery(table.c.product_id),
+                )
+            )
+
+        discount_drift = self._discount_drift()
+        if discount_drift:
+            self.refresh_discounts(discount_drift)
+            drift.extend({"product_id": pid, "discount": True} for pid in discount_drift)
+
+        checked = self.db.query(func.count(ProductStat.id)).scalar()
+        return {"checked": checked, "drift": drift}
+
+    def _sold_subquery(self, product_id_column):
+        """Subquery tổng số lượng đã bán (đơn completed) của sản phẩm ở câu ngoài"""
+        return select(func.coalesce(func.sum(OrderDetail.number), 0))\
+            .select_from(OrderDetail)\
+            .join(ProductType, ProductType.id == OrderDetail.product_type_id)\
+            .join(Order, Order.id == OrderDetail.order_id)\
+            .where(
+                ProductType.product_id == product_id_column,
+                Order.status == "completed",
+                Order.deleted_at.is_(None)
+            ).scalar_subquery()
+
+    def _favorite_subquery(self, product_id_column):
+        """Subquery số wishlist item còn hiệu lực của sản phẩm ở câu ngoài"""
+        return select(func.count(WishlistItem.id))\
+            .select_from(WishlistItem)\
+            .join(ProductType, ProductType.id == WishlistItem.product_type_id)\
+            .join(Wishlist, Wishlist.id == WishlistItem.wishlist_id)\
+            .where(
+                ProductType.product_id == product_id_column,
+                WishlistItem.deleted_at.is_(None),
+                Wishlist.deleted_at.is_(None)
+            ).scalar_subquery()
+
+    def _discount_drift(self) -> List[str]:
+        """ID các sản phẩm có discount_type_id / discount_percent khác với biến thể hiện tại"""
+        best = self._best_discounts()
+        drifted = []
+        rows = self.db.query(ProductStat.product_id, ProductStat.discount_type_id, ProductStat.discount_percent).all()
+        for product_id, type_id, percent in rows:
+            expected_type_id, expected_percent = best.get(product_id, (None, None))
+            if type_id != expected_type_id:
+                drifted.append(product_id)
+            elif (percent is None) != (expected_percent is None):
+                drifted.append(product_id)
+            elif percent is not None and abs(percent - expected_percent) > 1e-6:
+                drifted.append(product_id)
+        return drifted
+
+    def _count_sold(self, product_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """Tổng số lượng đã bán theo sản phẩm, chỉ tính đơn completed"""
+        query = self.db.query(
+            ProductType.product_id,
+            func.sum(OrderDetail.number)
+        ).join(OrderDetail, OrderDetail.product_type_id == ProductType.id)\
+            .join(Order, Order.id == OrderDetail.order_id)\
+            .filter(Order.status == "completed", Order.deleted_at.is_(None))
+        if product_ids is not None:
+            query = query.filter(ProductType.product_id.in_(product_ids))
+        return {pid: int(total or 0) for pid, total in query.group_by(ProductType.product_id).all()}
+
+    def _count_favorites(self, product_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """Số wishlist item còn hiệu lực theo sản phẩm"""
+        query = self.db.query(
+            ProductType.product_id,
+            func.count(WishlistItem.id)
+        ).join(WishlistItem, WishlistItem.product_type_id == ProductType.id)\
+            .join(Wishlist, Wishlist.id == WishlistItem.wishlist_id)\
+            .filter(WishlistItem.deleted_at.is_(None), Wishlist.deleted_at.is_(None))
+        if product_ids is not None:
+            query = query.filter(ProductType.product_id.in_(product_ids))
+        return {pid: int(total) for pid, total in query.group_by(ProductType.product_id).all()}
+
+    def _best_discounts(self, product_ids: Optional[List[str]] = None) -> Dict[str, Tuple[str, float]]:
+        """Trả về {product_id: (product_type_id, discount_percent)} cho sản phẩm còn bán (None = tất cả)"""
+        query = self.db.query(
+            ProductType.id,
+            ProductType.product_id,
+            ProductType.price,
+            ProductType.discount_price
+        ).join(Product, Product.id == ProductType.product_id).filter(
+            ProductType.deleted_at.is_(None),
+            ProductType.price > 0,
+            ProductType.discount_price.isnot(None),
+            ProductType.discount_price < ProductType.price,
+            Product.deleted_at.is_(None),
+            Product.is_active == True
+        )
+        if product_ids is not None:
+            query = query.filter(ProductType.product_id.in_(product_ids))
+        return _pick_best_discounts(query.all())
+
+    def _get_or_create(self, product_ids: List[str]) -> Dict[str, ProductStat]:
+        """Lấy dòng thống kê của các sản phẩm, tạo mới (kèm counter tính từ dữ liệu gốc) nếu chưa có"""
+        stats = {
+            stat.product_id: stat
+            for stat in self.db.query(ProductStat).filter(ProductStat.product_id.in_(product_ids)).all()
+        }
+        missing = [pid for pid in product_ids if pid not in stats]
+        if missing:
+            sold_map = self._count_sold(missing)
+            favorite_map = self._count_favorites(missing)
+            for pid in missing:
+                stat = ProductStat(
+                    product_id=pid,
+                    sold_count=sold_map.get(pid, 0),
+                    favorite_count=favorite_map.get(pid, 0)
+                )
+                self.db.add(stat)
+                stats[pid] = stat
+            self.db.flush()
+        return stats
+
+
+def _pick_best_discounts(rows: Iterable[tuple]) -> Dict[str, Tuple[str, float]]:
+    """Từ các dòng (type_id, product_id, price, discount_price) chọn biến thể giảm % nhiều nhất của mỗi sản phẩm"""
+    best: Dict[str, Tuple[str, float]] = {}
+    for type_id, product_id, price, discount_price in rows:
+        if not price or price <= 0 or discount_price is None or discount_price >= price:
+            continue
+        percent = (price - discount_price) / price * 100
+        if product_id not in best or best[product_id][1] < percent:
+            best[product_id] = (type_id, percent)
+    return best
@@ -1,6 +1,7 @@
+from sqlalchemy import update, bindparam, func, or_
 from sqlalchemy.orm import Session, joinedload
 from app.models.productType import ProductType
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 
 class ProductTypeRepository:
@@ -40,6 +41,142 @@ class ProductTypeRepository:
             .first()
         )
 
+    def get_many_with_details(self, product_type_ids: Sequence[str]) -> Dict[str, ProductType]:
+        """{type_id: ProductType} các biến thể chưa xóa, load sẵn product + type_value trong 1 query"""
+        ids = list(set(product_type_ids))
+        if not ids:
+            return {}
+        rows = (
+            self.db.query(ProductType)
+            .options(joinedload(ProductType.product), joinedload(ProductType.type_value))
+            .filter(
+                ProductType.id.in_(ids),
+                ProductType.deleted_at.is_(None)
+            )
+            .all()
+        )
+        return {pt.id: pt for pt in rows}
+
+    def get_versions(self, product_type_ids: List[str], lock: bool = False) -> Dict[str, Tuple[str, int]]:
+        """
+        Trả về {type_id: (product_id, version)} của các biến thể chưa xóa
+
+        - **lock**: khóa FOR UPDATE các dòng tới khi transaction kết thúc
+        """
+        if not product_type_ids:
+            return {}
+        query = self.db.query(ProductType.id, ProductType.product_id, ProductType.version).filter(
+            ProductType.id.in_(product_type_ids),
+            ProductType.deleted_at.is_(None)
+        )
+        if lock:
+            query = query.with_for_update()
+        rows = query.all()
+        return {type_id: (product_id, version) for type_id, product_id, version in rows}
+
+    def get_sold_quantities(self, product_type_ids: List[str]) -> Dict[str, int]:
+        """
+        Tổng số lượng đã đặt của từng biến thể trên mọi order_details (mọi trạng thái đơn),
+        1 query GROUP BY trên index khóa ngoại product_type_id
+        """
+        from app.models.orderDetail import OrderDetail
+        if not product_type_ids:
+            return {}
+        rows = self.db.query(OrderDetail.product_type_id, func.sum(OrderDetail.number)).filter(
+            OrderDetail.product_type_id.in_(product_type_ids)
+        ).group_by(OrderDetail.product_type_id).all()
+        return {type_id: int(quantity or 0) for type_id, quantity in rows}
+
+    def bulk_update(
+        self,
+        fields: Sequence[str],
+        params: List[dict],
+        check_version: bool,
+        updated_by: Optional[str] = None
+    ) -> None:
+        """
+        Cập nhật cùng 1 tập cột cho nhiều biến thể bằng 1 câu UPDATE executemany, tăng version mỗi dòng.
+        rowcount của executemany là tổng cả lô nên caller đọc lại version (get_versions) để biết
+        từng dòng đã được ghi hay chưa.
+
+        - **params**: mỗi phần tử gồm `b_id`, giá trị các cột trong `fields` và `b_version` nếu check_version
+        - **check_version**: chỉ cập nhật dòng có version = b_version (optimistic concurrency)
+
+        Chỉ flush, caller tự commit.
+        """
+        if not params:
+            return
+        table = ProductType.__table__
+        conditions = [table.c.id == bindparam("b_id"), table.c.deleted_at.is_(None)]
+        if check_version:
+            conditions.append(table.c.version == bindparam("b_version"))
+
+        values = {field: bindparam(field) for field in fields}
+        values.update(
+            version=table.c.version + 1,
+            updated_at=func.now(),
+            updated_by=updated_by,
+        )
+        self.db.execute(update(table).where(*conditions).values(values), params)
+
+    def decrement_stock(self, quantities: Dict[str, int]) -> bool:
+        """
+        Trừ tồn kho nguyên tử cho cả đơn: 1 câu UPDATE có điều kiện (executemany)
+        `SET stock = stock - :q WHERE id = :id AND (stock IS NULL OR stock >= :q)`.
+        Không khóa đọc trước nên 2 checkout đồng thời không thể cùng mua đơn vị cuối cùng.
+        stock NULL = không giới hạn (giữ nguyên NULL). Tăng version mỗi dòng.
+
+        Returns: False nếu có biến thể không đủ hàng; caller phải rollback. Chỉ flush, caller tự commit.
+        """
+        params = [
+            {"b_id": type_id, "b_quantity": quantity}
+            for type_id, quantity in sorted(quantities.items())  # Cùng thứ tự khóa dòng giữa các đơn, tránh deadlock
+            if quantity > 0
+        ]
+        if not params:
+            return True
+        table = ProductType.__table__
+        result = self.db.execute(
+            update(table)
+            .where(
+                table.c.id == bindparam("b_id"),
+                table.c.deleted_at.is_(None),
+                or_(table.c.stock.is_(None), table.c.stock >= bindparam("b_quantity")),
+            )
+            .values(stock=table.c.stock - bindparam("b_quantity"), version=table.c.version + 1),
+            params
+        )
+        return result.rowcount == len(params)
+
+    def bump_versions_of_product(self, product_id: str) -> None:
+        """
+        Tăng version mọi biến thể của 1 sản phẩm (đổi tên / ảnh / xóa sản phẩm) để các cache
+        kiểm tra theo version biến thể (tóm tắt giỏ hàng) tính lại. 1 UPDATE, chỉ flush.
+        """
+        table = ProductType.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.product_id == product_id)
+            .values(version=table.c.version + 1)
+        )
+
+    def restore_stock(self, quantities: Dict[str, int]) -> None:
+        """Cộng lại tồn kho khi hủy đơn (1 UPDATE executemany, stock NULL giữ nguyên). Chỉ flush."""
+        params = [
+            {"b_id": type_id, "b_quantity": quantity}
+            for type_id, quantity in sorted(quantities.items())
+            if quantity > 0
+        ]
+        if not params:
+            return
+        table = ProductType.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(stock=table.c.stock + bindparam("b_quantity"), version=table.c.version + 1),
+            params
+        )
+
     @staticmethod
     def get_by_product_and_variant_id(
         db: Session,
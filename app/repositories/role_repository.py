@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.models.role import Role
 from app.repositories.base import BaseRepository
+from app.repositories.cache_version_repository import CacheVersionRepository, ROLES_VERSION
 
 
 class RoleRepository(BaseRepository[Role]):
@@ -24,6 +25,8 @@ class RoleRepository(BaseRepository[Role]):
         """Lấy role hoặc tạo mới nếu chưa tồn tại"""
         role = self.get_by_name(name)
         if not role:
+            # Bump cùng transaction với insert (create() commit cả 2)
+            CacheVersionRepository(self.db).bump(ROLES_VERSION)
             role = self.create(
                 {"name": name.upper()},
                 created_by=created_by
@@ -0,0 +1,41 @@
+from typing import Callable
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.slugCounter import SlugCounter
+from app.repositories.base import BaseRepository
+
+
+class SlugCounterRepository(BaseRepository[SlugCounter]):
+    """
+    Cấp hậu tố slug tăng dần. Chỉ flush, caller tự commit; dòng bộ đếm bị khóa (FOR UPDATE)
+    tới khi transaction kết thúc nên 2 request cùng slug gốc không thể nhận cùng hậu tố.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(SlugCounter, db)
+
+    def next_suffix(self, scope: str, base: str, seed: Callable[[], int]) -> int:
+        """
+        Tăng và trả về hậu tố kế tiếp của (scope, base).
+
+        - **seed**: hàm tính hậu tố lớn nhất đang có trong dữ liệu, chỉ gọi khi bộ đếm chưa tồn tại
+        """
+        counter = self._lock(scope, base)
+        if counter is None:
+            try:
+                # Savepoint: request khác có thể vừa tạo cùng bộ đếm
+                with self.db.begin_nested():
+                    self.db.add(SlugCounter(scope=scope, base=base, last_suffix=seed()))
+            except IntegrityError:
+                pass
+            counter = self._lock(scope, base)
+
+        counter.last_suffix += 1
+        self.db.flush()
+        return counter.last_suffix
+
+    def _lock(self, scope: str, base: str):
+        return self.db.query(SlugCounter).filter(
+            SlugCounter.scope == scope,
+            SlugCounter.base == base
+        ).with_for_update().first()
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+from app.models.mixins import generate_uuid_str
+from app.models.stockReservation import StockReservation
+from app.repositories.base import BaseRepository
+
+# Trạng thái giữ hàng
+RESERVATION_ACTIVE = "active"  # Đang giữ, chờ thanh toán
+RESERVATION_COMMITTED = "committed"  # Đã thanh toán / chuyển COD, hàng thuộc về đơn
+RESERVATION_RELEASED = "released"  # Đã trả lại kho (hủy / hết hạn)
+
+
+class StockReservationRepository(BaseRepository[StockReservation]):
+    """Giữ hàng theo đơn. Các hàm chỉ flush, caller tự commit cùng transaction với đơn hàng."""
+
+    def __init__(self, db: Session):
+        super().__init__(StockReservation, db)
+
+    def create_for_order(self, order_id: str, quantities: Dict[str, int], expires_at: datetime) -> None:
+        """Tạo giữ hàng cho từng biến thể của đơn (1 INSERT executemany)"""
+        rows = [
+            {
+                "id": generate_uuid_str(),
+                "order_id": order_id,
+                "product_type_id": type_id,
+                "quantity": quantity,
+                "expires_at": expires_at,
+                "status": RESERVATION_ACTIVE,
+            }
+            for type_id, quantity in quantities.items()
+            if quantity > 0
+        ]
+        if rows:
+            self.db.execute(insert(StockReservation.__table__), rows)
+
+    def set_status_for_orders(self, order_ids: Iterable[str], status: str) -> int:
+        """Chuyển các giữ hàng đang active của đơn sang `status`, trả về số dòng đổi"""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return 0
+        table = StockReservation.__table__
+        result = self.db.execute(
+            update(table)
+            .where(table.c.order_id.in_(order_ids), table.c.status == RESERVATION_ACTIVE)
+            .values(status=status, updated_at=func.now())
+        )
+        return result.rowcount
+
+    def get_expired_active(self, now: datetime, limit: int) -> List[Tuple[str, str, str, int]]:
+        """(id, order_id, product_type_id, quantity) các giữ hàng active đã hết hạn, quét theo index (status, expires_at)"""
+        return self.db.query(
+            StockReservation.id,
+            StockReservation.order_id,
+            StockReservation.product_type_id,
+            StockReservation.quantity,
+        ).filter(
+            StockReservation.status == RESERVATION_ACTIVE,
+            StockReservation.expires_at <= now,
+        ).order_by(StockReservation.expires_at).limit(limit).all()
+
+    def mark(self, reservation_ids: Iterable[str], status: str) -> None:
+        reservation_ids = list(reservation_ids)
+        if not reservation_ids:
+            return
+        table = StockReservation.__table__
+        self.db.execute(
+            update(table)
+            .where(table.c.id.in_(reservation_ids), table.c.status == RESERVATION_ACTIVE)
+            .values(status=status, updated_at=func.now())
+        )
@@ -0,0 +1,45 @@
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import insert, delete
+from sqlalchemy.orm import Session
+from app.models.mixins import generate_uuid_str
+from app.models.userRecommendation import UserRecommendation
+from app.repositories.base import BaseRepository
+
+_INSERT_CHUNK_SIZE = 1000
+
+
+class UserRecommendationRepository(BaseRepository[UserRecommendation]):
+    """Top N gợi ý theo user. Chỉ flush, caller tự commit."""
+
+    def __init__(self, db: Session):
+        super().__init__(UserRecommendation, db)
+
+    def get_product_ids(self, user_id: str, limit: int = 20) -> List[str]:
+        rows = self.db.query(UserRecommendation.product_id).filter(
+            UserRecommendation.user_id == user_id
+        ).order_by(UserRecommendation.score.desc()).limit(limit).all()
+        return [product_id for (product_id,) in rows]
+
+    def replace(self, rows: Iterable[Tuple[str, str, float]], user_ids: Optional[List[str]] = None) -> int:
+        """
+        Ghi đè gợi ý: rows = (user_id, product_id, score).
+        - **user_ids**: chỉ xóa gợi ý cũ của các user này (None = xóa toàn bộ bảng)
+        """
+        table = UserRecommendation.__table__
+        if user_ids is None:
+            self.db.execute(delete(table))
+        elif user_ids:
+            self.db.execute(delete(table).where(table.c.user_id.in_(user_ids)))
+
+        total = 0
+        batch = []
+        for user_id, product_id, score in rows:
+            batch.append({"id": generate_uuid_str(), "user_id": user_id, "product_id": product_id, "score": score})
+            if len(batch) >= _INSERT_CHUNK_SIZE:
+                self.db.execute(insert(table), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.db.execute(insert(table), batch)
+            total += len(batch)
+        return total
@@ -4,6 +4,7 @@ from sqlalchemy import and_
 from app.models.user import User
 from app.models.role import Role
 from app.repositories.base import BaseRepository
+from app.repositories.cache_version_repository import CacheVersionRepository, ROLES_VERSION
 
 
 class UserRepository(BaseRepository[User]):
@@ -46,6 +47,7 @@ class UserRepository(BaseRepository[User]):
             role = Role(name=role_name.upper())
             self.db.add(role)
             self.db.flush()
+            CacheVersionRepository(self.db).bump(ROLES_VERSION)
         
         if role not in user.roles:
             user.roles.append(role)
@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy import bindparam, case, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.order import Order
+from app.models.voucherRedemption import VoucherRedemption
+from app.repositories.base import BaseRepository
+
+
+class VoucherRedemptionRepository(BaseRepository[VoucherRedemption]):
+    """Counter lượt dùng voucher theo user. Các hàm ghi chỉ flush, caller tự commit cùng đơn hàng."""
+
+    def __init__(self, db: Session):
+        super().__init__(VoucherRedemption, db)
+
+    def get_counts(self, user_id: str, voucher_ids: Iterable[str]) -> Dict[str, int]:
+        """{voucher_id: số lần user đã dùng}, voucher chưa dùng không có trong kết quả"""
+        voucher_ids = list(voucher_ids)
+        if not voucher_ids:
+            return {}
+        rows = self.db.query(VoucherRedemption.voucher_id, VoucherRedemption.count).filter(
+            VoucherRedemption.user_id == user_id,
+            VoucherRedemption.voucher_id.in_(voucher_ids),
+        ).all()
+        return {voucher_id: count for voucher_id, count in rows}
+
+    def increment(self, user_id: str, voucher_id: str, limit: Optional[int] = None) -> bool:
+        """
+        Tăng lượt dùng nguyên tử, có điều kiện `count < limit` nếu voucher có giới hạn.
+        Returns: False nếu user đã dùng hết số lần cho phép.
+        """
+        table = VoucherRedemption.__table__
+        conditions = [table.c.user_id == user_id, table.c.voucher_id == voucher_id]
+        if limit:
+            conditions.append(table.c.count < limit)
+        for _ in range(2):
+            result = self.db.execute(
+                update(table).where(*conditions).values(count=table.c.count + 1, updated_at=func.now())
+            )
+            if result.rowcount == 1:
+                return True
+            # Chưa có dòng (hoặc đã chạm giới hạn): thử tạo dòng mới với count = 1
+            try:
+                with self.db.begin_nested():
+                    self.db.add(VoucherRedemption(user_id=user_id, voucher_id=voucher_id, count=1))
+                return True
+            except IntegrityError:
+                # Dòng đã tồn tại (request khác vừa tạo hoặc đã chạm giới hạn): chạy lại UPDATE có điều kiện
+                continue
+        return False
+
+    def release_for_orders(self, order_ids: Iterable[str]) -> None:
+        """Giảm lượt dùng voucher của các đơn vừa bị hủy (gộp theo user + voucher, 1 UPDATE executemany)"""
+        order_ids = list(order_ids)
+        if not order_ids:
+            return
+        rows = self.db.query(Order.user_id, Order.voucher_id, func.count(Order.id)).filter(
+            Order.id.in_(order_ids),
+            Order.voucher_id.isnot(None),
+        ).group_by(Order.user_id, Order.voucher_id).all()
+        if not rows:
+            return
+        table = VoucherRedemption.__table__
+        amount = bindparam("b_amount")
+        self.db.execute(
+            update(table)
+            .where(table.c.user_id == bindparam("b_user_id"), table.c.voucher_id == bindparam("b_voucher_id"))
+            .values(count=case((table.c.count > amount, table.c.count - amount), else_=0), updated_at=func.now()),
+            [
+                {"b_user_id": user_id, "b_voucher_id": voucher_id, "b_amount": count}
+                for user_id, voucher_id, count in rows
+            ]
+        )
@@ -1,6 +1,6 @@
 from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, asc, desc
+from sqlalchemy import and_, or_, asc, desc, func, update
 from app.models.voucher import Voucher
 from app.repositories.base import BaseRepository
 
@@ -20,6 +20,21 @@ class VoucherRepository(BaseRepository[Voucher]):
             )
         ).first()
     
+    def redeem(self, voucher_id: str) -> Optional[int]:
+        """
+        Trừ 1 lượt voucher nguyên tử: `UPDATE ... SET quantity = quantity - 1 WHERE quantity > 0`.
+        Returns: số lượt còn lại, None nếu voucher đã hết lượt / bị xóa. Chỉ flush, caller tự commit.
+        """
+        table = Voucher.__table__
+        result = self.db.execute(
+            update(table)
+            .where(table.c.id == voucher_id, table.c.quantity > 0, table.c.deleted_at.is_(None))
+            .values(quantity=table.c.quantity - 1, updated_at=func.now())
+        )
+        if result.rowcount != 1:
+            return None
+        return self.db.query(Voucher.quantity).filter(Voucher.id == voucher_id).scalar()
+
     def search(
         self,
         skip: int = 0,
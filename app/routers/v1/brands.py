@@ -7,10 +7,10 @@ from app.dependencies.pagination import get_pagination
 from app.dependencies.permission import require_roles
 from app.schemas.request.brand import BrandResponse
 from app.schemas.response.base import BaseResponse
+from app.core.responses import json_bytes_response
+from app.services import reference_data_service
 from app.services.brand_service import (
-    get_brand,
     get_brand_by_name,
-    get_brands,
     create_brand_with_image,
     update_brand_with_image,
     soft_delete_brand,
@@ -25,21 +25,20 @@ def list_brands(
     db: Session = Depends(get_db),
     current_user = Depends(require_roles("CLIENT", "ADMIN")),
 ):
-    items, total = get_brands(
-        db,
-        skip=params.get("skip", 0),
-        limit=params.get("limit", 100),
-        q=params.get("q"),
-        sort_by=params.get("sort_by", "id"),
-        sort_dir=params.get("sort_dir", "desc"),
-    )
-    meta = {**params, "total": total}
-    return BaseResponse(success=True, message="OK", data=items, meta=meta)
+    return json_bytes_response(reference_data_service.brand_list_json(db, params))
+
+
+@router.get("/slug/{slug}", response_model=BaseResponse[BrandResponse])
+def read_brand_by_slug(slug: str, db: Session = Depends(get_db)):
+    obj = reference_data_service.brands.get_by_key(db, slug)
+    if not obj:
+        return BaseResponse(success=False, message="Không tìm thấy thương hiệu.", data=None)
+    return BaseResponse(success=True, message="Lấy thương hiệu thành công.", data=obj)
 
 
 @router.get("/{brand_id}", response_model=BaseResponse[BrandResponse])
 def read_brand(brand_id: str, db: Session = Depends(get_db)):
-    obj = get_brand(db, brand_id)
+    obj = reference_data_service.brands.get(db, brand_id)
     if not obj:
         return BaseResponse(success=False, message="Không tìm thấy thương hiệu.", data=None)
     return BaseResponse(success=True, message="Lấy thương hiệu thành công.", data=obj)
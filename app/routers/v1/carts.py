@@ -4,15 +4,17 @@ from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
+from app.core.responses import json_bytes_response
 from app.schemas.request.cart import (
     CartCreate,
     CartResponse,
     CartItemCreate,
     CartItemResponse,
     CartItemUpdate,
+    CartBatchRequest,
 )
 from app.schemas.response.base import BaseResponse
-from app.schemas.response.cart import CartFullResponse, CartItemFullResponse
+from app.schemas.response.cart import CartFullResponse, CartItemFullResponse, CartSummaryResponse
 from app.services.cart_service import (
     create_cart_for_user,
     get_cart_by_user,
@@ -22,7 +24,9 @@ from app.services.cart_service import (
     update_cart_item,
     delete_cart_item,
     get_cart_item,
+    apply_cart_batch,
 )
+from app.services.cart_summary_service import get_cart_summary_json
 from app.models.productType import ProductType
 from app.models.cartItem import CartItem
 
@@ -52,6 +56,33 @@ def get_my_cart(db: Session = Depends(get_db), current_user = Depends(get_curren
     return BaseResponse(success=True, message="Lấy giỏ hàng thành công.", data=obj)
 
 
+@router.get("/me/summary", response_model=BaseResponse[CartSummaryResponse])
+def get_my_cart_summary(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """
+    Tóm tắt giỏ hàng tính sẵn phía server: giá hiệu lực và thành tiền từng dòng, cờ hết hàng /
+    vượt tồn kho, subtotal (chỉ các dòng mua được) và voucher giảm nhiều nhất áp dụng được.
+    """
+    content = get_cart_summary_json(db, str(current_user.id))
+    if content is None:
+        return BaseResponse(success=False, message="Không tìm thấy giỏ hàng.", data=None)
+    return json_bytes_response(content)
+
+
+@router.post("/me/batch", response_model=BaseResponse[CartFullResponse])
+def batch_update_my_cart(data: CartBatchRequest, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """
+    Áp dụng nhiều thao tác giỏ hàng trong 1 request (thêm, sửa số lượng, xóa, đổi biến thể).
+    Các thao tác chạy theo thứ tự trong 1 transaction; 1 thao tác lỗi thì không thay đổi gì.
+    Trả về giỏ hàng sau khi cập nhật.
+    """
+    cart, errors = apply_cart_batch(db, str(current_user.id), data.operations)
+    if errors:
+        return BaseResponse(success=False, message="Không thể cập nhật giỏ hàng.", data=None, errors=errors)
+    if cart.items:
+        cart.items = [item for item in cart.items if item.deleted_at is None]
+    return BaseResponse(success=True, message="Giỏ hàng đã được cập nhật.", data=cart)
+
+
 @router.post("/items", response_model=BaseResponse[CartItemResponse], status_code=status.HTTP_201_CREATED)
 def add_item_auto(item_in: CartItemCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """
@@ -7,6 +7,7 @@ from app.dependencies.pagination import get_pagination
 from app.dependencies.permission import require_roles
 from app.schemas.request.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.schemas.response.base import BaseResponse
+from app.core.responses import json_bytes_response
 from app.services.category_service import (
     get_category,
     get_categories,
@@ -16,7 +17,7 @@ from app.services.category_service import (
     update_category_with_image,
     delete_category,
     get_category_children,
-    get_category_tree,
+    get_category_tree_json,
 )
 
 router = APIRouter()
@@ -42,8 +43,7 @@ def list_categories(params: dict = Depends(get_pagination), db: Session = Depend
 @router.get("/tree", response_model=BaseResponse[List[CategoryResponse]])
 def category_tree(db: Session = Depends(get_db)):
     """Lấy cây danh mục (Public)"""
-    items = get_category_tree(db, max_depth=3)
-    return BaseResponse(success=True, message="Lấy cây danh mục thành công.", data=items)
+    return json_bytes_response(get_category_tree_json(db, max_depth=3))
 
 
 @router.get("/{category_id}", response_model=BaseResponse[CategoryResponse])
@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
+from app.core.responses import render_json, json_bytes_response
 from app.schemas.response.base import BaseResponse
 from app.schemas.request.checkout import (
     CheckoutPreviewRequest,
     CreateOrderRequest,
-    ValidateVoucherRequest
+    ValidateVoucherRequest,
+    BestVoucherRequest
 )
 from app.schemas.response.checkout import (
     CheckoutPreviewResponse,
     CreateOrderResponse,
     ValidateVoucherResponse,
+    BestVoucherResponse,
     PaymentStatusResponse
 )
 from app.services.checkout_service import CheckoutService
+from app.services import idempotency_service, best_voucher_service
+from app.services.idempotency_service import CREATE_ORDER_SCOPE, SEPAY_WEBHOOK_SCOPE
 from app.services.sepay_service import SePayService
 from app.models.order import Order
 
@@ -88,11 +95,39 @@ def validate_voucher(
     )
 
 
+@router.post("/best-voucher", response_model=BaseResponse[Optional[BestVoucherResponse]])
+def find_best_voucher(
+    request: BestVoucherRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Tìm voucher giảm nhiều nhất cho giỏ hàng.
+    
+    - Xét tất cả voucher còn lượt, đạt đơn tối thiểu với subtotal
+    - Bỏ qua voucher user đã dùng hết giới hạn
+    - data = null nếu không có voucher phù hợp
+    """
+    best = best_voucher_service.find_best_voucher(db, current_user.id, request.subtotal)
+    if best is None:
+        return BaseResponse(success=True, message="Không có voucher phù hợp.", data=None)
+
+    return BaseResponse(
+        success=True,
+        message="Tìm voucher tốt nhất thành công.",
+        data=BestVoucherResponse(
+            **best,
+            total_after_discount=request.subtotal - best["discount_amount"]
+        )
+    )
+
+
 @router.post("/create-order", response_model=BaseResponse[CreateOrderResponse])
 def create_order(
     request: CreateOrderRequest,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=200)
 ):
     """
     Tạo đơn hàng mới.
@@ -103,10 +138,22 @@ def create_order(
     - Xóa cart items đã đặt
     - Nếu SEPAY: trả về QR code thanh toán
     - Nếu COD: đơn hàng pending chờ giao
+    - Header `Idempotency-Key` (tùy chọn): gửi lại cùng key khi retry sẽ nhận lại đúng response
+      của lần tạo đơn trước, không tạo đơn mới
     """
+    claim = idempotency_service.claim(
+        CREATE_ORDER_SCOPE,
+        f"{current_user.id}:{idempotency_key}" if idempotency_key else None,
+        idempotency_service.hash_request(request.model_dump_json()),
+    )
+    if claim.replay is not None:
+        return claim.replay
+
     try:
         checkout_service = CheckoutService(db)
-        
+        # Khóa key trong chính transaction tạo đơn: đơn đã commit thì key không bị nhả / giành lại nữa
+        claim.hold(db)
+
         order = checkout_service.create_order(
             user_id=current_user.id,
             items=request.items,
@@ -115,25 +162,38 @@ def create_order(
             voucher_code=request.voucher_code,
             note=request.note
         )
-        
-        # Tạo thông báo cho admin về đơn hàng mới
-        try:
-            from app.services.notification_service import notify_admins_new_order
-            customer_name = f"{current_user.first_name or ''} {current_user.last_name or ''}".strip() or current_user.email
-            notify_admins_new_order(
-                db=db,
-                order_id=str(order.id),
-                customer_name=customer_name,
-                total_amount=order.final_amount,
-                created_by=str(current_user.id)
-            )
-            print(f"✅ Notification created for order {order.id}")
-        except Exception as notif_error:
-            # Log lỗi nhưng không fail order creation
-            print(f"❌ Error creating notification: {notif_error}")
-            import traceback
-            traceback.print_exc()
-        
+    except Exception as e:
+        db.rollback()
+        claim.release()
+        import traceback
+        print(f"Create order error: {e}")
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # Từ đây đơn đã được tạo: lỗi phía sau không được nhả key (client retry sẽ tạo đơn trùng)
+    # Tạo thông báo cho admin về đơn hàng mới
+    try:
+        from app.services.notification_service import notify_admins_new_order
+        customer_name = f"{current_user.first_name or ''} {current_user.last_name or ''}".strip() or current_user.email
+        notify_admins_new_order(
+            db=db,
+            order_id=str(order.id),
+            customer_name=customer_name,
+            total_amount=order.final_amount,
+            created_by=str(current_user.id)
+        )
+        print(f"✅ Notification created for order {order.id}")
+    except Exception as notif_error:
+        # Log lỗi nhưng không fail order creation
+        print(f"❌ Error creating notification: {notif_error}")
+        import traceback
+        traceback.print_exc()
+
+    message = "Đặt hàng thành công!" if request.payment_method.upper() == "COD" else "Vui lòng thanh toán để hoàn tất đơn hàng."
+    try:
         # Nếu thanh toán SePay, tạo QR URL
         payment_url = None
         payment_content = None
@@ -148,10 +208,11 @@ def create_order(
             payment_url = payment_info["qr_url"]
             payment_content = payment_info.get("content")
             print(f"Generated payment_url: {payment_url}")
-        
-        return BaseResponse(
+
+        content = render_json(
+            BaseResponse[CreateOrderResponse],
             success=True,
-            message="Đặt hàng thành công!" if request.payment_method.upper() == "COD" else "Vui lòng thanh toán để hoàn tất đơn hàng.",
+            message=message,
             data=CreateOrderResponse(
                 order_id=order.id,
                 status=order.status,
@@ -164,14 +225,18 @@ def create_order(
                 created_at=order.created_at
             )
         )
-    except Exception as e:
+    except Exception:
+        # Vẫn lưu response tối thiểu (mã đơn) để retry nhận lại đúng đơn này;
+        # thông tin thanh toán lấy lại qua GET /checkout/payment-info/{order_id}
         import traceback
-        print(f"Create order error: {e}")
         traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+        content = json.dumps(
+            {"success": True, "message": message, "data": {"order_id": order.id}},
+            ensure_ascii=False
+        ).encode("utf-8")
+
+    claim.complete(content)
+    return json_bytes_response(content)
 
 
 @router.get("/payment-status/{order_id}", response_model=BaseResponse[PaymentStatusResponse])
@@ -226,11 +291,9 @@ def get_payment_info(
             detail="Đơn hàng không phải thanh toán SePay."
         )
     
-    # Kiểm tra đơn hàng đã hết thời gian thanh toán chưa
+    # Kiểm tra đơn hàng đã hết thời gian thanh toán chưa (đơn quá hạn do job định kỳ hủy)
     checkout_service = CheckoutService(db)
     if checkout_service.is_payment_expired(order):
-        # Tự động hủy đơn hàng hết hạn
-        checkout_service.update_payment_status(order_id, "cancelled")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Đơn hàng đã hết thời gian thanh toán."
@@ -367,40 +430,70 @@ async def sepay_webhook(request: Request, db: Session = Depends(get_db)):
         content = data.get("content", "")
         amount = data.get("transferAmount", 0)
         transaction_id = data.get("referenceCode") or str(data.get("id", ""))
-        
-        # Parse order_id từ content (format: DH{8_chars})
-        order_short_id = sepay_service.parse_webhook_content(content)
-        if not order_short_id:
-            return {"success": False, "message": "Invalid content format"}
-        
-        # Tìm order có id kết thúc bằng 8 ký tự này
-        order = db.query(Order).filter(
-            Order.id.like(f"%{order_short_id.lower()}%")
-        ).first()
-        
-        if not order:
-            # Thử tìm với dạng có dấu gạch ngang
-            order = db.query(Order).filter(
-                Order.id.contains(order_short_id.lower())
-            ).first()
-        
-        if not order:
-            return {"success": False, "message": "Order not found"}
-        
-        # Kiểm tra số tiền
-        if abs(amount - order.final_amount) > 1000:  # Cho phép sai lệch 1000đ
-            return {"success": False, "message": "Amount mismatch"}
-        
-        # Cập nhật trạng thái
-        checkout_service = CheckoutService(db)
-        checkout_service.update_payment_status(
-            order_id=order.id,
-            status="success",
-            transaction_id=transaction_id
+
+        # SePay gửi lại webhook khi retry: cùng mã giao dịch thì trả kết quả đã lưu
+        claim = idempotency_service.claim(
+            SEPAY_WEBHOOK_SCOPE,
+            str(data.get("id") or transaction_id or "") or None,
+            idempotency_service.hash_request(payload),
         )
+        if claim.replay is not None:
+            return claim.replay
+
+        try:
+            result = _confirm_sepay_payment(db, sepay_service, content, amount, transaction_id)
+        except Exception:
+            claim.release()
+            raise
+
+        # Chỉ lưu kết quả thành công; lỗi thì nhả key để lần SePay gửi lại được xử lý lại
+        if result["success"]:
+            claim.complete(json.dumps(result).encode("utf-8"))
+        else:
+            claim.release()
+        return result
         
-        return {"success": True, "message": "Payment confirmed", "order_id": order.id}
-        
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"SePay webhook error: {e}")
         return {"success": False, "message": str(e)}
+
+
+def _confirm_sepay_payment(db: Session, sepay_service: SePayService, content: str, amount: float, transaction_id: str) -> dict:
+    """Tìm đơn theo nội dung chuyển khoản, kiểm tra số tiền và xác nhận thanh toán"""
+    # Parse order_id từ content (format: DH{8_chars})
+    order_short_id = sepay_service.parse_webhook_content(content)
+    if not order_short_id:
+        return {"success": False, "message": "Invalid content format"}
+    
+    # Tìm order có id kết thúc bằng 8 ký tự này
+    order = db.query(Order).filter(
+        Order.id.like(f"%{order_short_id.lower()}%")
+    ).first()
+    
+    if not order:
+        # Thử tìm với dạng có dấu gạch ngang
+        order = db.query(Order).filter(
+            Order.id.contains(order_short_id.lower())
+        ).first()
+    
+    if not order:
+        return {"success": False, "message": "Order not found"}
+    
+    # Kiểm tra số tiền
+    if abs(amount - order.final_amount) > 1000:  # Cho phép sai lệch 1000đ
+        return {"success": False, "message": "Amount mismatch"}
+    
+    # Cập nhật trạng thái
+    checkout_service = CheckoutService(db)
+    confirmed = checkout_service.update_payment_status(
+        order_id=order.id,
+        status="success",
+        transaction_id=transaction_id
+    )
+    if not confirmed:
+        # Đơn đã hủy (quá hạn thanh toán) hoặc không còn payment chờ xác nhận
+        return {"success": False, "message": "Order is not pending", "order_id": order.id}
+    
+    return {"success": True, "message": "Payment confirmed", "order_id": order.id}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+
+from app.schemas.response.base import BaseResponse
+from app.schemas.response.home import HomeResponse
+from app.services.home_service import get_home_data
+
+router = APIRouter()
+
+
+@router.get("", response_model=BaseResponse[HomeResponse])
+async def get_home():
+    """
+    Lấy toàn bộ dữ liệu trang chủ trong 1 request (Public)
+
+    Gồm: top giảm giá, bán chạy, yêu thích, danh mục và thương hiệu.
+    Các section được truy vấn song song và cache trong thời gian ngắn.
+    """
+    data = await get_home_data()
+    return BaseResponse(success=True, message="Lấy dữ liệu trang chủ thành công.", data=data)
@@ -9,6 +9,7 @@ from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.permission import require_roles
 from app.schemas.response.base import BaseResponse
+from app.core.responses import fast_response
 from app.schemas.request.notification import (
     UserNotificationResponse,
     NotificationListResponse,
@@ -45,16 +46,16 @@ def get_notifications(
     
     unread_count = service.get_unread_count(current_user.id)
     
-    return BaseResponse(
-        success=True,
+    return fast_response(
+        BaseResponse[NotificationListResponse],
         message="Lấy danh sách thông báo thành công.",
-        data=NotificationListResponse(
-            items=items,
-            total=total,
-            skip=skip,
-            limit=limit,
-            unread_count=unread_count
-        )
+        data={
+            "items": items,
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "unread_count": unread_count
+        }
     )
 
 
@@ -12,6 +12,7 @@ from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.permission import require_roles
 from app.schemas.response.base import BaseResponse
+from app.core.responses import fast_response
 from app.models.productType import ProductType
 
 router = APIRouter()
@@ -115,15 +116,10 @@ def get_my_orders(
             "items": items
         })
     
-    return BaseResponse(
-        success=True,
+    return fast_response(
+        BaseResponse[OrderHistoryResponse],
         message="Lấy lịch sử đơn hàng thành công.",
-        data=OrderHistoryResponse(
-            items=order_responses,
-            total=total,
-            skip=skip,
-            limit=limit
-        )
+        data={"items": order_responses, "total": total, "skip": skip, "limit": limit}
     )
 
 
@@ -155,33 +151,13 @@ def get_order_detail(
             detail="Không tìm thấy đơn hàng."
         )
     
-    # --- Xử lý hết hạn thanh toán SePay (Lazy check - không cần cronjob) ---
+    # --- Hạn thanh toán SePay (chỉ đọc; đơn quá hạn do job expire_unpaid_sepay_orders hủy) ---
     payment_expires_at = None
     remaining_seconds = None
     
-    if order.status == "pending" and order.payment_method == "SEPAY":
-        checkout_service = CheckoutService(db)
-        
-        # Check if payment has expired and auto-cancel if needed
-        if checkout_service.is_payment_expired(order):
-            # Update payment status
-            if order.payment:
-                order.payment.status = "cancelled"
-            
-            # Update order status to cancelled
-            order.status = "cancelled"
-            
-            # Restore stock
-            checkout_service._restore_stock(order)
-            
-            # Commit changes
-            db.commit()
-            db.refresh(order)
-        else:
-            # Payment still valid, calculate remaining time
-            if order.created_at:
-                payment_expires_at = order.created_at + timedelta(minutes=PAYMENT_TIMEOUT_MINUTES)
-                remaining_seconds = checkout_service.get_payment_remaining_time(order)
+    if order.status == "pending" and order.payment_method == "SEPAY" and order.created_at:
+        payment_expires_at = order.created_at + timedelta(minutes=PAYMENT_TIMEOUT_MINUTES)
+        remaining_seconds = CheckoutService(db).get_payment_remaining_time(order)
     
     
     # Query ProductType để lấy thông tin product
@@ -304,10 +280,11 @@ def update_order_status(
     from app.models.order import Order
     from app.services.order_state_machine import validate_transition, requires_payment_confirmation
     
-    # Lấy đơn hàng với payment info
+    # Lấy đơn hàng với payment info, khóa dòng đơn tới khi commit: 2 request đổi trạng thái cùng lúc
+    # không thể cùng qua validate_transition (vd cộng sold / đồng mua 2 lần khi cùng chuyển "completed")
     order = db.query(Order).options(
         joinedload(Order.payment)
-    ).filter(Order.id == order_id, Order.deleted_at.is_(None)).first()
+    ).filter(Order.id == order_id, Order.deleted_at.is_(None)).with_for_update(of=Order).first()
     
     if not order:
         raise HTTPException(
@@ -331,6 +308,20 @@ def update_order_status(
             detail=error_msg
         )
     
+    # Đơn hoàn thành thì cộng vào counter bán chạy + ma trận đồng mua (cùng transaction với đổi trạng thái)
+    if new_status == OrderStatus.completed:
+        from app.repositories.product_stat_repository import ProductStatRepository
+        from app.services.co_purchase_service import record_completed_order
+        from app.services.recommendation_service import mark_user_dirty
+        ProductStatRepository(db).add_sold_for_order(order.id)
+        record_completed_order(db, order.id)
+        mark_user_dirty(order.user_id)
+    
+    # Đơn bị hủy không còn tính vào giới hạn dùng voucher của user
+    if new_status == OrderStatus.cancelled and order.voucher_id:
+        from app.repositories.voucher_redemption_repository import VoucherRedemptionRepository
+        VoucherRedemptionRepository(db).release_for_orders([order.id])
+    
     # Cập nhật trạng thái
     order.status = new_status.value
     order.updated_at = datetime.now()
@@ -421,10 +412,10 @@ def get_all_orders_admin(
     """
     from app.models.order import Order
     from app.models.user import User
-    from sqlalchemy.orm import joinedload
+    from app.repositories import load_profiles
     
     query = db.query(Order).options(
-        joinedload(Order.user)
+        *load_profiles.admin_order_history()
     ).filter(Order.deleted_at.is_(None))
     
     if status:
@@ -478,13 +469,8 @@ def get_all_orders_admin(
             "items": items
         })
     
-    return BaseResponse(
-        success=True,
+    return fast_response(
+        BaseResponse[OrderHistoryResponse],
         message="Lấy danh sách đơn hàng thành công.",
-        data=OrderHistoryResponse(
-            items=order_responses,
-            total=total,
-            skip=skip,
-            limit=limit
-        )
+        data={"items": order_responses, "total": total, "skip": skip, "limit": limit}
     )
@@ -1,29 +1,38 @@
-
+import io
 from fastapi import APIRouter, Depends, Query, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from typing import List, Optional, Union
 from enum import Enum
 
 from app.dependencies.database import get_db
 from app.dependencies.auth import get_current_user
 from app.dependencies.permission import require_roles
 from app.schemas.response.base import BaseResponse
+from app.core.responses import fast_response
 from app.schemas.response.product import (
     ProductVariantResponse, 
     ProductVariantsListResponse,
     ProductCardResponse,
-    ProductListResponse
+    ProductListResponse,
+    ProductBatchResponse,
+    ProductImportResponse
 )
 from app.schemas.response.product import ProductDetailResponse
 from app.schemas.response.pagination import PaginatedResponse
-from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest
+from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest, ProductBatchRequest
 from app.services.product_service import ProductService
+from app.services.co_purchase_service import get_bought_together
+from app.services.similar_product_service import get_similar_products
+from app.services.recommendation_service import get_recommended_products
+from app.services.product_import_service import ProductImportService, PRODUCT_IMPORT_FORMATS
 from app.schemas.response.product import ProductVariantResponse, ProductVariantsListResponse
 
 from app.models.product import Product
 from app.models.productType import ProductType
 from app.models.review import Review
 from app.repositories.product_repository import ProductRepository
+from app.repositories.product_stat_repository import ProductStatRepository
+from app.repositories.cache_version_repository import CacheVersionRepository, PRODUCT_TYPES_VERSION
 
 
 router = APIRouter()
@@ -58,9 +67,23 @@ class ProductSortBy(str, Enum):
     updated_at = "updated_at"
 
 
+class ProductImportFormat(str, Enum):
+    csv = "csv"
+    jsonl = "jsonl"
+
+
+class ProductView(str, Enum):
+    detail = "detail"  # Đầy đủ thông tin + danh sách biến thể
+    card = "card"  # Chỉ các trường hiển thị card (tên, ảnh, brand, khoảng giá)
+
+
+# Item trong list: ProductDetailResponse (view=detail) hoặc ProductCardResponse (view=card)
+ProductListItem = Union[ProductDetailResponse, ProductCardResponse]
+
+
 # ==================== GET (Public) ====================
 
-@router.get("", response_model=BaseResponse[PaginatedResponse[ProductDetailResponse]])
+@router.get("", response_model=BaseResponse[PaginatedResponse[ProductListItem]])
 def get_all_products(
     keyword: Optional[str] = Query(None, description="Tìm kiếm theo tên hoặc mô tả"),
     brand_id: Optional[str] = Query(None, description="Lọc theo thương hiệu"),
@@ -72,11 +95,13 @@ def get_all_products(
     sort_order: SortOrder = Query(SortOrder.desc, description="Thứ tự sắp xếp"),
     skip: int = Query(0, ge=0, description="Số lượng bỏ qua"),
     limit: int = Query(20, ge=1, le=100, description="Số lượng lấy"),
+    view: ProductView = Query(ProductView.detail, description="Kiểu dữ liệu trả về: detail hoặc card"),
     db: Session = Depends(get_db)
 ):
     """Lấy danh sách sản phẩm với tìm kiếm và lọc (Public)"""
     service = ProductService(db)
-    products, total = service.search_with_filters(
+    search = service.search_cards if view == ProductView.card else service.search_with_filters
+    products, total = search(
         keyword=keyword,
         brand_id=brand_id,
         category_id=category_id,
@@ -89,25 +114,26 @@ def get_all_products(
         limit=limit
     )
     
-    paginated_data = PaginatedResponse(
-        items=products,
-        total=total,
-        skip=skip,
-        limit=limit
-    )
-    
-    return BaseResponse(
-        success=True, 
-        message="Lấy danh sách sản phẩm thành công.", 
-        data=paginated_data
+    item_type = ProductCardResponse if view == ProductView.card else ProductDetailResponse
+    return fast_response(
+        BaseResponse[PaginatedResponse[item_type]],
+        message="Lấy danh sách sản phẩm thành công.",
+        data={"items": products, "total": total, "skip": skip, "limit": limit}
     )
 
 
-@router.get("/best-selling", response_model=BaseResponse[List[ProductDetailResponse]])
-def get_best_selling_products(limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/best-selling", response_model=BaseResponse[List[ProductListItem]])
+def get_best_selling_products(
+    limit: int = 10,
+    view: ProductView = Query(ProductView.detail, description="Kiểu dữ liệu trả về: detail hoặc card"),
+    db: Session = Depends(get_db)
+):
     service = ProductService(db)
-    result = service.get_best_selling(limit)
-    products = [prod for prod, _ in result]
+    if view == ProductView.card:
+        products = service.get_best_selling_cards(limit)
+    else:
+        result = service.get_best_selling(limit)
+        products = [prod for prod, _ in result]
     return BaseResponse(success=True, message="Lấy top sản phẩm bán chạy thành công.", data=products)
 
 
@@ -119,27 +145,33 @@ def get_most_favorite_products(limit: int = 10, db: Session = Depends(get_db)):
     return BaseResponse(success=True, message="Lấy top sản phẩm được yêu thích thành công.", data=products)
 
 
-@router.get("/brand/{brand_id}", response_model=BaseResponse[List[ProductDetailResponse]])
+@router.get("/brand/{brand_id}", response_model=BaseResponse[List[ProductListItem]])
 def get_products_by_brand(
     brand_id: str,
     limit: int = Query(20, ge=1, le=100),
     skip: int = 0,
+    view: ProductView = Query(ProductView.detail, description="Kiểu dữ liệu trả về: detail hoặc card"),
     db: Session = Depends(get_db)
 ):
     service = ProductService(db)
-    products = service.get_by_brand(brand_id, limit=limit, skip=skip)
+    if view == ProductView.card:
+        products = service.get_cards_by_brand(brand_id, limit=limit, skip=skip)
+    else:
+        products = service.get_by_brand(brand_id, limit=limit, skip=skip)
     return BaseResponse(success=True, message="Lấy sản phẩm theo brand thành công.", data=products)
 
 
-@router.get("/category/{category_id}", response_model=BaseResponse[PaginatedResponse[ProductDetailResponse]])
+@router.get("/category/{category_id}", response_model=BaseResponse[PaginatedResponse[ProductListItem]])
 def get_products_by_category(
     category_id: str,
     limit: int = Query(20, ge=1, le=100),
     skip: int = 0,
+    view: ProductView = Query(ProductView.detail, description="Kiểu dữ liệu trả về: detail hoặc card"),
     db: Session = Depends(get_db)
 ):
     service = ProductService(db)
-    products, total = service.search_with_filters(
+    search = service.search_cards if view == ProductView.card else service.search_with_filters
+    products, total = search(
         category_id=category_id,
         is_active=True,
         skip=skip,
@@ -154,6 +186,117 @@ def get_products_by_category(
     return BaseResponse(success=True, message="Lấy sản phẩm theo category thành công.", data=paginated_data)
 
 
+@router.get("/recommended", response_model=BaseResponse[List[ProductCardResponse]])
+def get_recommended_products_endpoint(
+    limit: int = Query(20, ge=1, le=30),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Gợi ý sản phẩm theo sở thích của user (brand, danh mục, loại da từ wishlist và đơn đã hoàn thành).
+    User chưa có dữ liệu nhận danh sách bán chạy; `meta.source` cho biết nguồn gợi ý.
+    """
+    products, source = get_recommended_products(db, current_user.id, limit)
+    return BaseResponse(
+        success=True,
+        message="Lấy sản phẩm gợi ý thành công.",
+        data=products,
+        meta={"source": source}
+    )
+
+
+@router.post("/batch", response_model=BaseResponse[ProductBatchResponse])
+def get_products_batch(data: ProductBatchRequest, db: Session = Depends(get_db)):
+    """
+    Lấy chi tiết nhiều sản phẩm trong 1 request (Public)
+
+    - **ids**: Danh sách ID sản phẩm (tối đa 100)
+
+    Kết quả giữ đúng thứ tự ID gửi lên; ID không tìm thấy được trả về trong `missing_ids`.
+    """
+    service = ProductService(db)
+    items, missing_ids = service.get_details_by_ids(data.ids)
+    return BaseResponse(
+        success=True,
+        message="Lấy danh sách sản phẩm thành công.",
+        data=ProductBatchResponse(items=items, missing_ids=missing_ids)
+    )
+
+
+@router.post("/import", response_model=BaseResponse[ProductImportResponse])
+def import_products(
+    file: UploadFile = File(..., description="File CSV hoặc JSONL (UTF-8)"),
+    file_format: Optional[ProductImportFormat] = Query(
+        None, alias="format", description="Định dạng file, mặc định lấy theo đuôi file"
+    ),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_roles("admin"))
+):
+    """
+    Import sản phẩm + biến thể hàng loạt (Admin only)
+
+    - **JSONL**: mỗi dòng 1 sản phẩm `{"name", "brand", "category", "description", "thumbnail", "is_active", "product_types": [...]}`
+    - **CSV**: mỗi dòng 1 biến thể; các dòng liên tiếp cùng `product_key` (mặc định `name`) là 1 sản phẩm.
+      Cột sản phẩm: product_key, name, brand, category, description, thumbnail, is_active.
+      Cột biến thể: price, discount_price, quantity, stock, volume, ingredients, usage, skin_type, origin, image_path, type_value_id, status
+
+    Brand / category được tìm theo slug của tên, chưa có thì tạo mới.
+    File được đọc dạng stream và ghi theo từng chunk; sản phẩm lỗi được trả về trong `errors` kèm số dòng.
+    """
+    if file_format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        if extension not in PRODUCT_IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Không xác định được định dạng file, chỉ hỗ trợ CSV hoặc JSONL."
+            )
+        file_format = ProductImportFormat(extension)
+
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = ProductImportService(db, created_by=str(current_user.id)).import_lines(lines, file_format.value)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File phải được mã hóa UTF-8.")
+    finally:
+        lines.detach()
+
+    return BaseResponse(
+        success=True,
+        message=f"Đã import {report['imported_products']}/{report['total_products']} sản phẩm.",
+        data=report
+    )
+
+
+@router.get("/{product_id}/bought-together", response_model=BaseResponse[List[ProductCardResponse]])
+def get_bought_together_products(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """Sản phẩm thường được mua cùng (tính sẵn từ các đơn đã hoàn thành)"""
+    products = get_bought_together(db, product_id, limit)
+    return BaseResponse(
+        success=True,
+        message="Lấy sản phẩm thường được mua cùng thành công.",
+        data=products
+    )
+
+
+@router.get("/{product_id}/similar", response_model=BaseResponse[List[ProductCardResponse]])
+def get_similar_products_endpoint(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """Sản phẩm tương tự theo nội dung (tên, mô tả, loại da, thành phần), dùng được cho cả sản phẩm mới"""
+    products = get_similar_products(db, product_id, limit)
+    return BaseResponse(
+        success=True,
+        message="Lấy sản phẩm tương tự thành công.",
+        data=products
+    )
+
+
 @router.get("/{product_id}", response_model=BaseResponse[ProductDetailResponse])
 def get_product_detail(product_id: str, db: Session = Depends(get_db)):
     service = ProductService(db)
@@ -430,6 +573,9 @@ def create_product_type(
     )
     
     db.add(product_type)
+    db.flush()
+    ProductStatRepository(db).refresh_discounts([product_id])
+    CacheVersionRepository(db).bump(PRODUCT_TYPES_VERSION)
     db.commit()
     db.refresh(product_type)
     
@@ -483,7 +629,12 @@ def update_product_type(
         setattr(product_type, field, value)
     
     product_type.updated_by = str(current_user.id)
+    product_type.version = (product_type.version or 0) + 1
     
+    # Giá / giảm giá / trạng thái thay đổi thì cập nhật lại bảng xếp hạng giảm giá
+    db.flush()
+    ProductStatRepository(db).refresh_discounts([product_id])
+    CacheVersionRepository(db).bump(PRODUCT_TYPES_VERSION)
     db.commit()
     db.refresh(product_type)
     
@@ -519,7 +670,11 @@ def delete_product_type(
     # Soft delete
     product_type.deleted_at = datetime.utcnow()
     product_type.deleted_by = str(current_user.id)
+    product_type.version = (product_type.version or 0) + 1
     
+    db.flush()
+    ProductStatRepository(db).refresh_discounts([product_id])
+    CacheVersionRepository(db).bump(PRODUCT_TYPES_VERSION)
     db.commit()
     
     return BaseResponse(
@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.dependencies.database import get_db
+from app.dependencies.permission import require_roles
 from app.services.product_type_service import ProductTypeService
-from app.schemas.response.product_type_schema import ProductTypeDetailResponse
+from app.schemas.request.product import ProductTypeBulkUpdateRequest
+from app.schemas.response.product_type_schema import ProductTypeDetailResponse, ProductTypeBulkUpdateResponse
 from app.schemas.response.base import BaseResponse
 
 router = APIRouter()
@@ -27,6 +29,26 @@ def get_top_discounted_product_types(db: Session = Depends(get_db), limit: int =
     )
 
 
+@router.patch("/types/bulk", response_model=BaseResponse[ProductTypeBulkUpdateResponse])
+def bulk_update_product_types(
+    data: ProductTypeBulkUpdateRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_roles("admin"))
+):
+    """
+    Cập nhật giá / giảm giá / tồn kho / trạng thái nhiều biến thể trong 1 request (Admin only)
+
+    - Chỉ các trường được gửi lên mới bị ghi đè (gửi `discount_price: null` để bỏ giảm giá)
+    - **version**: version biến thể client đang xem; nếu đã bị sửa bởi người khác thì item nằm trong `conflicts`
+    """
+    result = ProductTypeService.bulk_update(db, data.items, updated_by=str(current_user.id))
+    return BaseResponse(
+        success=True,
+        message=f"Đã cập nhật {len(result['updated'])}/{len(data.items)} biến thể",
+        data=result
+    )
+
+
 @router.get(
     "/{product_id}/types/{variant_id}",
     response_model=BaseResponse[ProductTypeDetailResponse]
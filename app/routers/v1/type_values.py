@@ -11,8 +11,9 @@ from app.schemas.request.type import (
     TypeValueResponse,
 )
 from app.schemas.response.base import BaseResponse
+from app.core.responses import json_bytes_response
+from app.services import reference_data_service
 from app.services.type_service import (
-    list_type_values,
     create_type_value,
     update_type_value,
     delete_type_value,
@@ -24,9 +25,7 @@ router = APIRouter(prefix="/{type_id}/values", tags=["type-values"])
 
 @router.get("/", response_model=BaseResponse[List[TypeValueResponse]])
 def list_values(type_id: str, params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
-    items, total = list_type_values(db, type_id, skip=params.get("skip", 0), limit=params.get("limit", 100))
-    meta = {**params, "total": total}
-    return BaseResponse(success=True, message="OK", data=items, meta=meta)
+    return json_bytes_response(reference_data_service.type_value_list_json(db, type_id, params))
 
 
 @router.post("/", response_model=BaseResponse[TypeValueResponse], status_code=status.HTTP_201_CREATED)
@@ -40,7 +39,7 @@ def create_value(type_id: str, value_in: TypeValueCreate, db: Session = Depends(
 
 @router.get("/{value_id}", response_model=BaseResponse[TypeValueResponse])
 def read_value(type_id: str, value_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
-    obj = get_type_value(db, value_id)
+    obj = reference_data_service.type_values.get(db, value_id)
     if not obj or obj.type_id != type_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Value not found")
     return BaseResponse(success=True, message="OK", data=obj)
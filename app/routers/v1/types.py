@@ -12,9 +12,9 @@ from app.schemas.request.type import (
     TypeWithValuesResponse,
 )
 from app.schemas.response.base import BaseResponse
+from app.core.responses import json_bytes_response
+from app.services import reference_data_service
 from app.services.type_service import (
-    get_type,
-    get_types,
     create_type,
     update_type,
     delete_type,
@@ -25,21 +25,12 @@ router = APIRouter()
 
 @router.get("/", response_model=BaseResponse[List[TypeWithValuesResponse]])
 def list_types(params: dict = Depends(get_pagination), db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
-    items, total = get_types(
-        db,
-        skip=params.get("skip", 0),
-        limit=params.get("limit", 100),
-        q=params.get("q"),
-        sort_by=params.get("sort_by", "id"),
-        sort_dir=params.get("sort_dir", "desc"),
-    )
-    meta = {**params, "total": total}
-    return BaseResponse(success=True, message="OK", data=items, meta=meta)
+    return json_bytes_response(reference_data_service.type_list_json(db, params))
 
 
 @router.get("/{type_id}", response_model=BaseResponse[TypeResponse])
 def read_type(type_id: str, db: Session = Depends(get_db), current_user = Depends(require_roles("CLIENT", "ADMIN"))):
-    obj = get_type(db, type_id)
+    obj = reference_data_service.types.get(db, type_id)
     if not obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Type not found")
     return BaseResponse(success=True, message="OK", data=obj)
@@ -59,18 +59,16 @@ def list_vouchers(
     )
     
     # Filter vouchers by limit (only show vouchers user can still use)
-    from app.models.order import Order
+    from app.repositories.voucher_redemption_repository import VoucherRedemptionRepository
+    usage_counts = VoucherRedemptionRepository(db).get_counts(
+        current_user.id, [voucher.id for voucher in items if voucher.limit]
+    )
     filtered_items = []
     for voucher in items:
         # Check if voucher has limit
         if voucher.limit:
-            # Count how many times current user has used this voucher
-            usage_count = db.query(Order).filter(
-                Order.voucher_id == voucher.id,
-                Order.user_id == current_user.id,
-                Order.status != 'cancelled',
-                Order.deleted_at.is_(None)
-            ).count()
+            # How many times current user has used this voucher (1 query for the whole page)
+            usage_count = usage_counts.get(voucher.id, 0)
             
             # Only include if user hasn't reached limit
             if usage_count < voucher.limit:
@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field
+from enum import Enum
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from datetime import datetime
 
+CART_BATCH_MAX_OPERATIONS = 100
+
 
 class CartItemBase(BaseModel):
     product_type_id: str = Field(...)
@@ -60,3 +63,56 @@ class CartInDBBase(CartBase):
 
 class CartResponse(CartInDBBase):
     pass
+
+
+class CartBatchOperationType(str, Enum):
+    ADD = "add"
+    UPDATE = "update"
+    REMOVE = "remove"
+    CHANGE_VARIANT = "change_variant"
+
+
+class CartBatchOperation(BaseModel):
+    """
+    1 thao tác trên giỏ hàng:
+    - add: product_type_id + quantity (cộng dồn nếu đã có trong giỏ)
+    - update: item_id + quantity (quantity = 0 là xóa)
+    - remove: item_id
+    - change_variant: item_id + product_type_id mới, quantity tùy chọn (mặc định giữ số lượng cũ)
+    """
+    op: CartBatchOperationType
+    item_id: Optional[str] = Field(None, description="ID cart item (update / remove / change_variant)")
+    product_type_id: Optional[str] = Field(None, description="ID biến thể (add / change_variant)")
+    quantity: Optional[int] = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def check_required_fields(self):
+        if self.op == CartBatchOperationType.ADD:
+            if not self.product_type_id or not self.quantity:
+                raise ValueError("add cần product_type_id và quantity >= 1")
+        elif self.op == CartBatchOperationType.UPDATE:
+            if not self.item_id or self.quantity is None:
+                raise ValueError("update cần item_id và quantity")
+        elif self.op == CartBatchOperationType.REMOVE:
+            if not self.item_id:
+                raise ValueError("remove cần item_id")
+        elif not self.item_id or not self.product_type_id:
+            raise ValueError("change_variant cần item_id và product_type_id")
+        return self
+
+
+class CartBatchRequest(BaseModel):
+    """Nhiều thao tác giỏ hàng áp dụng theo thứ tự trong 1 transaction (lỗi 1 thao tác thì không áp dụng gì)"""
+    operations: List[CartBatchOperation] = Field(..., min_length=1, max_length=CART_BATCH_MAX_OPERATIONS)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "operations": [
+                    {"op": "add", "product_type_id": "uuid-type-1", "quantity": 2},
+                    {"op": "update", "item_id": "uuid-item-1", "quantity": 3},
+                    {"op": "change_variant", "item_id": "uuid-item-2", "product_type_id": "uuid-type-3"},
+                    {"op": "remove", "item_id": "uuid-item-3"}
+                ]
+            }
+        }
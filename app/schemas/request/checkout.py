@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CheckoutItemRequest(BaseModel):
@@ -29,3 +29,8 @@ class ValidateVoucherRequest(BaseModel):
     """Request validate voucher"""
     code: str
     subtotal: float
+
+
+class BestVoucherRequest(BaseModel):
+    """Request tìm voucher tốt nhất cho giỏ hàng"""
+    subtotal: float = Field(..., ge=0)
@@ -1,6 +1,18 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 
+# Số lượng ID tối đa cho 1 request lấy sản phẩm hàng loạt
+PRODUCT_BATCH_MAX_IDS = 100
+
+# Số lượng biến thể tối đa cho 1 request cập nhật giá / tồn kho hàng loạt
+PRODUCT_TYPE_BULK_MAX_ITEMS = 5000
+
+# Các cột biến thể trong file CSV import (mỗi dòng CSV = 1 biến thể)
+PRODUCT_IMPORT_VARIANT_FIELDS = (
+    "price", "discount_price", "quantity", "stock", "volume", "ingredients", "usage",
+    "skin_type", "origin", "image_path", "type_value_id", "status",
+)
+
 
 class ProductTypeCreateRequest(BaseModel):
     """Schema để tạo ProductType kèm theo Product"""
@@ -10,7 +22,7 @@ class ProductTypeCreateRequest(BaseModel):
     stock: Optional[int] = Field(None, ge=0, description="Số lượng tồn kho")
     volume: Optional[str] = Field(None, max_length=50, description="Dung tích (VD: 50ml)")
     ingredients: Optional[str] = Field(None, description="Thành phần")
-    usage: Optional[str] = Field(None, description="Cách sử dụng")
+    usage: Optional[str] = Field(None, max_length=255, description="Cách sử dụng")
     skin_type: Optional[str] = Field(None, max_length=100, description="Loại da phù hợp")
     origin: Optional[str] = Field(None, max_length=100, description="Xuất xứ")
     image_path: Optional[str] = Field(None, max_length=255, description="Đường dẫn hình ảnh")
@@ -27,7 +39,7 @@ class ProductTypeUpdateRequest(BaseModel):
     stock: Optional[int] = Field(None, ge=0)
     volume: Optional[str] = Field(None, max_length=50)
     ingredients: Optional[str] = None
-    usage: Optional[str] = None
+    usage: Optional[str] = Field(None, max_length=255)
     skin_type: Optional[str] = Field(None, max_length=100)
     origin: Optional[str] = Field(None, max_length=100)
     image_path: Optional[str] = Field(None, max_length=255)
@@ -35,6 +47,43 @@ class ProductTypeUpdateRequest(BaseModel):
     status: Optional[str] = Field(None, max_length=50)
 
 
+class ProductTypeBulkUpdateItem(BaseModel):
+    """1 biến thể cần cập nhật; chỉ các trường được gửi lên mới bị ghi đè"""
+    type_id: str = Field(..., description="ID của ProductType")
+    price: Optional[float] = Field(None, ge=0)
+    discount_price: Optional[float] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+    status: Optional[str] = Field(None, max_length=50)
+    version: Optional[int] = Field(
+        None, ge=1, description="Version đang xem; khác version hiện tại thì bị từ chối (bỏ trống để ghi đè)"
+    )
+
+
+class ProductTypeBulkUpdateRequest(BaseModel):
+    """Schema cập nhật giá / tồn kho / trạng thái nhiều biến thể (VD: chạy khuyến mãi)"""
+    items: List[ProductTypeBulkUpdateItem] = Field(
+        ..., min_length=1, max_length=PRODUCT_TYPE_BULK_MAX_ITEMS
+    )
+
+    @field_validator("items")
+    @classmethod
+    def check_unique_type_ids(cls, items: List[ProductTypeBulkUpdateItem]) -> List[ProductTypeBulkUpdateItem]:
+        type_ids = [item.type_id for item in items]
+        if len(type_ids) != len(set(type_ids)):
+            raise ValueError("Mỗi type_id chỉ được xuất hiện 1 lần")
+        return items
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"type_id": "uuid-type-1", "discount_price": 199000, "version": 3},
+                    {"type_id": "uuid-type-2", "price": 350000, "discount_price": None, "stock": 20}
+                ]
+            }
+        }
+
+
 class ProductCreateRequest(BaseModel):
     """Schema để tạo Product mới"""
     name: str = Field(..., min_length=1, max_length=200, description="Tên sản phẩm")
@@ -80,3 +129,30 @@ class ProductUpdateRequest(BaseModel):
                 "is_active": True
             }
         }
+
+
+class ProductBatchRequest(BaseModel):
+    """Schema để lấy nhiều sản phẩm trong 1 request (giỏ hàng, wishlist, đã xem gần đây)"""
+    ids: List[str] = Field(
+        ..., min_length=1, max_length=PRODUCT_BATCH_MAX_IDS, description="Danh sách ID sản phẩm"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": ["uuid-product-1", "uuid-product-2"]
+            }
+        }
+
+
+class ProductImportRow(BaseModel):
+    """1 sản phẩm trong file import (JSONL: 1 dòng, CSV: các dòng liên tiếp cùng product_key)"""
+    name: str = Field(..., min_length=1, max_length=200, description="Tên sản phẩm")
+    brand: Optional[str] = Field(None, max_length=100, description="Tên thương hiệu (tự tạo nếu chưa có slug)")
+    category: Optional[str] = Field(None, max_length=100, description="Tên danh mục (tự tạo nếu chưa có slug)")
+    description: Optional[str] = Field(None, max_length=255, description="Mô tả sản phẩm")
+    thumbnail: Optional[str] = Field(None, max_length=255, description="Đường dẫn thumbnail")
+    is_active: bool = Field(True, description="Trạng thái hoạt động")
+    product_types: List[ProductTypeCreateRequest] = Field(
+        default=[], description="Danh sách biến thể"
+    )
@@ -1,11 +1,10 @@
 from typing import Generic, Optional, TypeVar, List, Dict
 from pydantic import BaseModel
 from pydantic import ConfigDict
-from pydantic.generics import GenericModel
 
 T = TypeVar("T")
 
-class BaseResponse(GenericModel, Generic[T]):
+class BaseResponse(BaseModel, Generic[T]):
     success: bool
     message: str
     data: Optional[T] = None
@@ -65,3 +65,42 @@ class CartFullResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+# --- Cart summary (tóm tắt giỏ hàng tính sẵn phía server) ---
+
+class CartSummaryLine(BaseModel):
+    """1 dòng trong tóm tắt giỏ hàng, giá và cờ tồn kho đã tính sẵn"""
+    item_id: str
+    product_type_id: str
+    product_id: Optional[str] = None
+    product_name: Optional[str] = None
+    variant_name: Optional[str] = None
+    image: Optional[str] = None
+    quantity: int
+    price: float
+    discount_price: Optional[float] = None
+    effective_price: float  # discount_price nếu có, ngược lại price
+    line_total: float
+    stock: Optional[int] = None
+    is_available: bool  # Biến thể / sản phẩm chưa bị xóa
+    out_of_stock: bool  # Hết hàng (stock <= 0)
+    exceeds_stock: bool  # Số lượng trong giỏ vượt tồn kho
+
+
+class CartSummaryVoucher(BaseModel):
+    """Voucher tốt nhất áp dụng được cho subtotal hiện tại"""
+    id: str
+    code: str
+    description: Optional[str] = None
+    discount_amount: float
+
+
+class CartSummaryResponse(BaseModel):
+    """Tóm tắt giỏ hàng: chỉ các dòng mua được mới tính vào subtotal"""
+    cart_id: str
+    items: list[CartSummaryLine]
+    total_quantity: int
+    subtotal: float
+    best_voucher: Optional[CartSummaryVoucher] = None
+    total_after_voucher: float
@@ -41,6 +41,16 @@ class ValidateVoucherResponse(BaseModel):
     message: str
 
 
+class BestVoucherResponse(BaseModel):
+    """Voucher giảm nhiều nhất áp dụng được cho subtotal"""
+    id: str
+    code: str
+    description: Optional[str] = None
+    min_order_amount: Optional[float] = None
+    discount_amount: float
+    total_after_discount: float
+
+
 class CreateOrderResponse(BaseModel):
     """Response tạo đơn hàng"""
     order_id: str
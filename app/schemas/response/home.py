@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.request.brand import BrandResponse
+from app.schemas.request.category import CategoryResponse
+from app.schemas.response.product import ProductDetailResponse
+
+
+class HomeResponse(BaseModel):
+    """Dữ liệu tổng hợp cho trang chủ (gộp các section vào 1 request)"""
+    top_discounted: List[dict] = []
+    best_selling: List[ProductDetailResponse] = []
+    most_favorite: List[ProductDetailResponse] = []
+    categories: List[CategoryResponse] = []
+    brands: List[BrandResponse] = []
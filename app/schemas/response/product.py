@@ -72,6 +72,12 @@ class ProductDetailResponse(BaseModel):
     product_types: List[ProductTypeResponse] = []
 
 
+class ProductBatchResponse(BaseModel):
+    """Kết quả lấy nhiều sản phẩm theo danh sách ID"""
+    items: List[ProductDetailResponse] = []  # Đúng thứ tự ID trong request
+    missing_ids: List[str] = []  # ID không tồn tại / đã xóa / ngừng bán
+
+
 # --- Schemas cho API lấy danh sách biến thể ---
 
 class TypeValueInVariant(BaseModel):
@@ -107,6 +113,24 @@ class ProductVariantsListResponse(BaseModel):
     variants: List[ProductVariantResponse] = []
 
 
+class ProductImportError(BaseModel):
+    """Lỗi của 1 sản phẩm trong file import"""
+    row: int  # Số dòng đầu tiên của sản phẩm trong file (tính cả header với CSV)
+    name: Optional[str] = None
+    errors: List[str] = []
+
+
+class ProductImportResponse(BaseModel):
+    """Báo cáo kết quả import sản phẩm hàng loạt"""
+    total_products: int = 0
+    imported_products: int = 0
+    imported_variants: int = 0
+    failed_products: int = 0
+    created_brands: int = 0
+    created_categories: int = 0
+    errors: List[ProductImportError] = []  # Tối đa PRODUCT_IMPORT_MAX_ERRORS lỗi đầu tiên
+
+
 # --- Schemas cho Homepage Product List ---
 
 class ProductCardResponse(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class TypeValueResponse(BaseModel):
@@ -26,8 +26,21 @@ class ProductTypeDetailResponse(BaseModel):
     skin_type: Optional[str]
     origin: Optional[str]
     sold: Optional[int]
+    version: Optional[int] = None  # Gửi kèm khi cập nhật hàng loạt để kiểm tra xung đột
 
     type_value: Optional[TypeValueResponse]
 
     class Config:
         from_attributes = True
+
+
+class ProductTypeVersionInfo(BaseModel):
+    id: str
+    version: int
+
+
+class ProductTypeBulkUpdateResponse(BaseModel):
+    """Kết quả cập nhật hàng loạt biến thể"""
+    updated: List[ProductTypeVersionInfo] = []  # Kèm version mới để client gửi cho lần sửa sau
+    conflicts: List[str] = []  # type_id bị sửa bởi người khác (version không khớp)
+    not_found: List[str] = []
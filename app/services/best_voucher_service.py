@@ -0,0 +1,124 @@
+"""
+Tìm voucher giảm nhiều nhất cho 1 subtotal + user
+
+- Index dựng từ snapshot voucher (reference_data_service), dựng lại khi version voucher đổi
+- Voucher còn lượt được sắp theo min_order_amount; voucher dùng được với subtotal là 1 prefix,
+  tìm bằng bisect O(log n)
+- Mức giảm là hàm tuyến tính từng đoạn của subtotal, tính sẵn (rate, cap):
+  giảm(s) = min(s * rate, cap, s) với cap = max_discount (không có thì vô hạn)
+- Ứng viên sắp theo mức giảm giảm dần; finalist là các ứng viên tới voucher không giới hạn lượt / user
+  đầu tiên (không voucher nào sau nó có thể tốt hơn). Giới hạn theo user chỉ kiểm tra cho finalist,
+  gộp 1 query
+"""
+import math
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.repositories.voucher_redemption_repository import VoucherRedemptionRepository
+from app.services import reference_data_service
+from app.services.reference_data_service import VoucherRef
+
+
+@dataclass(frozen=True)
+class _IndexedVoucher:
+    voucher: VoucherRef
+    min_order_amount: float
+    rate: float  # discount / 100
+    cap: float  # max_discount, math.inf nếu không giới hạn
+
+    def discount_for(self, subtotal: float) -> float:
+        return min(subtotal * self.rate, self.cap, subtotal)
+
+
+@dataclass(frozen=True)
+class VoucherIndex:
+    version: int
+    entries: Tuple[_IndexedVoucher, ...]  # Sắp theo min_order_amount tăng dần
+    thresholds: Tuple[float, ...]  # min_order_amount tương ứng, dùng cho bisect
+
+    def candidates(self, subtotal: float) -> Tuple[_IndexedVoucher, ...]:
+        """Các voucher đạt đơn tối thiểu với subtotal (prefix của index)"""
+        return self.entries[:bisect_right(self.thresholds, subtotal)]
+
+
+_index: Optional[VoucherIndex] = None
+_lock = threading.Lock()
+
+
+def get_voucher_index(db: Session) -> VoucherIndex:
+    """Index hiện tại, dựng lại nếu snapshot voucher đã đổi version"""
+    global _index
+    snapshot = reference_data_service.vouchers.snapshot(db)
+    current = _index
+    if current is not None and current.version == snapshot.version:
+        return current
+    with _lock:
+        current = _index
+        if current is None or current.version != snapshot.version:
+            current = _build_index(snapshot.version, snapshot.items)
+            _index = current
+    return current
+
+
+def _build_index(version: int, vouchers) -> VoucherIndex:
+    entries = sorted(
+        (
+            _IndexedVoucher(
+                voucher=voucher,
+                min_order_amount=voucher.min_order_amount or 0,
+                rate=(voucher.discount or 0) / 100,
+                cap=voucher.max_discount if voucher.max_discount else math.inf,
+            )
+            for voucher in vouchers
+            if voucher.quantity > 0 and (voucher.discount or 0) > 0
+        ),
+        key=lambda entry: entry.min_order_amount,
+    )
+    return VoucherIndex(
+        version=version,
+        entries=tuple(entries),
+        thresholds=tuple(entry.min_order_amount for entry in entries),
+    )
+
+
+def find_best_voucher(db: Session, user_id: Optional[str], subtotal: float) -> Optional[dict]:
+    """
+    Voucher giảm nhiều nhất còn lượt, đạt đơn tối thiểu và user chưa dùng hết giới hạn.
+    Returns: dict (id, code, description, min_order_amount, discount_amount) hoặc None
+    """
+    if subtotal <= 0:
+        return None
+
+    ranked: List[Tuple[float, _IndexedVoucher]] = sorted(
+        ((entry.discount_for(subtotal), entry) for entry in get_voucher_index(db).candidates(subtotal)),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+
+    finalists = []
+    for amount, entry in ranked:
+        if amount <= 0:
+            break
+        finalists.append((amount, entry))
+        if not (entry.voucher.limit and user_id):
+            break
+
+    limited_ids = [entry.voucher.id for _, entry in finalists if entry.voucher.limit and user_id]
+    usage = VoucherRedemptionRepository(db).get_counts(user_id, limited_ids) if limited_ids else {}
+
+    for amount, entry in finalists:
+        voucher = entry.voucher
+        if voucher.limit and user_id and usage.get(voucher.id, 0) >= voucher.limit:
+            continue
+        return {
+            "id": voucher.id,
+            "code": voucher.code,
+            "description": voucher.description,
+            "min_order_amount": voucher.min_order_amount,
+            "discount_amount": amount,
+        }
+    return None
@@ -3,9 +3,11 @@ from sqlalchemy.orm import Session
 from fastapi import UploadFile
 from app.models.brand import Brand
 from app.repositories.brand_repository import BrandRepository
+from app.repositories.cache_version_repository import BRANDS_VERSION
 from app.schemas.request.brand import BrandCreate, BrandUpdate
+from app.services import reference_data_service
+from app.services.slug_service import allocate_slug
 from app.services.upload_product_service import save_upload_file, get_upload_url
-from slugify import slugify
 
 
 def get_brand(db: Session, brand_id: str) -> Optional[Brand]:
@@ -40,11 +42,10 @@ def create_brand(db: Session, brand_in: BrandCreate, created_by: Optional[str] =
     repo = BrandRepository(db)
     data = brand_in.dict()
     # generate slug from name
-    name = data.get("name", "")
-    slug_base = _slugify(name)
-    slug = _make_unique_slug(db, Brand, slug_base)
-    data["slug"] = slug
-    return repo.create(data, created_by=created_by)
+    data["slug"] = allocate_slug(db, Brand, data.get("name", ""))
+    brand = repo.create(data, created_by=created_by)
+    reference_data_service.invalidate(db, BRANDS_VERSION)
+    return brand
 
 
 async def create_brand_with_image(
@@ -73,11 +74,11 @@ async def create_brand_with_image(
     }
     
     # Generate slug
-    slug_base = _slugify(name)
-    slug = _make_unique_slug(db, Brand, slug_base)
-    data["slug"] = slug
+    data["slug"] = allocate_slug(db, Brand, name)
     
-    return repo.create(data, created_by=created_by)
+    brand = repo.create(data, created_by=created_by)
+    reference_data_service.invalidate(db, BRANDS_VERSION)
+    return brand
 
 
 def update_brand(db: Session, brand_id: str, brand_in: BrandUpdate, updated_by: Optional[str] = None) -> Optional[Brand]:
@@ -85,9 +86,11 @@ def update_brand(db: Session, brand_id: str, brand_in: BrandUpdate, updated_by:
     update_data = brand_in.dict(exclude_unset=True)
     # if name updated and slug not explicitly provided, regenerate slug
     if "name" in update_data and "slug" not in update_data:
-        slug_base = _slugify(update_data.get("name"))
-        update_data["slug"] = _make_unique_slug(db, Brand, slug_base, exclude_id=brand_id)
-    return repo.update(brand_id, update_data, updated_by=updated_by)
+        update_data["slug"] = allocate_slug(db, Brand, update_data.get("name"), exclude_id=brand_id)
+    brand = repo.update(brand_id, update_data, updated_by=updated_by)
+    if brand:
+        reference_data_service.invalidate(db, BRANDS_VERSION)
+    return brand
 
 
 async def update_brand_with_image(
@@ -108,9 +111,6 @@ async def update_brand_with_image(
     
     if name is not None:
         update_data["name"] = name
-        # Regenerate slug if name changed
-        slug_base = _slugify(name)
-        update_data["slug"] = _make_unique_slug(db, Brand, slug_base, exclude_id=brand_id)
     
     if description is not None:
         update_data["description"] = description
@@ -125,28 +125,19 @@ async def update_brand_with_image(
         # No changes, return existing brand
         return repo.get(brand_id)
     
-    return repo.update(brand_id, update_data, updated_by=updated_by)
-
-
-def _slugify(value: str) -> str:
-    return slugify(value or "", lowercase=True) or "n-a"
-
-
-def _make_unique_slug(db: Session, model, base: str, exclude_id: Optional[str] = None) -> str:
-    # if exact base exists (excluding optional id), find suffix
-    exists = db.query(model).filter(model.slug == base)
-    if exclude_id:
-        exists = exists.filter(model.id != exclude_id)
-    if exists.first():
-        # find max suffix
-        like_pattern = f"{base}-%"
-        rows = db.query(model.slug).filter(model.slug.ilike(like_pattern)).all()
-        suffixes = [int(r[0].rsplit("-", 1)[1]) for r in rows if r[0].rsplit("-", 1)[-1].isdigit()]
-        next_suffix = (max(suffixes) + 1) if suffixes else 2
-        return f"{base}-{next_suffix}"
-    return base
+    if name is not None:
+        # Regenerate slug if name changed (cấp sau khi upload để không giữ khóa bộ đếm slug lâu)
+        update_data["slug"] = allocate_slug(db, Brand, name, exclude_id=brand_id)
+    
+    brand = repo.update(brand_id, update_data, updated_by=updated_by)
+    if brand:
+        reference_data_service.invalidate(db, BRANDS_VERSION)
+    return brand
 
 
 def soft_delete_brand(db: Session, brand_id: str, deleted_by: Optional[str] = None) -> bool:
     repo = BrandRepository(db)
-    return repo.delete(brand_id, deleted_by=deleted_by)
+    ok = repo.delete(brand_id, deleted_by=deleted_by)
+    if ok:
+        reference_data_service.invalidate(db, BRANDS_VERSION)
+    return ok
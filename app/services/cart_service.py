@@ -1,10 +1,11 @@
-from typing import Optional, Tuple, List
+from datetime import datetime
+from typing import Dict, Optional, Tuple, List
 from sqlalchemy.orm import Session
 from app.models.cart import Cart
 from app.models.cartItem import CartItem
 from app.models.productType import ProductType
 from app.repositories.cart_repository import CartRepository, CartItemRepository
-from app.schemas.request.cart import CartItemCreate, CartItemUpdate
+from app.schemas.request.cart import CartItemCreate, CartItemUpdate, CartBatchOperation, CartBatchOperationType
 from fastapi import HTTPException, status
 
 
@@ -45,6 +46,8 @@ def add_cart_item(db: Session, cart_id: str, item_in: CartItemCreate, created_by
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient stock for requested quantity")
 
     # if existing, update quantity, else create
+    # Tăng version giỏ hàng trước, commit cùng lúc với thay đổi item
+    CartRepository(db).bump_version(cart_id=cart_id)
     if existing:
         return repo.update(existing.id, {"quantity": total_qty}, updated_by=created_by)
 
@@ -89,6 +92,7 @@ def update_cart_item(db: Session, item_id: str, item_in: CartItemUpdate, updated
                 )
             
             # Update existing item with combined quantity
+            CartRepository(db).bump_version(cart_id=item.cart_id)
             repo.update(existing_same_type.id, {"quantity": combined_qty}, updated_by=updated_by)
             
             # Delete original item (it's been merged)
@@ -120,14 +124,122 @@ def update_cart_item(db: Session, item_id: str, item_in: CartItemUpdate, updated
                 detail=f"Insufficient stock: requested {new_qty}, available {product_type.stock}"
             )
 
+    CartRepository(db).bump_version(cart_id=item.cart_id)
     return repo.update(item_id, data, updated_by=updated_by)
 
 
 def delete_cart_item(db: Session, item_id: str, deleted_by: Optional[str] = None) -> bool:
     repo = CartItemRepository(db)
+    item = repo.get(item_id)
+    if not item:
+        return False
+    CartRepository(db).bump_version(cart_id=item.cart_id)
     return repo.delete(item_id, deleted_by=deleted_by)
 
 
 def get_cart_item(db: Session, item_id: str) -> Optional[CartItem]:
     repo = CartItemRepository(db)
     return repo.get(item_id)
+
+
+def apply_cart_batch(
+    db: Session,
+    user_id: str,
+    operations: List[CartBatchOperation]
+) -> Tuple[Optional[Cart], List[str]]:
+    """
+    Áp dụng nhiều thao tác giỏ hàng theo thứ tự trong 1 transaction.
+
+    - Mô phỏng các thao tác trên số lượng theo biến thể trong bộ nhớ
+    - Đọc mọi biến thể liên quan bằng 1 query IN, kiểm tra tồn kho trên số lượng cuối cùng
+      của các biến thể bị thay đổi
+    - Ghi phần chênh lệch (thêm / sửa / xóa mềm item) và commit 1 lần
+
+    Returns: (giỏ hàng sau khi cập nhật, danh sách lỗi); có lỗi thì không ghi gì và giỏ hàng là None
+    """
+    cart = db.query(Cart).filter(Cart.user_id == user_id, Cart.deleted_at.is_(None)).first()
+    if not cart:
+        cart = Cart(user_id=user_id, created_by=user_id)
+        db.add(cart)
+        db.flush()
+
+    items = CartItemRepository(db).get_active_by_cart(cart.id)
+    item_by_type: Dict[str, CartItem] = {item.product_type_id: item for item in items}
+    original: Dict[str, int] = {item.product_type_id: item.quantity for item in items}
+    quantities: Dict[str, int] = dict(original)
+    # item_id -> biến thể hiện tại của item (đổi theo change_variant trong cùng batch)
+    item_types: Dict[str, str] = {item.id: item.product_type_id for item in items}
+
+    type_ids = set(original) | {op.product_type_id for op in operations if op.product_type_id}
+    product_types = {
+        pt.id: pt
+        for pt in db.query(ProductType).filter(
+            ProductType.id.in_(type_ids),
+            ProductType.deleted_at.is_(None)
+        ).all()
+    }
+
+    errors = []
+    for index, op in enumerate(operations, start=1):
+        label = f"Thao tác {index} ({op.op.value})"
+        if op.op == CartBatchOperationType.ADD:
+            if op.product_type_id not in product_types:
+                errors.append(f"{label}: Không tìm thấy sản phẩm.")
+                continue
+            quantities[op.product_type_id] = quantities.get(op.product_type_id, 0) + op.quantity
+            continue
+
+        type_id = item_types.get(op.item_id)
+        if type_id not in quantities:
+            errors.append(f"{label}: Không tìm thấy sản phẩm trong giỏ hàng.")
+            continue
+
+        if op.op == CartBatchOperationType.UPDATE:
+            if op.quantity == 0:
+                del quantities[type_id]
+            else:
+                quantities[type_id] = op.quantity
+        elif op.op == CartBatchOperationType.REMOVE:
+            del quantities[type_id]
+        else:
+            if op.product_type_id not in product_types:
+                errors.append(f"{label}: Không tìm thấy biến thể sản phẩm mới.")
+                continue
+            quantity = op.quantity or quantities[type_id]
+            del quantities[type_id]
+            # Biến thể mới đã có trong giỏ thì gộp số lượng
+            quantities[op.product_type_id] = quantities.get(op.product_type_id, 0) + quantity
+            item_types[op.item_id] = op.product_type_id
+
+    for type_id, quantity in quantities.items():
+        if original.get(type_id) == quantity:
+            continue
+        product_type = product_types.get(type_id)
+        if not product_type:
+            errors.append("Không tìm thấy sản phẩm.")
+        elif product_type.stock is not None and quantity > product_type.stock:
+            errors.append(f"Không đủ tồn kho: yêu cầu {quantity}, còn {product_type.stock}.")
+
+    if errors:
+        db.rollback()
+        return None, errors
+
+    now = datetime.utcnow()
+    for type_id in set(original) | set(quantities):
+        quantity = quantities.get(type_id)
+        if original.get(type_id) == quantity:
+            continue
+        item = item_by_type.get(type_id)
+        if quantity is None:
+            item.deleted_at = now
+            item.deleted_by = user_id
+        elif item is None:
+            db.add(CartItem(cart_id=cart.id, product_type_id=type_id, quantity=quantity, created_by=user_id))
+        else:
+            item.quantity = quantity
+            item.updated_by = user_id
+            item.updated_at = now
+    cart.version = (cart.version or 0) + 1
+    db.commit()
+
+    return CartRepository(db).get_by_user(user_id), []
@@ -0,0 +1,107 @@
+"""
+Tóm tắt giỏ hàng (read model phía server)
+
+- Item, giá hiệu lực từng dòng, cờ hết hàng / vượt tồn kho, subtotal và voucher tốt nhất
+  được tính từ 1 query phẳng (cart -> item -> biến thể -> sản phẩm -> giá trị biến thể)
+- Response đã serialize được cache theo user, kèm fingerprint (cart.version + version các biến thể
+  trong giỏ). Mỗi request chỉ đọc lại fingerprint (1 query nhỏ); thêm / sửa / xóa item tăng
+  cart.version, đổi giá / tồn kho tăng product_types.version nên fingerprint lệch -> tính lại.
+  Sửa / xóa sản phẩm cũng tăng version các biến thể của nó (ProductService.update / delete)
+- Voucher (số lượng, điều kiện) chỉ được làm mới theo TTL của cache; voucher tốt nhất tìm qua
+  best_voucher_service (index trong bộ nhớ, giới hạn theo user chỉ kiểm tra cho finalist)
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import render_json
+from app.repositories.cart_repository import CartRepository
+from app.schemas.response.base import BaseResponse
+from app.schemas.response.cart import CartSummaryResponse
+from app.services import best_voucher_service
+
+_summary_cache = TTLCache(ttl_seconds=settings.CART_SUMMARY_CACHE_TTL_SECONDS, maxsize=10000)
+
+
+def get_cart_summary_json(db: Session, user_id: str) -> Optional[bytes]:
+    """Response GET /carts/me/summary đã serialize sẵn, None nếu user chưa có giỏ hàng"""
+    fingerprint = _fingerprint(CartRepository(db).get_summary_fingerprint(user_id))
+    if fingerprint is None:
+        return None
+
+    cached = _summary_cache.get(user_id)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    rows = CartRepository(db).get_summary_rows(user_id)
+    if not rows:
+        return None
+    content = render_json(
+        BaseResponse[CartSummaryResponse],
+        message="Lấy tóm tắt giỏ hàng thành công.",
+        data=build_cart_summary(db, user_id, rows),
+    )
+    # Lưu với fingerprint của chính dữ liệu vừa đọc (không dùng fingerprint đọc trước đó)
+    _summary_cache.set(user_id, (_fingerprint(rows), content))
+    return content
+
+
+def build_cart_summary(db: Session, user_id: str, rows: List) -> dict:
+    """Dựng tóm tắt giỏ hàng từ các dòng của CartRepository.get_summary_rows"""
+    lines = []
+    subtotal = 0.0
+    total_quantity = 0
+    for row in rows:
+        if row.item_id is None or row.product_type_id is None:
+            continue
+        price = row.price or 0
+        effective_price = row.discount_price or price
+        quantity = row.quantity or 0
+        is_available = row.product_type_deleted_at is None and row.product_deleted_at is None
+        out_of_stock = row.stock is not None and row.stock <= 0
+        exceeds_stock = row.stock is not None and quantity > row.stock
+        line_total = effective_price * quantity
+        if is_available and not exceeds_stock:
+            subtotal += line_total
+            total_quantity += quantity
+
+        lines.append({
+            "item_id": row.item_id,
+            "product_type_id": row.product_type_id,
+            "product_id": row.product_id,
+            "product_name": row.product_name,
+            "variant_name": row.variant_name or row.volume,
+            "image": row.image_path or row.thumbnail,
+            "quantity": quantity,
+            "price": price,
+            "discount_price": row.discount_price,
+            "effective_price": effective_price,
+            "line_total": line_total,
+            "stock": row.stock,
+            "is_available": is_available,
+            "out_of_stock": out_of_stock,
+            "exceeds_stock": exceeds_stock,
+        })
+
+    best_voucher = best_voucher_service.find_best_voucher(db, user_id, subtotal)
+    return {
+        "cart_id": rows[0].cart_id,
+        "items": lines,
+        "total_quantity": total_quantity,
+        "subtotal": subtotal,
+        "best_voucher": best_voucher,
+        "total_after_voucher": subtotal - (best_voucher["discount_amount"] if best_voucher else 0),
+    }
+
+
+def _fingerprint(rows: List) -> Optional[Tuple]:
+    """(cart_id, cart_version, {(product_type_id, version)}), None nếu không có giỏ hàng"""
+    if not rows:
+        return None
+    cart_id, cart_version = rows[0][0], rows[0][1]
+    variants = frozenset(
+        (row.product_type_id, row.product_type_version) for row in rows if row.product_type_id is not None
+    )
+    return cart_id, cart_version, variants
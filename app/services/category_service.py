@@ -1,11 +1,22 @@
+import logging
+from collections import defaultdict
 from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from fastapi import UploadFile
+from app.core import database
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import render_json
 from app.models.category import Category
+from app.repositories.cache_version_repository import CacheVersionRepository, CATEGORIES_VERSION
+from app.repositories.category_closure_repository import CategoryClosureRepository
 from app.repositories.category_repository import CategoryRepository
-from app.schemas.request.category import CategoryCreate, CategoryUpdate
+from app.schemas.request.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from app.schemas.response.base import BaseResponse
+from app.services.slug_service import allocate_slug
 from app.services.upload_product_service import save_upload_file, get_upload_url
-from slugify import slugify
+
+logger = logging.getLogger("app")
 
 
 def get_category(db: Session, category_id: str) -> Optional[Category]:
@@ -31,11 +42,8 @@ def create_category(db: Session, category_in: CategoryCreate, created_by: Option
         if not parent:
             raise ValueError("Danh mục cha không tồn tại.")
     # generate slug from name
-    name = data.get("name", "")
-    slug_base = _slugify(name)
-    slug = _make_unique_slug(db, Category, slug_base)
-    data["slug"] = slug
-    return repo.create(data, created_by=created_by)
+    data["slug"] = allocate_slug(db, Category, data.get("name", ""))
+    return _create_with_closure(db, data, created_by=created_by)
 
 
 async def create_category_with_image(
@@ -74,11 +82,9 @@ async def create_category_with_image(
     }
     
     # Generate slug
-    slug_base = _slugify(name)
-    slug = _make_unique_slug(db, Category, slug_base)
-    data["slug"] = slug
+    data["slug"] = allocate_slug(db, Category, name)
     
-    return repo.create(data, created_by=created_by)
+    return _create_with_closure(db, data, created_by=created_by)
 
 
 def update_category(db: Session, category_id: str, category_in: CategoryUpdate, updated_by: Optional[str] = None) -> Optional[Category]:
@@ -86,9 +92,14 @@ def update_category(db: Session, category_id: str, category_in: CategoryUpdate,
     data = category_in.dict(exclude_unset=True)
     # if name updated and slug not explicitly provided, regenerate slug
     if "name" in data and "slug" not in data:
-        slug_base = _slugify(data.get("name"))
-        data["slug"] = _make_unique_slug(db, Category, slug_base, exclude_id=category_id)
-    return repo.update(category_id, data, updated_by=updated_by)
+        data["slug"] = allocate_slug(db, Category, data.get("name"), exclude_id=category_id)
+    if "parent_id" in data:
+        data["parent_id"] = data["parent_id"] or None
+        _move_in_closure(db, category_id, data["parent_id"])
+    category = repo.update(category_id, data, updated_by=updated_by)
+    if category:
+        _invalidate_tree(db)
+    return category
 
 
 async def update_category_with_image(
@@ -110,9 +121,6 @@ async def update_category_with_image(
     
     if name is not None:
         update_data["name"] = name
-        # Regenerate slug if name changed
-        slug_base = _slugify(name)
-        update_data["slug"] = _make_unique_slug(db, Category, slug_base, exclude_id=category_id)
     
     if description is not None:
         update_data["description"] = description
@@ -137,13 +145,26 @@ async def update_category_with_image(
         # No changes, return existing category
         return repo.get(category_id)
     
-    return repo.update(category_id, update_data, updated_by=updated_by)
+    if name is not None:
+        # Regenerate slug if name changed (cấp sau khi upload để không giữ khóa bộ đếm slug lâu)
+        update_data["slug"] = allocate_slug(db, Category, name, exclude_id=category_id)
+    
+    if "parent_id" in update_data:
+        _move_in_closure(db, category_id, update_data["parent_id"])
+    
+    category = repo.update(category_id, update_data, updated_by=updated_by)
+    if category:
+        _invalidate_tree(db)
+    return category
 
 
 
 def delete_category(db: Session, category_id: str, deleted_by: Optional[str] = None) -> bool:
     repo = CategoryRepository(db)
-    return repo.delete(category_id, deleted_by=deleted_by)
+    ok = repo.delete(category_id, deleted_by=deleted_by)
+    if ok:
+        _invalidate_tree(db)
+    return ok
 
 
 def get_category_children(db: Session, category_id: str) -> List[Category]:
@@ -155,54 +176,142 @@ def get_category_tree(db: Session, max_depth: int = 3) -> List[dict]:
     """Return list of categories (top-level) each containing nested `children` up to `max_depth` levels.
 
     The returned structure is a list of dicts suitable for Pydantic parsing by `CategoryResponse`.
+    Cây đầy đủ được dựng từ 1 query và cache theo version stamp, `max_depth` chỉ cắt trên bản cache.
     """
-    repo = CategoryRepository(db)
+    return _slice_tree(_get_full_tree(db, _get_tree_version(db)), max_depth)
 
-    def to_dict(cat):
-        return {
-            "id": cat.id,
-            "name": cat.name,
-            "slug": getattr(cat, "slug", None),
-            "image_path": getattr(cat, "image_path", None),
-            "description": getattr(cat, "description", None),
-            "parent_id": getattr(cat, "parent_id", None),
-            "created_by": getattr(cat, "created_by", None),
-            "updated_by": getattr(cat, "updated_by", None),
-            "deleted_by": getattr(cat, "deleted_by", None),
-            "created_at": getattr(cat, "created_at", None),
-            "updated_at": getattr(cat, "updated_at", None),
-            "deleted_at": getattr(cat, "deleted_at", None),
-            "children": None,
-        }
-
-    def build(node, depth):
-        if depth >= max_depth:
-            return node
-        children = repo.list_children(node["id"])
-        if not children:
-            node["children"] = []
-            return node
-        node["children"] = [build(to_dict(c), depth + 1) for c in children]
-        return node
 
-    # top-level categories (parent_id is None)
-    tops = db.query(Category).filter(Category.parent_id.is_(None), Category.deleted_at.is_(None)).all()
-    tree = [build(to_dict(c), 1) for c in tops]
+def get_category_tree_json(db: Session, max_depth: int = 3) -> bytes:
+    """Response GET /categories/tree đã serialize sẵn, cache theo (version, max_depth)"""
+    version = _get_tree_version(db)
+    cache_key = ("json", version, max_depth)
+    content = _tree_cache.get(cache_key)
+    if content is None:
+        content = render_json(
+            BaseResponse[List[CategoryResponse]],
+            message="Lấy cây danh mục thành công.",
+            data=_slice_tree(_get_full_tree(db, version), max_depth),
+        )
+        _tree_cache.set(cache_key, content)
+    return content
+
+
+# ==================== Cache cây danh mục ====================
+
+_tree_cache = TTLCache(ttl_seconds=settings.CATEGORY_TREE_CACHE_TTL_SECONDS, maxsize=16)
+
+
+def _get_tree_version(db: Session) -> int:
+    return CacheVersionRepository(db).get_version(CATEGORIES_VERSION)
+
+
+def _get_full_tree(db: Session, version: int) -> List[dict]:
+    cache_key = ("tree", version)
+    tree = _tree_cache.get(cache_key)
+    if tree is None:
+        tree = _build_tree(CategoryRepository(db).list_all_active())
+        _tree_cache.set(cache_key, tree)
     return tree
 
 
-def _slugify(value: str) -> str:
-    return slugify(value or "", lowercase=True) or "n-a"
+def _build_tree(categories: List[Category]) -> List[dict]:
+    """Dựng cây đầy đủ trong bộ nhớ, chỉ giữ các node đi xuống được từ danh mục gốc"""
+    children_of = defaultdict(list)
+    for cat in categories:
+        children_of[cat.parent_id].append(_to_dict(cat))
+
+    visited = set()
+
+    def attach(node):
+        visited.add(node["id"])
+        node["children"] = [child for child in children_of.get(node["id"], []) if child["id"] not in visited]
+        for child in node["children"]:
+            attach(child)
+        return node
+
+    return [attach(node) for node in children_of.get(None, [])]
 
 
-def _make_unique_slug(db: Session, model, base: str, exclude_id: Optional[str] = None) -> str:
-    exists = db.query(model).filter(model.slug == base)
-    if exclude_id:
-        exists = exists.filter(model.id != exclude_id)
-    if exists.first():
-        like_pattern = f"{base}-%"
-        rows = db.query(model.slug).filter(model.slug.ilike(like_pattern)).all()
-        suffixes = [int(r[0].rsplit("-", 1)[1]) for r in rows if r[0].rsplit("-", 1)[-1].isdigit()]
-        next_suffix = (max(suffixes) + 1) if suffixes else 2
-        return f"{base}-{next_suffix}"
-    return base
+def _slice_tree(nodes: List[dict], max_depth: int, depth: int = 1) -> List[dict]:
+    """Copy cây tới độ sâu max_depth; node ở tầng max_depth có children = None (giữ như trước đây)"""
+    result = []
+    for node in nodes:
+        item = dict(node)
+        item["children"] = _slice_tree(node["children"], max_depth, depth + 1) if depth < max_depth else None
+        result.append(item)
+    return result
+
+
+def _to_dict(cat: Category) -> dict:
+    return {
+        "id": cat.id,
+        "name": cat.name,
+        "slug": cat.slug,
+        "image_path": cat.image_path,
+        "description": cat.description,
+        "parent_id": cat.parent_id,
+        "created_by": cat.created_by,
+        "updated_by": cat.updated_by,
+        "deleted_by": cat.deleted_by,
+        "created_at": cat.created_at,
+        "updated_at": cat.updated_at,
+        "deleted_at": cat.deleted_at,
+        "children": None,
+    }
+
+
+def _create_with_closure(db: Session, data: dict, created_by: Optional[str] = None) -> Category:
+    """Tạo danh mục + các dòng closure trong cùng 1 transaction"""
+    category = Category(**data)
+    category.created_by = created_by
+    db.add(category)
+    db.flush()
+    CategoryClosureRepository(db).add_nodes([(category.id, category.parent_id)])
+    _invalidate_tree(db)
+    db.refresh(category)
+    return category
+
+
+def _move_in_closure(db: Session, category_id: str, new_parent_id: Optional[str]) -> None:
+    """
+    Cập nhật closure table khi đổi danh mục cha (chỉ flush, commit cùng lúc với repo.update).
+    Raises ValueError nếu danh mục cha mới là chính nó hoặc 1 danh mục con cháu của nó.
+    """
+    category = CategoryRepository(db).get(category_id)
+    if not category or category.parent_id == new_parent_id:
+        return
+    closure_repo = CategoryClosureRepository(db)
+    if new_parent_id and new_parent_id in closure_repo.get_descendant_ids(category_id):
+        raise ValueError("Không thể chọn chính danh mục này hoặc danh mục con của nó làm danh mục cha.")
+    closure_repo.move_subtree(category_id, new_parent_id)
+
+
+def _invalidate_tree(db: Session) -> None:
+    """Tăng version cây danh mục sau khi dữ liệu đã commit (worker khác thấy version mới sẽ dựng lại)"""
+    CacheVersionRepository(db).bump(CATEGORIES_VERSION)
+    db.commit()
+    _tree_cache.invalidate()
+
+
+def repair_category_closures() -> int:
+    """
+    Job định kỳ: bổ sung dòng closure cho danh mục được nạp thẳng vào DB (mock_data.sql, complete_database.sql...)
+    sau khi migration đã backfill. Returns: số dòng đã thêm
+    """
+    db = database.SessionLocal()
+    try:
+        parents = {category_id: parent_id for category_id, parent_id in db.query(Category.id, Category.parent_id).all()}
+        added = CategoryClosureRepository(db).repair_missing(parents)
+        if added:
+            CacheVersionRepository(db).bump(CATEGORIES_VERSION)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if added:
+        _tree_cache.invalidate()
+        logger.info("Category closures repaired: %s rows added", added)
+    return added
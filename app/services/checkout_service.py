@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import uuid
@@ -9,14 +9,41 @@ from app.models.productType import ProductType
 from app.models.voucher import Voucher
 from app.models.cartItem import CartItem
 from app.models.address import Address
+from app.repositories.cache_version_repository import CacheVersionRepository, VOUCHERS_VERSION
+from app.repositories.cart_repository import CartRepository
 from app.repositories.order_repository import OrderRepository
 from app.repositories.payment_repository import PaymentRepository
+from app.repositories.product_type_repository import ProductTypeRepository
+from app.repositories.stock_reservation_repository import (
+    StockReservationRepository,
+    RESERVATION_COMMITTED,
+    RESERVATION_RELEASED,
+)
+from app.repositories.voucher_redemption_repository import VoucherRedemptionRepository
+from app.repositories.voucher_repository import VoucherRepository
 from app.schemas.request.checkout import CheckoutItemRequest
+from app.services import reference_data_service
+from app.services.reference_data_service import VoucherRef
 
 # Thời gian timeout thanh toán SEPAY (phút)
 PAYMENT_TIMEOUT_MINUTES = 15
 
 
+def compute_voucher_discount(voucher: Union[Voucher, VoucherRef], subtotal: float) -> float:
+    """Số tiền giảm của voucher cho subtotal (phần trăm, chặn bởi max_discount và subtotal)"""
+    # Tính discount_amount từ phần trăm (10 = 10%)
+    discount_amount = subtotal * (voucher.discount / 100)
+
+    # Áp dụng giới hạn max_discount nếu có
+    if voucher.max_discount and discount_amount > voucher.max_discount:
+        discount_amount = voucher.max_discount
+
+    # Không giảm quá subtotal
+    if discount_amount > subtotal:
+        discount_amount = subtotal
+    return discount_amount
+
+
 class CheckoutService:
     def __init__(self, db: Session):
         self.db = db
@@ -28,10 +55,7 @@ class CheckoutService:
         Validate mã voucher
         Returns: (valid, discount_amount, message)
         """
-        voucher = self.db.query(Voucher).filter(
-            Voucher.code == code,
-            Voucher.deleted_at.is_(None)
-        ).first()
+        voucher = reference_data_service.get_voucher_by_code(self.db, code)
 
         if not voucher:
             return False, 0, "Mã voucher không tồn tại."
@@ -44,50 +68,40 @@ class CheckoutService:
 
         # Kiểm tra limit (số lần tối đa mỗi user được dùng voucher)
         if voucher.limit and user_id:
-            from app.models.order import Order
-            
-            # Đếm số lần user đã dùng voucher này (chỉ đếm order không bị cancelled)
-            usage_count = self.db.query(Order).filter(
-                Order.voucher_id == voucher.id,
-                Order.user_id == user_id,
-                Order.status != 'cancelled',
-                Order.deleted_at.is_(None)
-            ).count()
+            # Số lần user đã dùng voucher này (đơn chưa hủy), đọc từ counter
+            usage_count = VoucherRedemptionRepository(self.db).get_counts(user_id, [voucher.id]).get(voucher.id, 0)
             
             if usage_count >= voucher.limit:
                 return False, 0, f"Bạn đã sử dụng mã này {usage_count}/{voucher.limit} lần."
 
-
-        # Tính discount_amount từ phần trăm (10 = 10%)
-        discount_amount = subtotal * (voucher.discount / 100)
-        
-        # Áp dụng giới hạn max_discount nếu có
-        if voucher.max_discount and discount_amount > voucher.max_discount:
-            discount_amount = voucher.max_discount
-
-        # Không giảm quá subtotal
-        if discount_amount > subtotal:
-            discount_amount = subtotal
-
+        discount_amount = compute_voucher_discount(voucher, subtotal)
         return True, discount_amount, f"Áp dụng mã {code} thành công!"
 
 
 
+    def load_variants(self, items: List[CheckoutItemRequest]) -> Dict[str, ProductType]:
+        """Load mọi biến thể của các item (kèm product, type_value) bằng 1 query"""
+        return ProductTypeRepository(self.db).get_many_with_details([item.product_type_id for item in items])
+
     def preview_order(
         self,
         items: List[CheckoutItemRequest],
         voucher_code: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        variants: Optional[Dict[str, ProductType]] = None
     ) -> dict:
-        """Xem trước đơn hàng trước khi checkout"""
+        """
+        Xem trước đơn hàng trước khi checkout
+
+        - **variants**: map biến thể đã load sẵn (create_order dùng lại map này), None thì tự load
+        """
+        if variants is None:
+            variants = self.load_variants(items)
         checkout_items = []
         subtotal = 0
 
         for item in items:
-            pt = self.db.query(ProductType).filter(
-                ProductType.id == item.product_type_id,
-                ProductType.deleted_at.is_(None)
-            ).first()
+            pt = variants.get(item.product_type_id)
 
             if not pt:
                 raise Exception(f"Sản phẩm không tồn tại: {item.product_type_id}")
@@ -119,7 +133,7 @@ class CheckoutService:
             valid, discount_amount, message = self.validate_voucher(voucher_code, subtotal, user_id)
             if valid:
                 discount = discount_amount
-                voucher = self.db.query(Voucher).filter(Voucher.code == voucher_code).first()
+                voucher = reference_data_service.get_voucher_by_code(self.db, voucher_code)
                 voucher_info = {
                     "code": voucher_code,
                     "discount_amount": discount_amount,
@@ -157,20 +171,14 @@ class CheckoutService:
         if not address:
             raise Exception("Địa chỉ giao hàng không hợp lệ.")
 
-        # Tính toán preview
-        preview = self.preview_order(items, voucher_code, user_id)
+        # Tính toán preview (map biến thể được dùng lại khi trừ stock bên dưới)
+        variants = self.load_variants(items)
+        preview = self.preview_order(items, voucher_code, user_id, variants=variants)
 
-        # Lấy voucher_id nếu có
+        # Voucher hợp lệ: trừ lượt + tăng counter của user (UPDATE có điều kiện, không đọc-sửa-ghi)
         voucher_id = None
-        if voucher_code:
-            voucher = self.db.query(Voucher).filter(
-                Voucher.code == voucher_code,
-                Voucher.deleted_at.is_(None)
-            ).first()
-            if voucher:
-                voucher_id = voucher.id
-                # Trừ số lượng voucher
-                voucher.quantity -= 1
+        if voucher_code and preview["voucher"]:
+            voucher_id = self._redeem_voucher(user_id, voucher_code)
 
         # Tạo order data
         order_id = str(uuid.uuid4())
@@ -187,17 +195,13 @@ class CheckoutService:
             "note": note
         }
         
-        # Tạo order details data + trừ stock
+        # Trừ stock nguyên tử cho cả đơn (UPDATE có điều kiện, tăng version biến thể).
+        # Đơn khác vừa mua hết hàng thì rollback toàn bộ đơn này.
+        quantities = self._reserve_stock(preview["items"], variants)
+
+        # Tạo order details data
         order_details = []
         for item_data in preview["items"]:
-            pt = self.db.query(ProductType).filter(
-                ProductType.id == item_data["product_type_id"]
-            ).first()
-            
-            # Trừ stock
-            if pt.stock is not None:
-                pt.stock -= item_data["quantity"]
-
             order_details.append({
                 "id": str(uuid.uuid4()),
                 "product_type_id": item_data["product_type_id"],
@@ -208,6 +212,12 @@ class CheckoutService:
         # Sử dụng repository để tạo order
         order = self.order_repo.create_order(order_data, order_details)
 
+        # SePay: giữ hàng có hạn, quá hạn chưa thanh toán thì job định kỳ trả lại kho
+        if payment_method.upper() == "SEPAY":
+            StockReservationRepository(self.db).create_for_order(
+                order.id, quantities, datetime.now() + timedelta(minutes=PAYMENT_TIMEOUT_MINUTES)
+            )
+
         # Tạo payment record
         payment_data = {
             "id": str(uuid.uuid4()),
@@ -221,6 +231,7 @@ class CheckoutService:
         # Xóa cart items đã đặt
         cart_item_ids = [item.cart_item_id for item in items]
         self.db.query(CartItem).filter(CartItem.id.in_(cart_item_ids)).delete(synchronize_session=False)
+        CartRepository(self.db).bump_version(user_id=user_id)
 
         self.db.commit()
         self.db.refresh(order)
@@ -250,11 +261,18 @@ class CheckoutService:
         - SePay: pending → success → order.status = 'confirmed'
         - SePay: pending → cancelled (timeout) → order.status = 'cancelled'
         - COD: cod_pending → success (khi giao + thu tiền thành công)
+
+        Khóa đơn trước (FOR UPDATE) để không tranh chấp với job hủy đơn quá hạn; đơn SePay không còn
+        pending (vd vừa bị hủy và đã trả kho) thì từ chối, trả về False.
         """
-        payment = self.payment_repo.get_pending_by_order_id(order_id)
-        order = self.order_repo.get(order_id)
+        order = self.order_repo.get_for_update(order_id)
+        if not order or (order.payment_method == "SEPAY" and order.status != "pending"):
+            self.db.rollback()
+            return False
 
-        if not payment or not order:
+        payment = self.payment_repo.get_pending_by_order_id(order_id)
+        if not payment:
+            self.db.rollback()
             return False
 
         payment.status = status
@@ -265,6 +283,7 @@ class CheckoutService:
         if status == "success":
             if order.payment_method == "SEPAY" and order.status == "pending":
                 order.status = "confirmed"
+            StockReservationRepository(self.db).set_status_for_orders([order.id], RESERVATION_COMMITTED)
         elif status == "cancelled":
             order.status = "cancelled"
             self._restore_stock(order)
@@ -275,8 +294,10 @@ class CheckoutService:
     def cancel_order(self, order_id: str, user_id: str) -> dict:
         """
         Hủy đơn hàng - Chỉ cho phép với đơn COD chưa được admin xác nhận
+        Đơn bị khóa FOR UPDATE trước khi kiểm tra trạng thái: job hủy đơn SePay quá hạn không thể
+        cùng hủy + trả kho lần nữa.
         """
-        order = self.order_repo.get_by_id_and_user(order_id, user_id)
+        order = self._lock_user_order(order_id, user_id)
 
         if not order:
             return {"success": False, "message": "Không tìm thấy đơn hàng."}
@@ -300,11 +321,19 @@ class CheckoutService:
         self.db.commit()
         return {"success": True, "message": "Đã hủy đơn hàng thành công."}
 
+    def _lock_user_order(self, order_id: str, user_id: str) -> Optional[Order]:
+        """Đọc lại đơn của user (bản mới nhất) và khóa tới khi commit / rollback, None nếu không phải đơn của user"""
+        order = self.order_repo.get_for_update(order_id)
+        if order is None or order.user_id != user_id or order.deleted_at is not None:
+            return None
+        return order
+
     def change_payment_method(self, order_id: str, user_id: str, new_method: str) -> dict:
         """
         Đổi phương thức thanh toán - Tạo Payment mới, đánh dấu cũ là failed
+        Đơn bị khóa FOR UPDATE trước khi kiểm tra trạng thái (không đổi được đơn job vừa hủy).
         """
-        order = self.order_repo.get_by_id_and_user(order_id, user_id)
+        order = self._lock_user_order(order_id, user_id)
 
         if not order:
             return {"success": False, "message": "Không tìm thấy đơn hàng."}
@@ -324,6 +353,19 @@ class CheckoutService:
         if old_payment:
             old_payment.status = "failed"
 
+        # Đổi sang COD: đơn không còn hạn thanh toán, hàng thuộc về đơn.
+        # Đổi sang SePay: giữ hàng theo hạn thanh toán tính từ lúc tạo đơn (như is_payment_expired)
+        reservation_repo = StockReservationRepository(self.db)
+        if new_method == "COD":
+            reservation_repo.set_status_for_orders([order.id], RESERVATION_COMMITTED)
+        elif order.created_at:
+            quantities: Dict[str, int] = {}
+            for detail in order.details:
+                quantities[detail.product_type_id] = quantities.get(detail.product_type_id, 0) + (detail.number or 0)
+            reservation_repo.create_for_order(
+                order.id, quantities, order.created_at + timedelta(minutes=PAYMENT_TIMEOUT_MINUTES)
+            )
+
         # Tạo payment mới
         new_payment_data = {
             "id": str(uuid.uuid4()),
@@ -368,40 +410,96 @@ class CheckoutService:
         remaining = (expire_time - datetime.now()).total_seconds()
         return max(0, int(remaining))
 
-    def expire_pending_payments(self) -> int:
-        """Hủy các đơn hàng SEPAY đã quá thời gian thanh toán"""
-        from app.models.order import Order
-        from app.models.payment import Payment
-        
-        # Tìm các order pending với payment method SEPAY đã quá hạn
-        orders = self.db.query(Order).filter(
-            Order.status == "pending",
-            Order.payment_method == "SEPAY",
-            Order.deleted_at.is_(None)
-        ).all()
-        
-        count = 0
-        for order in orders:
-            if self.is_payment_expired(order):
-                # Update payment status
-                if order.payment:
-                    order.payment.status = "cancelled"
-                
-                # Update order status to cancelled
-                order.status = "cancelled"
-                
-                # Restore stock
-                self._restore_stock(order)
-                count += 1
-        
-        if count > 0:
-            self.db.commit()
-        
-        return count
+    def expire_pending_payments(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Hủy các đơn hàng SEPAY đã quá thời gian thanh toán, theo lô `batch_size` đơn.
+        Mỗi lô là 1 transaction: hủy đơn + payment, cộng lại tồn kho và lượt dùng voucher bằng UPDATE gộp.
+        Returns: {"batches", "orders_cancelled", "units_released"}
+        """
+        report = {"batches": 0, "orders_cancelled": 0, "units_released": 0}
+        while True:
+            try:
+                order_ids = self.order_repo.get_pending_sepay_expired(PAYMENT_TIMEOUT_MINUTES, limit=batch_size)
+                if not order_ids:
+                    break
+                report["units_released"] += self.cancel_expired_orders(order_ids)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            report["batches"] += 1
+            report["orders_cancelled"] += len(order_ids)
+            if len(order_ids) < batch_size:
+                break
+        return report
+
+    def cancel_expired_orders(self, order_ids: List[str]) -> int:
+        """
+        Hủy hàng loạt các đơn SEPAY pending (caller đã khóa các đơn): 1 UPDATE cho đơn, 1 cho payment,
+        1 UPDATE executemany cộng lại tồn kho theo tổng từng biến thể, trả lượt voucher và đóng giữ hàng.
+        Returns: tổng số sản phẩm được cộng lại kho. Chỉ flush, caller tự commit.
+        """
+        quantities = self.order_repo.get_quantities_by_product_type(order_ids)
+        self.order_repo.cancel_pending(order_ids)
+        self.payment_repo.cancel_pending_for_orders(order_ids)
+        ProductTypeRepository(self.db).restore_stock(quantities)
+        VoucherRedemptionRepository(self.db).release_for_orders(order_ids)
+        StockReservationRepository(self.db).set_status_for_orders(order_ids, RESERVATION_RELEASED)
+        return sum(quantities.values())
+
+    def _redeem_voucher(self, user_id: str, code: str) -> str:
+        """
+        Helper: Trừ 1 lượt voucher và tăng lượt dùng của user, raise (sau khi rollback) nếu voucher
+        vừa hết lượt hoặc user vừa dùng hết giới hạn ở request đồng thời khác.
+        Returns: voucher_id
+        """
+        voucher = reference_data_service.get_voucher_by_code(self.db, code)
+        remaining = VoucherRepository(self.db).redeem(voucher.id) if voucher else None
+        if remaining is None:
+            self.db.rollback()
+            raise Exception("Mã voucher đã hết lượt sử dụng.")
+
+        if not VoucherRedemptionRepository(self.db).increment(user_id, voucher.id, voucher.limit):
+            self.db.rollback()
+            raise Exception(f"Bạn đã sử dụng mã này tối đa {voucher.limit} lần.")
+
+        # Voucher vừa hết lượt: đổi version để cache voucher ở mọi worker nạp lại
+        if remaining <= 0:
+            CacheVersionRepository(self.db).bump(VOUCHERS_VERSION)
+        return voucher.id
+
+    def _reserve_stock(self, checkout_items: List[dict], variants: Dict[str, ProductType]) -> Dict[str, int]:
+        """
+        Helper: Trừ stock các item của đơn, raise (sau khi rollback) nếu có biến thể không đủ hàng
+        Returns: {product_type_id: số lượng đã trừ}
+        """
+        quantities: Dict[str, int] = {}
+        for item_data in checkout_items:
+            type_id = item_data["product_type_id"]
+            quantities[type_id] = quantities.get(type_id, 0) + item_data["quantity"]
+
+        if ProductTypeRepository(self.db).decrement_stock(quantities):
+            return quantities
+
+        self.db.rollback()
+        # Đọc lại tồn kho mới nhất để báo đúng sản phẩm bị thiếu
+        stocks = dict(
+            self.db.query(ProductType.id, ProductType.stock).filter(ProductType.id.in_(list(quantities))).all()
+        )
+        for type_id, quantity in quantities.items():
+            stock = stocks.get(type_id)
+            if stock is not None and stock < quantity:
+                pt = variants.get(type_id)
+                name = pt.product.name if pt and pt.product else "Sản phẩm"
+                raise Exception(f"Sản phẩm {name} chỉ còn {max(stock, 0)} trong kho.")
+        raise Exception("Sản phẩm không đủ số lượng trong kho.")
 
     def _restore_stock(self, order: Order):
-        """Helper: Hoàn lại stock khi hủy đơn"""
+        """Helper: Hoàn lại stock (và lượt dùng voucher của user) khi hủy đơn"""
+        quantities: Dict[str, int] = {}
         for detail in order.details:
-            pt = self.db.query(ProductType).filter(ProductType.id == detail.product_type_id).first()
-            if pt and pt.stock is not None:
-                pt.stock += detail.number
+            quantities[detail.product_type_id] = quantities.get(detail.product_type_id, 0) + (detail.number or 0)
+        ProductTypeRepository(self.db).restore_stock(quantities)
+        StockReservationRepository(self.db).set_status_for_orders([order.id], RESERVATION_RELEASED)
+        if order.voucher_id:
+            VoucherRedemptionRepository(self.db).release_for_orders([order.id])
@@ -0,0 +1,111 @@
+"""
+"Thường được mua cùng" - ma trận đồng mua tính từ order_details của đơn completed
+
+- rebuild_bought_together(): job định kỳ, stream order_details theo order_id, đếm cặp sản phẩm
+  trong từng đơn vào dict thưa, chấm điểm Jaccard và chỉ lưu top K hàng xóm / sản phẩm
+- record_completed_order(): gọi khi đơn chuyển sang completed để cộng dồn giữa 2 lần rebuild
+- get_bought_together(): đọc sẵn từ bảng product_co_purchases, trả về dạng card
+"""
+import heapq
+import logging
+from collections import defaultdict
+from itertools import combinations, groupby
+from typing import Dict, List, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+from app.models.order import Order
+from app.models.orderDetail import OrderDetail
+from app.models.productType import ProductType
+from app.repositories.co_purchase_repository import CoPurchaseRepository, jaccard
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_stat_repository import ProductStatRepository
+from app.schemas.response.product import ProductCardResponse
+
+logger = logging.getLogger("app")
+
+# Đơn có quá nhiều sản phẩm (mua sỉ, đơn test) sinh ra O(n^2) cặp nhiễu -> bỏ qua khi rebuild
+MAX_PRODUCTS_PER_ORDER = 50
+_STREAM_BATCH_SIZE = 5000
+
+
+def get_bought_together(db: Session, product_id: str, limit: int = 10) -> List[ProductCardResponse]:
+    related_ids = CoPurchaseRepository(db).get_related_ids(product_id, limit)
+    cards = ProductRepository(db).get_cards_by_ids(related_ids)
+    return [ProductCardResponse(**card) for card in cards]
+
+
+def record_completed_order(db: Session, order_id: str) -> None:
+    """
+    Cộng đơn vừa hoàn thành vào ma trận đồng mua (cùng transaction với đổi trạng thái đơn).
+    Chạy trong savepoint: lỗi ở đây (VD: 2 đơn cùng thêm 1 cặp mới) không được làm hỏng việc
+    cập nhật trạng thái đơn, lần rebuild kế tiếp sẽ tự bù.
+    """
+    try:
+        with db.begin_nested():
+            CoPurchaseRepository(db).add_order(order_id)
+    except SQLAlchemyError:
+        logger.exception("Cannot record co-purchase for order %s", order_id)
+
+
+def _stream_order_products(db: Session):
+    """Yield (order_id, {product_id}) cho từng đơn completed, đọc order_details theo từng batch"""
+    rows = db.query(OrderDetail.order_id, ProductType.product_id)\
+        .join(Order, Order.id == OrderDetail.order_id)\
+        .join(ProductType, ProductType.id == OrderDetail.product_type_id)\
+        .filter(Order.status == "completed", Order.deleted_at.is_(None))\
+        .order_by(OrderDetail.order_id)\
+        .yield_per(_STREAM_BATCH_SIZE)
+    for order_id, group in groupby(rows, key=lambda row: row[0]):
+        yield order_id, {product_id for _, product_id in group}
+
+
+def build_co_purchase_matrix(db: Session, top_k: int) -> Tuple[Dict[str, int], List[Tuple[str, str, int, float]]]:
+    """
+    Returns: ({product_id: số đơn chứa sản phẩm}, [(product_id, related_product_id, pair_count, score)])
+    Cặp được đếm 1 lần với khóa (a, b) a < b, sau đó tách ra 2 chiều khi chọn top K.
+    """
+    order_counts: Dict[str, int] = defaultdict(int)
+    pair_counts: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    for _, products in _stream_order_products(db):
+        for product_id in products:
+            order_counts[product_id] += 1
+        if len(products) > MAX_PRODUCTS_PER_ORDER:
+            continue
+        for pair in combinations(sorted(products), 2):
+            pair_counts[pair] += 1
+
+    neighbors: Dict[str, List[Tuple[float, int, str]]] = defaultdict(list)
+    for (a, b), pair_count in pair_counts.items():
+        score = jaccard(pair_count, order_counts[a], order_counts[b])
+        neighbors[a].append((score, pair_count, b))
+        neighbors[b].append((score, pair_count, a))
+
+    rows = [
+        (product_id, related_id, pair_count, score)
+        for product_id, candidates in neighbors.items()
+        for score, pair_count, related_id in heapq.nlargest(top_k, candidates)
+    ]
+    return dict(order_counts), rows
+
+
+def rebuild_bought_together() -> dict:
+    """Job định kỳ: tính lại toàn bộ ma trận đồng mua và order_count, thay thế trong 1 transaction"""
+    db = database.SessionLocal()
+    try:
+        order_counts, rows = build_co_purchase_matrix(db, settings.BOUGHT_TOGETHER_TOP_K)
+        ProductStatRepository(db).set_order_counts(order_counts)
+        stored = CoPurchaseRepository(db).replace_all(rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info("Bought-together rebuilt: %s products, %s pairs stored", len(order_counts), stored)
+    return {"products": len(order_counts), "pairs": stored}
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Callable, Any, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core import database
+from app.schemas.request.brand import BrandResponse
+from app.schemas.request.category import CategoryResponse
+from app.schemas.response.home import HomeResponse
+from app.schemas.response.product import ProductDetailResponse
+from app.repositories.cache_version_repository import CacheVersionRepository, PRODUCT_TYPES_VERSION
+from app.services import reference_data_service
+from app.services.category_service import get_categories
+from app.services.product_service import ProductService
+
+logger = logging.getLogger(__name__)
+
+# Số lượng item mỗi section, giữ giống mặc định của các endpoint lẻ
+TOP_DISCOUNTED_LIMIT = 6
+BEST_SELLING_LIMIT = 10
+MOST_FAVORITE_LIMIT = 10
+CATEGORY_LIMIT = 100
+BRAND_LIMIT = 100
+
+_HOME_CACHE_KEY = "home"
+# Trang chủ thiếu section (section lỗi) chỉ cache ngắn để lần sau thử lại sớm
+_PARTIAL_CACHE_TTL_SECONDS = 5
+_home_cache = TTLCache(ttl_seconds=settings.HOME_CACHE_TTL_SECONDS, maxsize=1)
+
+
+def _top_discounted(db: Session) -> list:
+    return ProductService(db).get_top_discounted_products(TOP_DISCOUNTED_LIMIT)
+
+
+def _best_selling(db: Session) -> list:
+    result = ProductService(db).get_best_selling(BEST_SELLING_LIMIT)
+    return [ProductDetailResponse.model_validate(prod) for prod, _ in result]
+
+
+def _most_favorite(db: Session) -> list:
+    result = ProductService(db).get_most_favorite(MOST_FAVORITE_LIMIT)
+    return [ProductDetailResponse.model_validate(prod) for prod, _ in result]
+
+
+def _categories(db: Session) -> list:
+    items, _ = get_categories(db, limit=CATEGORY_LIMIT)
+    return [CategoryResponse.model_validate(c, from_attributes=True) for c in items]
+
+
+def _brands(db: Session) -> list:
+    items, _ = reference_data_service.brands.search(db, limit=BRAND_LIMIT)
+    return [BrandResponse.model_validate(b, from_attributes=True) for b in items]
+
+
+def _run_section(name: str, fn: Callable[[Session], Any]) -> Tuple[bool, list]:
+    """
+    Chạy 1 section trong session riêng (Session không thread-safe nên không dùng chung).
+    Section lỗi chỉ trả về list rỗng, không làm hỏng cả trang chủ.
+    Returns: (thành công, dữ liệu)
+    """
+    db = database.SessionLocal()
+    try:
+        return True, fn(db)
+    except Exception:
+        logger.exception("Home section '%s' failed", name)
+        return False, []
+    finally:
+        db.close()
+
+
+def _get_catalog_version() -> Optional[int]:
+    db = database.SessionLocal()
+    try:
+        return CacheVersionRepository(db).get_version(PRODUCT_TYPES_VERSION)
+    except Exception:
+        logger.exception("Cannot read catalog cache version")
+        return None
+    finally:
+        db.close()
+
+
+async def get_home_data() -> HomeResponse:
+    """
+    Lấy dữ liệu trang chủ: đọc cache, nếu hết hạn thì chạy song song các section rồi cache lại.
+    Key cache gồm version giá / tồn kho biến thể nên đổi giá hàng loạt thì trang chủ cập nhật ngay.
+    """
+    version = await run_in_threadpool(_get_catalog_version)
+    cache_key = (_HOME_CACHE_KEY, version)
+    cached = _home_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    sections = {
+        "top_discounted": _top_discounted,
+        "best_selling": _best_selling,
+        "most_favorite": _most_favorite,
+        "categories": _categories,
+        "brands": _brands,
+    }
+    results = await asyncio.gather(
+        *(run_in_threadpool(_run_section, name, fn) for name, fn in sections.items())
+    )
+    data = HomeResponse(**{name: items for name, (_, items) in zip(sections.keys(), results)})
+    if all(ok for ok, _ in results):
+        _home_cache.set(cache_key, data)
+    else:
+        _home_cache.set(cache_key, data, ttl_seconds=_PARTIAL_CACHE_TTL_SECONDS)
+    return data
@@ -0,0 +1,165 @@
+"""
+Idempotency-Key cho các request có tác dụng phụ (tạo đơn, webhook SePay)
+
+- Request đầu tiên giữ key (bản ghi processing, commit ngay bằng session riêng), chạy xử lý rồi lưu
+  response đã serialize. Request lặp lại cùng key chỉ tốn 1 lookup theo unique index và nhận lại
+  đúng response cũ, không chạy lại transaction tồn kho / voucher.
+- Request trùng đến khi bản đầu còn đang xử lý: 409, client thử lại sau.
+- Cùng key nhưng body khác: 422.
+- Chỉ response thành công được lưu; xử lý lỗi thì nhả key để lần thử lại chạy bình thường
+  (transaction lỗi đã rollback nên không có gì bị ghi).
+- Thao tác chính gọi `hold(db)` trong chính transaction của nó: đã commit (vd đơn hàng đã tạo) thì key
+  bị khóa tới khi hết hạn, nên dù lưu response sau đó thất bại cũng không request nào chạy lại được.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+from app.core.responses import json_bytes_response
+from app.models.idempotencyKey import IdempotencyKey
+from app.repositories.idempotency_key_repository import (
+    IdempotencyKeyRepository,
+    IDEMPOTENCY_COMPLETED,
+)
+
+logger = logging.getLogger("app")
+
+# Số lần thử lưu response (lưu thất bại thì key vẫn khóa, request lặp lại chỉ nhận 409)
+_COMPLETE_RETRIES = 3
+
+# Scope của từng loại request (key chỉ cần duy nhất trong cùng scope)
+CREATE_ORDER_SCOPE = "checkout.create_order"
+SEPAY_WEBHOOK_SCOPE = "sepay.webhook"
+
+
+def hash_request(payload: Union[str, bytes]) -> str:
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class IdempotencyClaim:
+    """Kết quả giữ key: `replay` khác None thì trả luôn response đã lưu"""
+
+    def __init__(self, record_id: Optional[str] = None, replay: Optional[Response] = None):
+        self.record_id = record_id
+        self.replay = replay
+
+    def hold(self, db: Session) -> None:
+        """
+        Khóa key tới khi hết hạn trong transaction `db` của thao tác chính (chỉ flush, caller commit).
+        Thao tác rollback thì việc khóa cũng rollback theo, release vẫn nhả key như bình thường.
+        """
+        if self.record_id is None:
+            return
+        IdempotencyKeyRepository(db).hold_until_expiry(self.record_id)
+
+    def complete(self, content: bytes, status_code: int = status.HTTP_200_OK) -> None:
+        """Lưu response đã serialize cho key (không có key thì bỏ qua). Lỗi chỉ log, không làm fail request."""
+        if self.record_id is None:
+            return
+        for attempt in range(1, _COMPLETE_RETRIES + 1):
+            db = database.SessionLocal()
+            try:
+                IdempotencyKeyRepository(db).complete(self.record_id, status_code, content.decode("utf-8"))
+                db.commit()
+                return
+            except Exception:
+                db.rollback()
+                logger.exception(
+                    "Cannot store idempotent response for key %s (attempt %s/%s)",
+                    self.record_id, attempt, _COMPLETE_RETRIES
+                )
+            finally:
+                db.close()
+
+    def release(self) -> None:
+        """Nhả key khi xử lý lỗi để request thử lại được chạy lại (key đã hold và commit thì giữ nguyên)"""
+        if self.record_id is None:
+            return
+        db = database.SessionLocal()
+        try:
+            IdempotencyKeyRepository(db).remove(self.record_id)
+            db.commit()
+        except Exception:
+            # Không nhả được thì key tự mở lại khi hết locked_until
+            db.rollback()
+            logger.exception("Cannot release idempotency key %s", self.record_id)
+        finally:
+            db.close()
+
+
+def claim(scope: str, key: Optional[str], request_hash: str) -> IdempotencyClaim:
+    """
+    Giữ key cho request hiện tại.
+
+    - **key**: None thì không dùng idempotency (claim rỗng, complete / release không làm gì)
+    - Raises HTTPException 409 nếu key đang được request khác xử lý, 422 nếu key đã dùng cho body khác
+    """
+    if not key:
+        return IdempotencyClaim()
+
+    now = datetime.now()
+    locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+    expires_at = now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+    db = database.SessionLocal()
+    try:
+        repo = IdempotencyKeyRepository(db)
+        record = repo.get_by_key(scope, key)
+        if record is None:
+            record = IdempotencyKey(
+                scope=scope,
+                key=key,
+                request_hash=request_hash,
+                locked_until=locked_until,
+                expires_at=expires_at,
+            )
+            if repo.try_insert(record):
+                db.commit()
+                return IdempotencyClaim(record_id=record.id)
+            record = repo.get_by_key(scope, key)
+
+        if record is not None and record.expires_at > now:
+            if record.request_hash != request_hash:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key đã được dùng cho một yêu cầu khác."
+                )
+            if record.status == IDEMPOTENCY_COMPLETED:
+                return IdempotencyClaim(
+                    replay=json_bytes_response(record.response_body.encode("utf-8"), status_code=record.status_code)
+                )
+
+        if record is not None and repo.take_over(record.id, request_hash, now, locked_until, expires_at):
+            db.commit()
+            return IdempotencyClaim(record_id=record.id)
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Yêu cầu với Idempotency-Key này đang được xử lý, vui lòng thử lại sau."
+        )
+    finally:
+        db.close()
+
+
+def purge_expired_idempotency_keys() -> int:
+    """Job định kỳ: xóa các key đã hết hạn"""
+    db = database.SessionLocal()
+    try:
+        count = IdempotencyKeyRepository(db).purge_expired(datetime.now())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if count:
+        logger.info("Purged %s expired idempotency keys", count)
+    return count
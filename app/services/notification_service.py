@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from app.repositories.notification_repository import NotificationRepository
 from app.models.notification import Notification
 from app.models.userNotification import UserNotification
-from app.models.role import Role
+from app.services import reference_data_service
 from app.models.userRole import UserRole
 from app.models.user import User
 import asyncio
@@ -142,10 +142,7 @@ class NotificationService:
     def _notify_admins(self, notification_id: str) -> int:
         """Gửi notification đến tất cả users có role ADMIN"""
         # Lấy tất cả admin users
-        admin_role = self.db.query(Role).filter(
-            Role.name.ilike("admin"),
-            Role.deleted_at.is_(None)
-        ).first()
+        admin_role = reference_data_service.get_role_by_name(self.db, "admin")
         
         if not admin_role:
             return 0
@@ -0,0 +1,43 @@
+"""
+Hủy hàng loạt đơn SePay quá hạn thanh toán
+
+- Job định kỳ thay cho việc hủy "lazy" trong các request GET (xem chi tiết đơn, lấy thông tin thanh toán),
+  nên các đường đọc không còn ghi DB
+- Quét đơn theo index (status, payment_method, created_at), mỗi lô 1 transaction:
+  1 UPDATE hủy đơn, 1 UPDATE hủy payment, 1 UPDATE executemany cộng lại tồn kho theo tổng từng biến thể
+- Sau đó quét giữ hàng hết hạn còn sót (stock_reservation_service) và log số liệu của lần chạy
+"""
+import logging
+import time
+
+from app.core import database
+from app.core.config import settings
+from app.services.checkout_service import CheckoutService
+from app.services.stock_reservation_service import release_expired_reservations
+
+logger = logging.getLogger("app")
+
+
+def expire_unpaid_sepay_orders() -> dict:
+    """Job định kỳ: hủy các đơn SePay quá hạn thanh toán và trả lại kho"""
+    started = time.monotonic()
+    db = database.SessionLocal()
+    try:
+        report = CheckoutService(db).expire_pending_payments(settings.STOCK_RESERVATION_BATCH_SIZE)
+    finally:
+        db.close()
+
+    holds = release_expired_reservations()
+    report["orders_cancelled"] += holds["orders_cancelled"]
+    report["units_released"] += holds["units_released"]
+    report["reservations_released"] = holds["reservations"]
+    report["duration_ms"] = int((time.monotonic() - started) * 1000)
+
+    if report["orders_cancelled"] or report["reservations_released"]:
+        logger.info(
+            "Unpaid SePay orders expired: %s orders in %s batches, %s units back in stock, "
+            "%s stale holds released, %s ms",
+            report["orders_cancelled"], report["batches"], report["units_released"],
+            report["reservations_released"], report["duration_ms"]
+        )
+    return report
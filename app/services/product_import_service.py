@@ -0,0 +1,283 @@
+"""
+Product Import Service - Import sản phẩm + biến thể hàng loạt từ file CSV / JSONL
+
+Pipeline xử lý dạng stream, không đọc cả file vào bộ nhớ:
+1. Đọc từng dòng -> gom thành bản ghi sản phẩm (CSV: các dòng liên tiếp cùng product_key)
+2. Validate từng sản phẩm bằng ProductImportRow, lỗi được ghi vào báo cáo theo số dòng
+3. Gom PRODUCT_IMPORT_CHUNK_SIZE sản phẩm hợp lệ thành 1 chunk:
+   - upsert brand / category theo slug (1 query IN + 1 INSERT cho phần còn thiếu)
+   - INSERT executemany cho products và product_types
+   - commit riêng từng chunk; chunk lỗi thì rollback rồi ghi lại từng sản phẩm trong transaction riêng,
+     để lỗi DB chỉ đánh vào đúng dòng gây lỗi
+"""
+import csv
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.brand import Brand
+from app.models.category import Category
+from app.models.mixins import generate_uuid_str
+from app.models.product import Product
+from app.models.productType import ProductType
+from app.models.typeValue import TypeValue
+from app.repositories.cache_version_repository import (
+    CacheVersionRepository,
+    BRANDS_VERSION,
+    CATEGORIES_VERSION,
+    PRODUCT_TYPES_VERSION,
+)
+from app.repositories.category_closure_repository import CategoryClosureRepository
+from app.repositories.product_stat_repository import ProductStatRepository
+from app.schemas.request.product import ProductImportRow, PRODUCT_IMPORT_VARIANT_FIELDS
+from app.services.slug_service import get_or_create_by_slug, slugify_name
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_IMPORT_CHUNK_SIZE = 500  # Số sản phẩm mỗi transaction
+PRODUCT_IMPORT_MAX_ERRORS = 1000  # Số lỗi tối đa trả về trong báo cáo
+
+PRODUCT_IMPORT_FORMATS = ("csv", "jsonl")
+
+
+class ProductImportService:
+    def __init__(self, db: Session, created_by: Optional[str] = None):
+        self.db = db
+        self.created_by = created_by
+        self.brand_ids: Dict[str, str] = {}  # slug -> id, cache trong suốt lần import
+        self.category_ids: Dict[str, str] = {}
+        self.type_value_ids: set = set()
+        self.report = {
+            "total_products": 0,
+            "imported_products": 0,
+            "imported_variants": 0,
+            "failed_products": 0,
+            "created_brands": 0,
+            "created_categories": 0,
+            "errors": [],
+        }
+
+    def import_lines(self, lines: Iterable[str], file_format: str) -> dict:
+        """
+        Import sản phẩm từ iterator các dòng text.
+
+        - **file_format**: "csv" (dòng đầu là header, mỗi dòng 1 biến thể) hoặc "jsonl" (mỗi dòng 1 sản phẩm)
+        """
+        records = self._read_csv(lines) if file_format == "csv" else self._read_jsonl(lines)
+
+        chunk: List[Tuple[int, ProductImportRow]] = []
+        for row_number, record in records:
+            self.report["total_products"] += 1
+            if isinstance(record, str):
+                self._add_error(row_number, None, [record])
+                continue
+            try:
+                chunk.append((row_number, ProductImportRow.model_validate(record)))
+            except ValidationError as e:
+                self._add_error(row_number, record.get("name"), _format_validation_errors(e))
+                continue
+            if len(chunk) >= PRODUCT_IMPORT_CHUNK_SIZE:
+                self._write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._write_chunk(chunk)
+
+        return self.report
+
+    # ==================== Đọc file ====================
+
+    def _read_jsonl(self, lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, f"JSON không hợp lệ: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, "Mỗi dòng phải là 1 object JSON"
+                continue
+            yield line_number, record
+
+    def _read_csv(self, lines: Iterable[str]) -> Iterator[Tuple[int, object]]:
+        """
+        Mỗi dòng CSV là 1 biến thể; các dòng liên tiếp cùng `product_key` (mặc định là `name`)
+        được gộp thành 1 sản phẩm. Dòng không có cột biến thể nào thì chỉ tạo sản phẩm.
+        """
+        reader = csv.DictReader(lines)
+        current_key = None
+        current: Optional[Tuple[int, dict]] = None
+
+        for row in reader:
+            line_number = reader.line_num
+            row = {
+                (key or "").strip(): (value.strip() if isinstance(value, str) and value.strip() else None)
+                for key, value in row.items()
+            }
+            key = row.get("product_key") or row.get("name")
+            if current is None or key != current_key:
+                if current is not None:
+                    yield current
+                current_key = key
+                current = (line_number, {
+                    "name": row.get("name"),
+                    "brand": row.get("brand"),
+                    "category": row.get("category"),
+                    "description": row.get("description"),
+                    "thumbnail": row.get("thumbnail"),
+                    "is_active": row.get("is_active") or True,
+                    "product_types": [],
+                })
+            variant = {
+                field: row[field]
+                for field in PRODUCT_IMPORT_VARIANT_FIELDS
+                if row.get(field) is not None
+            }
+            if variant:
+                current[1]["product_types"].append(variant)
+
+        if current is not None:
+            yield current
+
+    # ==================== Ghi DB theo chunk ====================
+
+    def _write_chunk(self, chunk: List[Tuple[int, ProductImportRow]]) -> None:
+        chunk = self._check_type_values(chunk)
+        if not chunk:
+            return
+
+        error = self._insert_chunk(chunk)
+        if error is None:
+            return
+        if len(chunk) == 1:
+            row_number, item = chunk[0]
+            self._add_error(row_number, item.name, [_format_db_error(error)])
+            return
+
+        # Ghi lại từng sản phẩm để tìm đúng dòng gây lỗi, các dòng còn lại vẫn được import
+        for row_number, item in chunk:
+            error = self._insert_chunk([(row_number, item)])
+            if error is not None:
+                self._add_error(row_number, item.name, [_format_db_error(error)])
+
+    def _insert_chunk(self, chunk: List[Tuple[int, ProductImportRow]]) -> Optional[SQLAlchemyError]:
+        """Ghi các sản phẩm trong 1 transaction. Returns: lỗi DB (đã rollback) hoặc None nếu thành công"""
+        try:
+            created_brands = self._upsert_by_slug(Brand, self.brand_ids, [item.brand for _, item in chunk])
+            created_categories = self._upsert_by_slug(
+                Category, self.category_ids, [item.category for _, item in chunk]
+            )
+
+            product_rows = []
+            variant_rows = []
+            for _, item in chunk:
+                product_id = generate_uuid_str()
+                product_rows.append({
+                    "id": product_id,
+                    "name": item.name,
+                    "brand_id": self.brand_ids[slugify_name(item.brand)] if item.brand else None,
+                    "category_id": self.category_ids[slugify_name(item.category)] if item.category else None,
+                    "description": item.description,
+                    "thumbnail": item.thumbnail,
+                    "is_active": item.is_active,
+                    "created_by": self.created_by,
+                })
+                for variant in item.product_types:
+                    variant_rows.append({
+                        **variant.model_dump(),
+                        "id": generate_uuid_str(),
+                        "product_id": product_id,
+                        "status": variant.status or "active",
+                        "sold": 0,
+                        "created_by": self.created_by,
+                    })
+
+            self.db.execute(insert(Product.__table__), product_rows)
+            if variant_rows:
+                self.db.execute(insert(ProductType.__table__), variant_rows)
+            ProductStatRepository(self.db).create_for_new_products(
+                [row["id"] for row in product_rows if row["is_active"]], variant_rows
+            )
+            stamps = [PRODUCT_TYPES_VERSION]
+            if created_brands:
+                stamps.append(BRANDS_VERSION)
+            if created_categories:
+                stamps.append(CATEGORIES_VERSION)
+            CacheVersionRepository(self.db).bump(*stamps)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            # Cache slug có thể chứa brand / category vừa bị rollback
+            self.brand_ids.clear()
+            self.category_ids.clear()
+            logger.warning("Import of %s products failed: %s", len(chunk), e.__class__.__name__)
+            return e
+
+        self.report["imported_products"] += len(product_rows)
+        self.report["imported_variants"] += len(variant_rows)
+        self.report["created_brands"] += created_brands
+        self.report["created_categories"] += created_categories
+        return None
+
+    def _check_type_values(self, chunk: List[Tuple[int, ProductImportRow]]) -> List[Tuple[int, ProductImportRow]]:
+        """Loại các sản phẩm tham chiếu type_value_id không tồn tại (1 query IN cho cả chunk)"""
+        wanted = {
+            variant.type_value_id
+            for _, item in chunk
+            for variant in item.product_types
+            if variant.type_value_id
+        } - self.type_value_ids
+        if wanted:
+            found = self.db.query(TypeValue.id).filter(
+                TypeValue.id.in_(wanted),
+                TypeValue.deleted_at.is_(None)
+            ).all()
+            self.type_value_ids.update(type_value_id for (type_value_id,) in found)
+
+        valid = []
+        for row_number, item in chunk:
+            unknown = sorted({
+                variant.type_value_id
+                for variant in item.product_types
+                if variant.type_value_id and variant.type_value_id not in self.type_value_ids
+            })
+            if unknown:
+                self._add_error(row_number, item.name, [f"type_value_id không tồn tại: {', '.join(unknown)}"])
+            else:
+                valid.append((row_number, item))
+        return valid
+
+    def _upsert_by_slug(self, model, cache: Dict[str, str], names: List[Optional[str]]) -> int:
+        """
+        Nạp {slug: id} của brand / category vào cache, tạo mới phần chưa có bằng 1 câu INSERT executemany.
+        Returns: số bản ghi đã tạo
+        """
+        created_ids = get_or_create_by_slug(self.db, model, names, cache, created_by=self.created_by)
+        if created_ids and model is Category:
+            # Danh mục tạo từ file import luôn là danh mục gốc
+            CategoryClosureRepository(self.db).add_nodes((category_id, None) for category_id in created_ids)
+        return len(created_ids)
+
+    def _add_error(self, row_number: int, name: Optional[str], errors: List[str]) -> None:
+        self.report["failed_products"] += 1
+        if len(self.report["errors"]) < PRODUCT_IMPORT_MAX_ERRORS:
+            self.report["errors"].append({"row": row_number, "name": name, "errors": errors})
+
+
+def _format_db_error(error: SQLAlchemyError) -> str:
+    detail = str(getattr(error, "orig", None) or error).splitlines()[0][:200]
+    return f"Lỗi ghi dữ liệu: {detail}"
+
+
+def _format_validation_errors(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    ]
@@ -1,41 +1,66 @@
 from sqlalchemy.orm import Session
 from typing import Optional, List, Tuple
 from app.repositories.product_repository import ProductRepository
+from app.repositories.product_stat_repository import ProductStatRepository
+from app.repositories.product_type_repository import ProductTypeRepository
 from app.schemas.request.product import ProductCreateRequest, ProductUpdateRequest
 
 
 class ProductService:
     def get_top_discounted_products(self, limit: int = 6):
-        from app.repositories.product_type_repository import ProductTypeRepository
-        from app.models.product import Product
         from app.schemas.response.product import ProductDetailResponse, ProductTypeResponse
-        # Lấy các biến thể giảm giá lớn nhất
-        top_types = ProductTypeRepository.get_top_discounted_with_sold(self.repo.db, limit * 2)
-        # Gom theo product, lấy biến thể giảm giá nhất cho mỗi product
-        product_map = {}
-        for pt, discount_percent, sold in top_types:
-            prod_id = pt.product_id
-            if prod_id not in product_map or product_map[prod_id][1] < discount_percent:
-                product_map[prod_id] = (pt, discount_percent, sold)
-        # Lấy thông tin sản phẩm
-        products = self.repo.db.query(Product).filter(Product.id.in_(product_map.keys())).all()
+        # Đọc bảng xếp hạng đã tính sẵn (product_stats), mỗi sản phẩm chỉ có 1 dòng nên không cần gom lại
+        top_stats = self.stat_repo.get_top_discounted(limit)
+        products = self.repo.get_details_by_ids([stat.product_id for stat in top_stats])
+        # "sold" giữ nghĩa cũ: số lượng đã bán của chính biến thể giảm giá (mọi đơn), không phải sold_count
+        # của sản phẩm (chỉ đơn hoàn thành) -> 1 query GROUP BY cho vài biến thể trong bảng xếp hạng
+        sold = self.type_repo.get_sold_quantities([stat.discount_type_id for stat in top_stats])
+        product_map = {prod.id: prod for prod in products}
         result = []
-        for prod in products:
-            pt, discount_percent, sold = product_map[prod.id]
+        for stat in top_stats:
+            prod = product_map.get(stat.product_id)
+            if not prod:
+                continue
+            pt = next((t for t in prod.product_types if t.id == stat.discount_type_id), None)
+            if not pt:
+                continue
             result.append({
                 "product": ProductDetailResponse.model_validate(prod),
                 "product_type": ProductTypeResponse.model_validate(pt),
-                "discount_percent": round(discount_percent, 2) if discount_percent is not None else 0,
-                "sold": sold
+                "discount_percent": round(stat.discount_percent, 2) if stat.discount_percent is not None else 0,
+                "sold": sold.get(pt.id, 0)
             })
-        # Trả về tối đa limit sản phẩm
-        return result[:limit]
+        return result
+
     def __init__(self, db: Session):
         self.repo = ProductRepository(db)
+        self.stat_repo = ProductStatRepository(db)
+        self.type_repo = ProductTypeRepository(db)
 
     def get_detail(self, id: str):
         return self.repo.get_detail(id)
 
+    def get_details_by_ids(self, product_ids: List[str]) -> Tuple[List, List[str]]:
+        """
+        Lấy chi tiết nhiều sản phẩm trong 1 lần gọi.
+        Returns: (danh sách sản phẩm theo đúng thứ tự request, danh sách ID không tìm thấy)
+        """
+        from app.schemas.response.product import ProductDetailResponse
+        # Bỏ ID trùng nhưng giữ nguyên thứ tự client gửi lên
+        ordered_ids = list(dict.fromkeys(product_ids))
+        products = self.repo.get_details_by_ids(ordered_ids)
+        product_map = {prod.id: prod for prod in products}
+
+        items = []
+        missing_ids = []
+        for prod_id in ordered_ids:
+            prod = product_map.get(prod_id)
+            if prod is None:
+                missing_ids.append(prod_id)
+                continue
+            items.append(ProductDetailResponse.model_validate(prod))
+        return items, missing_ids
+
     def get_all(self, skip: int = 0, limit: int = 20):
         """Lấy danh sách tất cả sản phẩm với phân trang"""
         return self.repo.get_all(skip=skip, limit=limit)
@@ -67,29 +92,85 @@ class ProductService:
             limit=limit
         )
 
+    def search_cards(
+        self,
+        keyword: Optional[str] = None,
+        brand_id: Optional[str] = None,
+        category_id: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        is_active: Optional[bool] = True,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        skip: int = 0,
+        limit: int = 20
+    ) -> Tuple[List, int]:
+        """Tìm kiếm và lọc sản phẩm, trả về dạng card (chỉ các cột hiển thị)"""
+        from app.schemas.response.product import ProductCardResponse
+        cards, total = self.repo.search_cards(
+            keyword=keyword,
+            brand_id=brand_id,
+            category_id=category_id,
+            min_price=min_price,
+            max_price=max_price,
+            is_active=is_active,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit
+        )
+        return [ProductCardResponse(**card) for card in cards], total
+
     def create(self, data: ProductCreateRequest, created_by: Optional[str] = None):
         """Tạo sản phẩm mới"""
         product_data = data.model_dump(exclude={"product_types"})
-        product = self.repo.create(product_data, created_by=created_by)
+        # Sản phẩm và dòng product_stats đi chung 1 transaction
+        product = self.repo.create_product(product_data, created_by=created_by)
+        self.stat_repo.refresh_discounts([product.id])
+        self.repo.db.commit()
+        self.repo.db.refresh(product)
         return product
 
     def update(self, id: str, data: ProductUpdateRequest, updated_by: Optional[str] = None):
         """Cập nhật sản phẩm"""
         update_data = data.model_dump(exclude_unset=True, exclude={"product_types"})
-        return self.repo.update(id, update_data, updated_by=updated_by)
+        # Tên / ảnh / trạng thái sản phẩm nằm trong tóm tắt giỏ hàng, đi chung commit của update
+        self.type_repo.bump_versions_of_product(id)
+        product = self.repo.update(id, update_data, updated_by=updated_by)
+        if product and "is_active" in update_data:
+            # Sản phẩm ngừng bán / bán lại thì phải ra / vào bảng xếp hạng
+            self.stat_repo.refresh_discounts([id])
+            self.repo.db.commit()
+        return product
 
     def delete(self, id: str, deleted_by: Optional[str] = None) -> bool:
         """Soft delete sản phẩm"""
-        return self.repo.delete(id, deleted_by=deleted_by)
+        self.type_repo.bump_versions_of_product(id)
+        deleted = self.repo.delete(id, deleted_by=deleted_by)
+        if deleted:
+            self.stat_repo.refresh_discounts([id])
+            self.repo.db.commit()
+        return deleted
 
     def get_best_selling(self, limit=10):
-        return self.repo.get_best_selling(limit)
+        return self.stat_repo.get_best_selling(limit)
+
+    def get_best_selling_cards(self, limit=10):
+        from app.schemas.response.product import ProductCardResponse
+        product_ids = self.stat_repo.get_best_selling_ids(limit)
+        return [ProductCardResponse(**card) for card in self.repo.get_cards_by_ids(product_ids)]
 
     def get_most_favorite(self, limit=10):
-        return self.repo.get_most_favorite(limit)
+        return self.stat_repo.get_most_favorite(limit)
 
     def get_by_brand(self, brand_id: str, limit=20, skip=0):
-        return self.repo.get_by_brand(brand_id, limit, skip)
+        # Cùng điều kiện lọc + thứ tự với get_cards_by_brand để 2 view phân trang trên cùng tập sản phẩm
+        products, _ = self.search_with_filters(brand_id=brand_id, is_active=True, skip=skip, limit=limit)
+        return products
+
+    def get_cards_by_brand(self, brand_id: str, limit=20, skip=0):
+        cards, _ = self.search_cards(brand_id=brand_id, is_active=True, skip=skip, limit=limit)
+        return cards
 
     def get_by_category(self, category_id: str, limit=20, skip=0):
         return self.repo.get_by_category(category_id, limit, skip)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import logging
+
+from app.core import database
+from app.repositories.product_stat_repository import ProductStatRepository
+
+logger = logging.getLogger("app")
+
+
+def reconcile_product_stats() -> dict:
+    """
+    Job định kỳ: tính lại counter bán chạy / yêu thích từ dữ liệu gốc và báo cáo độ lệch.
+    Counter được cập nhật tăng dần theo từng sự kiện, job này chỉ để phát hiện và sửa sai lệch.
+    """
+    db = database.SessionLocal()
+    try:
+        report = ProductStatRepository(db).reconcile()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if report["drift"]:
+        logger.warning(
+            "Product stats drift: %s/%s products corrected: %s",
+            len(report["drift"]), report["checked"], report["drift"]
+        )
+    else:
+        logger.info("Product stats reconciled: %s products, no drift", report["checked"])
+    return report
@@ -1,6 +1,14 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
+from app.repositories.cache_version_repository import CacheVersionRepository, PRODUCT_TYPES_VERSION
+from app.repositories.product_stat_repository import ProductStatRepository
 from app.repositories.product_type_repository import ProductTypeRepository
 from app.core.exceptions.app_exception import NotFoundException
+from app.schemas.request.product import ProductTypeBulkUpdateItem
+
+PRODUCT_TYPE_BULK_CHUNK_SIZE = 500  # Số biến thể mỗi transaction
+PRODUCT_TYPE_BULK_FIELDS = ("price", "discount_price", "stock", "status")
 
 
 class ProductTypeService:
@@ -36,3 +44,69 @@ class ProductTypeService:
             )
 
         return variant
+
+    @staticmethod
+    def bulk_update(
+        db: Session,
+        items: List[ProductTypeBulkUpdateItem],
+        updated_by: Optional[str] = None
+    ) -> dict:
+        """
+        Cập nhật giá / tồn kho / trạng thái nhiều biến thể.
+
+        Mỗi chunk: 1 query đọc version (khóa FOR UPDATE các dòng của chunk), 1 câu UPDATE executemany
+        cho mỗi nhóm item cùng tập cột (thường cả chunk chỉ có 1 nhóm), 1 query đọc lại version,
+        rồi tính lại giảm giá, bump version stamp và commit.
+        Item có `version` không khớp version hiện tại được trả về trong `conflicts`. Kết quả từng item
+        lấy từ version đọc lại: đúng version cũ + 1 là đã ghi, version khác là conflict,
+        không còn (bị xóa mềm) là not_found.
+        """
+        repo = ProductTypeRepository(db)
+        report = {"updated": [], "conflicts": [], "not_found": []}
+
+        for start in range(0, len(items), PRODUCT_TYPE_BULK_CHUNK_SIZE):
+            chunk = items[start:start + PRODUCT_TYPE_BULK_CHUNK_SIZE]
+            current = repo.get_versions([item.type_id for item in chunk], lock=True)
+
+            # Nhóm theo (tập cột cần ghi, có check version không) để mỗi nhóm là 1 câu UPDATE
+            groups: Dict[Tuple[Tuple[str, ...], bool], List[dict]] = defaultdict(list)
+            for item in chunk:
+                if item.type_id not in current:
+                    report["not_found"].append(item.type_id)
+                    continue
+                version = current[item.type_id][1]
+                if item.version is not None and item.version != version:
+                    report["conflicts"].append(item.type_id)
+                    continue
+
+                fields = tuple(sorted(item.model_fields_set & set(PRODUCT_TYPE_BULK_FIELDS)))
+                if not fields:
+                    continue
+                params = {"b_id": item.type_id, **{field: getattr(item, field) for field in fields}}
+                if item.version is not None:
+                    params["b_version"] = item.version
+                groups[(fields, item.version is not None)].append(params)
+
+            if not groups:
+                continue
+
+            planned = []
+            for (fields, check_version), params in groups.items():
+                repo.bulk_update(fields, params, check_version, updated_by=updated_by)
+                planned.extend(row["b_id"] for row in params)
+
+            new_versions = repo.get_versions(planned)
+            for type_id in planned:
+                if type_id not in new_versions:
+                    report["not_found"].append(type_id)
+                elif new_versions[type_id][1] != current[type_id][1] + 1:
+                    # Dòng không được ghi: version đã bị request khác đổi
+                    report["conflicts"].append(type_id)
+                else:
+                    report["updated"].append({"id": type_id, "version": new_versions[type_id][1]})
+
+            ProductStatRepository(db).refresh_discounts(product_id for product_id, _ in new_versions.values())
+            CacheVersionRepository(db).bump(PRODUCT_TYPES_VERSION)
+            db.commit()
+
+        return report
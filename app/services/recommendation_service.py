@@ -0,0 +1,273 @@
+"""
+Gợi ý sản phẩm cá nhân hóa - GET /products/recommended
+
+- Vector sở thích của user: trọng số theo brand / category / loại da, cộng từ wishlist (x1)
+  và các dòng đơn hàng đã hoàn thành (x2), chuẩn hóa để tổng = 1
+- Điểm sản phẩm = tích vô hướng vector sở thích với đặc trưng sản phẩm + 1 phần nhỏ độ phổ biến để phá hòa.
+  Tính theo lô user bằng ma trận thưa (user x đặc trưng) @ (đặc trưng x sản phẩm), top N bằng argpartition
+- Job rebuild tính lại toàn bộ user đang hoạt động; user có thay đổi (wishlist, đơn completed)
+  được đánh dấu và tính lại ở job refresh ngắn chu kỳ
+- User chưa có dữ liệu (cold) dùng danh sách bán chạy
+"""
+import logging
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+from app.models.order import Order
+from app.models.orderDetail import OrderDetail
+from app.models.product import Product
+from app.models.productStat import ProductStat
+from app.models.productType import ProductType
+from app.models.wishlist import Wishlist
+from app.models.wishlistItem import WishlistItem
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_stat_repository import ProductStatRepository
+from app.repositories.user_recommendation_repository import UserRecommendationRepository
+from app.schemas.response.product import ProductCardResponse
+
+logger = logging.getLogger("app")
+
+WISHLIST_WEIGHT = 1.0
+ORDER_WEIGHT = 2.0
+# Độ phổ biến chỉ dùng để phá hòa giữa các sản phẩm cùng điểm sở thích
+POPULARITY_WEIGHT = 0.01
+
+_dirty_users: Set[str] = set()
+_dirty_lock = threading.Lock()
+
+
+def mark_user_dirty(user_id: Optional[str]) -> None:
+    """Đánh dấu user cần tính lại gợi ý (gọi khi wishlist hoặc đơn completed thay đổi)"""
+    if user_id:
+        with _dirty_lock:
+            _dirty_users.add(user_id)
+
+
+def get_recommended_products(db: Session, user_id: str, limit: int = 20) -> Tuple[List[ProductCardResponse], str]:
+    """Returns: (danh sách card, nguồn: "personalized" hoặc "popular")"""
+    product_ids = UserRecommendationRepository(db).get_product_ids(user_id, limit)
+    source = "personalized"
+    if not product_ids:
+        product_ids = ProductStatRepository(db).get_best_selling_ids(limit)
+        source = "popular"
+    cards = ProductRepository(db).get_cards_by_ids(product_ids)
+    return [ProductCardResponse(**card) for card in cards], source
+
+
+# ==================== Dữ liệu đầu vào ====================
+
+class _ProductIndex:
+    """Ma trận thưa sản phẩm x đặc trưng (0/1) của các sản phẩm đang bán + độ phổ biến theo cùng thứ tự dòng"""
+
+    def __init__(self, db: Session):
+        features: Dict[str, Set[str]] = defaultdict(set)
+        rows = db.query(Product.id, Product.brand_id, Product.category_id).filter(
+            Product.deleted_at.is_(None),
+            Product.is_active == True
+        ).all()
+        for product_id, brand_id, category_id in rows:
+            if brand_id:
+                features[product_id].add("brand:" + brand_id)
+            if category_id:
+                features[product_id].add("category:" + category_id)
+
+        skin_rows = db.query(ProductType.product_id, ProductType.skin_type)\
+            .join(Product, Product.id == ProductType.product_id)\
+            .filter(
+                ProductType.deleted_at.is_(None),
+                ProductType.skin_type.isnot(None),
+                Product.deleted_at.is_(None),
+                Product.is_active == True
+            ).distinct().all()
+        for product_id, skin_type in skin_rows:
+            for feature in _skin_features(skin_type):
+                features[product_id].add(feature)
+
+        self.product_ids: List[str] = list(features)
+        self.positions: Dict[str, int] = {product_id: pos for pos, product_id in enumerate(self.product_ids)}
+        feature_positions: Dict[str, int] = {}
+        matrix_rows, matrix_cols = [], []
+        for pos, product_id in enumerate(self.product_ids):
+            for feature in features[product_id]:
+                matrix_rows.append(pos)
+                matrix_cols.append(feature_positions.setdefault(feature, len(feature_positions)))
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(matrix_rows)), (matrix_rows, matrix_cols)),
+            shape=(len(self.product_ids), len(feature_positions))
+        )
+        # Chuyển vị sẵn 1 lần, dùng cho mọi lô user
+        self.matrix_t = self.matrix.T.tocsr()
+
+        self.popularity = np.zeros(len(self.product_ids))
+        for product_id, sold in db.query(ProductStat.product_id, ProductStat.sold_count).all():
+            pos = self.positions.get(product_id)
+            if pos is not None:
+                self.popularity[pos] = math.log1p(sold or 0) * POPULARITY_WEIGHT
+
+
+def _skin_features(skin_type: Optional[str]) -> List[str]:
+    return [
+        "skin:" + part.strip().lower()
+        for part in (skin_type or "").replace(";", ",").replace("/", ",").split(",")
+        if part.strip()
+    ]
+
+
+def _active_user_ids(db: Session) -> List[str]:
+    since = datetime.now() - timedelta(days=settings.RECOMMENDATION_ACTIVE_DAYS)
+    wishlist_users = db.query(Wishlist.user_id)\
+        .join(WishlistItem, WishlistItem.wishlist_id == Wishlist.id)\
+        .filter(
+            Wishlist.deleted_at.is_(None),
+            WishlistItem.deleted_at.is_(None),
+            WishlistItem.created_at >= since
+        )
+    order_users = db.query(Order.user_id).filter(
+        Order.status == "completed",
+        Order.deleted_at.is_(None),
+        Order.created_at >= since
+    )
+    return [user_id for (user_id,) in wishlist_users.union(order_users).all() if user_id]
+
+
+def _load_events(db: Session, user_ids: List[str]) -> Iterable[Tuple[str, str, float]]:
+    """Yield (user_id, product_id, trọng số) từ wishlist và đơn completed của các user"""
+    wishlist_rows = db.query(Wishlist.user_id, ProductType.product_id)\
+        .join(WishlistItem, WishlistItem.wishlist_id == Wishlist.id)\
+        .join(ProductType, ProductType.id == WishlistItem.product_type_id)\
+        .filter(
+            Wishlist.user_id.in_(user_ids),
+            Wishlist.deleted_at.is_(None),
+            WishlistItem.deleted_at.is_(None)
+        ).all()
+    for user_id, product_id in wishlist_rows:
+        yield user_id, product_id, WISHLIST_WEIGHT
+
+    order_rows = db.query(Order.user_id, ProductType.product_id)\
+        .join(OrderDetail, OrderDetail.order_id == Order.id)\
+        .join(ProductType, ProductType.id == OrderDetail.product_type_id)\
+        .filter(
+            Order.user_id.in_(user_ids),
+            Order.status == "completed",
+            Order.deleted_at.is_(None)
+        ).all()
+    for user_id, product_id in order_rows:
+        yield user_id, product_id, ORDER_WEIGHT
+
+
+# ==================== Tính gợi ý ====================
+
+_USER_BATCH_SIZE = 500
+
+
+def compute_recommendations(
+    db: Session,
+    user_ids: List[str],
+    index: _ProductIndex,
+    top_n: int
+) -> List[Tuple[str, str, float]]:
+    """
+    Returns: [(user_id, product_id, score)] top N cho mỗi user (bỏ sản phẩm user đã mua / đã thích)
+
+    Mỗi lô user: ma trận tương tác user x sản phẩm (E), sở thích = E @ đặc trưng rồi chuẩn hóa tổng dòng = 1,
+    điểm = sở thích @ đặc trưngᵀ (1 phép nhân ma trận thưa), top N mỗi dòng lấy bằng argpartition.
+    """
+    rows = []
+    if not index.product_ids:
+        return rows
+    for start in range(0, len(user_ids), _USER_BATCH_SIZE):
+        batch = user_ids[start:start + _USER_BATCH_SIZE]
+        user_positions: Dict[str, int] = {}
+        event_rows, event_cols, event_weights = [], [], []
+        for user_id, product_id, weight in _load_events(db, batch):
+            pos = index.positions.get(product_id)
+            if pos is None:
+                continue  # Sản phẩm đã ngừng bán: không có đặc trưng, cũng không thể được gợi ý
+            event_rows.append(user_positions.setdefault(user_id, len(user_positions)))
+            event_cols.append(pos)
+            event_weights.append(weight)
+        if not user_positions:
+            continue
+
+        # Trùng (user, sản phẩm) được cộng dồn khi chuyển sang CSR
+        events = sparse.csr_matrix(
+            (event_weights, (event_rows, event_cols)),
+            shape=(len(user_positions), len(index.product_ids))
+        )
+        preferences = events @ index.matrix
+        totals = np.asarray(preferences.sum(axis=1)).ravel()
+        totals[totals <= 0] = 1
+        scores = (sparse.diags(1 / totals) @ preferences @ index.matrix_t).tocsr()
+
+        for user_id, row in user_positions.items():
+            begin, end = scores.indptr[row], scores.indptr[row + 1]
+            candidates = scores.indices[begin:end]
+            values = scores.data[begin:end]
+            keep = (values > 0) & ~np.isin(candidates, events.indices[events.indptr[row]:events.indptr[row + 1]])
+            candidates = candidates[keep]
+            values = values[keep] + index.popularity[candidates]
+            if not len(candidates):
+                continue
+            if len(candidates) > top_n:
+                top = np.argpartition(-values, top_n - 1)[:top_n]
+                candidates, values = candidates[top], values[top]
+            order = np.argsort(-values, kind="stable")
+            rows.extend(
+                (user_id, index.product_ids[pos], round(float(score), 6))
+                for pos, score in zip(candidates[order], values[order])
+            )
+    return rows
+
+
+def rebuild_recommendations() -> dict:
+    """Job định kỳ: tính lại gợi ý cho toàn bộ user đang hoạt động"""
+    db = database.SessionLocal()
+    try:
+        index = _ProductIndex(db)
+        user_ids = _active_user_ids(db)
+        rows = compute_recommendations(db, user_ids, index, settings.RECOMMENDATION_TOP_N)
+        stored = UserRecommendationRepository(db).replace(rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info("Recommendations rebuilt: %s users, %s rows stored", len(user_ids), stored)
+    return {"users": len(user_ids), "rows": stored}
+
+
+def refresh_dirty_recommendations() -> dict:
+    """Job ngắn chu kỳ: tính lại gợi ý cho các user vừa có thay đổi"""
+    with _dirty_lock:
+        user_ids = list(_dirty_users)
+        _dirty_users.clear()
+    if not user_ids:
+        return {"users": 0, "rows": 0}
+
+    db = database.SessionLocal()
+    try:
+        index = _ProductIndex(db)
+        rows = compute_recommendations(db, user_ids, index, settings.RECOMMENDATION_TOP_N)
+        stored = UserRecommendationRepository(db).replace(rows, user_ids=user_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Đưa lại vào hàng đợi để lần chạy sau thử lại
+        with _dirty_lock:
+            _dirty_users.update(user_ids)
+        raise
+    finally:
+        db.close()
+
+    return {"users": len(user_ids), "rows": stored}
@@ -0,0 +1,377 @@
+"""
+Reference data cache - brands, types / type values, roles, vouchers
+
+Các bảng này chỉ đổi vài lần mỗi tháng nhưng bị đọc ở mọi lần tải storefront.
+- Mỗi bảng được nạp toàn bộ vào 1 snapshot bất biến (tuple các frozen dataclass + dict tra cứu)
+- Mỗi request chỉ đọc version stamp (1 query nhỏ); version đổi thì nạp lại snapshot
+- List / tìm kiếm / sắp xếp / phân trang làm trong bộ nhớ, response list được cache dạng bytes
+  theo (version, tham số)
+- Ghi từ admin gọi invalidate() sau khi commit: bump version (worker khác tự nạp lại) + xóa cache local
+"""
+import logging
+import threading
+from dataclasses import dataclass, fields
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import render_json
+from app.models.brand import Brand
+from app.models.role import Role
+from app.models.type import Type
+from app.models.typeValue import TypeValue
+from app.models.voucher import Voucher
+from app.repositories.cache_version_repository import (
+    CacheVersionRepository,
+    BRANDS_VERSION,
+    ROLES_VERSION,
+    TYPES_VERSION,
+    VOUCHERS_VERSION,
+)
+from app.schemas.request.brand import BrandResponse
+from app.schemas.request.type import TypeValueResponse, TypeWithValuesResponse
+from app.schemas.response.base import BaseResponse
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== Snapshot rows ====================
+
+@dataclass(frozen=True)
+class BrandRef:
+    id: str
+    name: Optional[str]
+    slug: Optional[str]
+    image_path: Optional[str]
+    description: Optional[str]
+    created_by: Optional[str]
+    updated_by: Optional[str]
+    deleted_by: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    deleted_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class TypeValueRef:
+    id: str
+    name: Optional[str]
+    type_id: str
+    created_by: Optional[str]
+    updated_by: Optional[str]
+    deleted_by: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    deleted_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class TypeRef:
+    id: str
+    name: str
+    description: Optional[str]
+    values: Tuple[TypeValueRef, ...]
+    created_by: Optional[str]
+    updated_by: Optional[str]
+    deleted_by: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    deleted_at: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class RoleRef:
+    id: str
+    name: str
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class VoucherRef:
+    id: str
+    code: str
+    discount: float
+    description: Optional[str]
+    quantity: int  # Chỉ để hiển thị / lọc sơ bộ, trừ lượt luôn dùng UPDATE có điều kiện trên DB
+    min_order_amount: Optional[float]
+    max_discount: Optional[float]
+    limit: Optional[int]
+
+
+_AUDIT_FIELDS = ("created_by", "updated_by", "deleted_by", "created_at", "updated_at", "deleted_at")
+
+
+def _audit(obj) -> dict:
+    return {field: getattr(obj, field) for field in _AUDIT_FIELDS}
+
+
+def _to_type_value_ref(value: TypeValue) -> TypeValueRef:
+    return TypeValueRef(id=value.id, name=value.name, type_id=value.type_id, **_audit(value))
+
+
+def _load_brands(db: Session) -> List[BrandRef]:
+    return [
+        BrandRef(
+            id=brand.id,
+            name=brand.name,
+            slug=brand.slug,
+            image_path=brand.image_path,
+            description=brand.description,
+            **_audit(brand),
+        )
+        for brand in db.query(Brand).filter(Brand.deleted_at.is_(None)).all()
+    ]
+
+
+def _load_type_values(db: Session) -> List[TypeValueRef]:
+    return [
+        _to_type_value_ref(value)
+        for value in db.query(TypeValue).filter(TypeValue.deleted_at.is_(None)).all()
+    ]
+
+
+def _load_types(db: Session) -> List[TypeRef]:
+    values_by_type: Dict[str, List[TypeValueRef]] = {}
+    for value in _load_type_values(db):
+        values_by_type.setdefault(value.type_id, []).append(value)
+    return [
+        TypeRef(
+            id=type_.id,
+            name=type_.name,
+            description=type_.description,
+            values=tuple(values_by_type.get(type_.id, ())),
+            **_audit(type_),
+        )
+        for type_ in db.query(Type).filter(Type.deleted_at.is_(None)).all()
+    ]
+
+
+def _load_roles(db: Session) -> List[RoleRef]:
+    return [
+        RoleRef(id=role.id, name=role.name, description=role.description)
+        for role in db.query(Role).filter(Role.deleted_at.is_(None)).all()
+    ]
+
+
+def _load_vouchers(db: Session) -> List[VoucherRef]:
+    return [
+        VoucherRef(
+            id=voucher.id,
+            code=voucher.code,
+            discount=voucher.discount,
+            description=voucher.description,
+            quantity=voucher.quantity,
+            min_order_amount=voucher.min_order_amount,
+            max_discount=voucher.max_discount,
+            limit=voucher.limit,
+        )
+        for voucher in db.query(Voucher).filter(Voucher.deleted_at.is_(None)).all()
+    ]
+
+
+# ==================== Snapshot + bảng tham chiếu ====================
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    version: int
+    items: Tuple[Any, ...]
+    by_id: Mapping[str, Any]
+    by_key: Mapping[str, Any]  # brand: slug, role: tên viết thường
+
+
+class _ReferenceTable:
+    def __init__(
+        self,
+        namespace: str,
+        row_type: type,
+        loader: Callable[[Session], List[Any]],
+        key_of: Optional[Callable[[Any], Optional[str]]] = None,
+        search_fields: Tuple[str, ...] = ("name", "description"),
+    ):
+        self.namespace = namespace
+        self._loader = loader
+        self._key_of = key_of
+        self._search_fields = search_fields
+        self._sort_fields = {field.name for field in fields(row_type) if field.name != "values"}
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._lock = threading.Lock()
+        self._json_cache = TTLCache(ttl_seconds=settings.REFERENCE_DATA_CACHE_TTL_SECONDS, maxsize=256)
+
+    def snapshot(self, db: Session) -> ReferenceSnapshot:
+        """Snapshot hiện tại, nạp lại nếu version stamp trong DB đã đổi"""
+        version = CacheVersionRepository(db).get_version(self.namespace)
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+        with self._lock:
+            current = self._snapshot
+            if current is None or current.version != version:
+                current = self._build(self._loader(db), version)
+                self._snapshot = current
+        return current
+
+    def _build(self, items: List[Any], version: int) -> ReferenceSnapshot:
+        by_key = {}
+        if self._key_of:
+            for item in items:
+                key = self._key_of(item)
+                if key:
+                    by_key[key] = item
+        return ReferenceSnapshot(
+            version=version,
+            items=tuple(items),
+            by_id=MappingProxyType({item.id: item for item in items}),
+            by_key=MappingProxyType(by_key),
+        )
+
+    def get(self, db: Session, item_id: str) -> Optional[Any]:
+        return self.snapshot(db).by_id.get(item_id)
+
+    def get_by_key(self, db: Session, key: str) -> Optional[Any]:
+        return self.snapshot(db).by_key.get(key)
+
+    def search(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        q: Optional[str] = None,
+        sort_by: str = "id",
+        sort_dir: str = "desc",
+        where: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[List[Any], int]:
+        """Tương đương repo.search (ilike trên name/description, sort, offset/limit) nhưng chạy trong bộ nhớ"""
+        return self._search(self.snapshot(db), skip, limit, q, sort_by, sort_dir, where)
+
+    def _search(self, snapshot, skip, limit, q, sort_by, sort_dir, where) -> Tuple[List[Any], int]:
+        items = snapshot.items
+        if where is not None:
+            items = [item for item in items if where(item)]
+        if q:
+            needle = q.lower()
+            items = [
+                item for item in items
+                if any(needle in (getattr(item, field) or "").lower() for field in self._search_fields)
+            ]
+        if sort_by not in self._sort_fields:
+            sort_by = "id"
+        # NULL đứng đầu khi tăng dần, cuối khi giảm dần (giống MySQL)
+        items = sorted(
+            items,
+            key=lambda item: (getattr(item, sort_by) is not None, getattr(item, sort_by) or ""),
+            reverse=not (sort_dir and sort_dir.lower() == "asc"),
+        )
+        return items[skip:skip + limit], len(items)
+
+    def list_json(
+        self,
+        db: Session,
+        response_type: Any,
+        params: dict,
+        where_key: Optional[Tuple] = None,
+        where: Optional[Callable[[Any], bool]] = None,
+    ) -> bytes:
+        """
+        Response list đã serialize sẵn, cache theo (version, tham số phân trang / tìm kiếm).
+
+        - **where_key**: định danh của bộ lọc `where` để đưa vào key cache (VD: ("type_id", ...))
+        """
+        snapshot = self.snapshot(db)
+        skip, limit = params.get("skip", 0), params.get("limit", 100)
+        q, sort_by, sort_dir = params.get("q"), params.get("sort_by", "id"), params.get("sort_dir", "desc")
+        cache_key = (snapshot.version, where_key, skip, limit, q, sort_by, sort_dir)
+        content = self._json_cache.get(cache_key)
+        if content is None:
+            items, total = self._search(snapshot, skip, limit, q, sort_by, sort_dir, where)
+            content = render_json(response_type, message="OK", data=items, meta={**params, "total": total})
+            self._json_cache.set(cache_key, content)
+        return content
+
+    def reset(self) -> None:
+        with self._lock:
+            self._snapshot = None
+        self._json_cache.invalidate()
+
+
+def _brand_slug(brand: BrandRef) -> Optional[str]:
+    return brand.slug
+
+
+def _role_name(role: RoleRef) -> Optional[str]:
+    return role.name.lower() if role.name else None
+
+
+def _normalize_voucher_code(code: Optional[str]) -> str:
+    # Cột code dùng collation *_ci (không phân biệt hoa thường, bỏ qua khoảng trắng cuối)
+    return (code or "").strip().upper()
+
+
+def _voucher_code(voucher: VoucherRef) -> Optional[str]:
+    return _normalize_voucher_code(voucher.code)
+
+
+brands = _ReferenceTable(BRANDS_VERSION, BrandRef, _load_brands, key_of=_brand_slug)
+types = _ReferenceTable(TYPES_VERSION, TypeRef, _load_types)
+type_values = _ReferenceTable(TYPES_VERSION, TypeValueRef, _load_type_values, search_fields=("name",))
+roles = _ReferenceTable(ROLES_VERSION, RoleRef, _load_roles, key_of=_role_name, search_fields=("name",))
+vouchers = _ReferenceTable(
+    VOUCHERS_VERSION, VoucherRef, _load_vouchers, key_of=_voucher_code, search_fields=("code", "description")
+)
+
+_TABLES = (brands, types, type_values, roles, vouchers)
+
+
+# ==================== API dùng trong router / service ====================
+
+def brand_list_json(db: Session, params: dict) -> bytes:
+    return brands.list_json(db, BaseResponse[List[BrandResponse]], params)
+
+
+def type_list_json(db: Session, params: dict) -> bytes:
+    return types.list_json(db, BaseResponse[List[TypeWithValuesResponse]], params)
+
+
+def type_value_list_json(db: Session, type_id: str, params: dict) -> bytes:
+    return type_values.list_json(
+        db,
+        BaseResponse[List[TypeValueResponse]],
+        params,
+        where_key=("type_id", type_id),
+        where=lambda value: value.type_id == type_id,
+    )
+
+
+def get_role_by_name(db: Session, name: str) -> Optional[RoleRef]:
+    """Tra role theo tên, không phân biệt hoa thường"""
+    return roles.get_by_key(db, (name or "").lower())
+
+
+def get_voucher_by_code(db: Session, code: str) -> Optional[VoucherRef]:
+    """Tra voucher chưa xóa theo mã, không phân biệt hoa thường như so sánh trên cột code"""
+    return vouchers.get_by_key(db, _normalize_voucher_code(code))
+
+
+def invalidate(db: Session, *namespaces: str) -> None:
+    """Gọi sau khi ghi dữ liệu tham chiếu: bump version + commit, xóa snapshot local của namespace đó"""
+    CacheVersionRepository(db).bump(*namespaces)
+    db.commit()
+    for table in _TABLES:
+        if table.namespace in namespaces:
+            table.reset()
+
+
+def warm_up() -> None:
+    """Nạp sẵn toàn bộ snapshot khi app khởi động (lỗi chỉ log, request đầu tiên sẽ nạp lại)"""
+    db = database.SessionLocal()
+    try:
+        for table in _TABLES:
+            table.snapshot(db)
+    except Exception:
+        logger.exception("Cannot warm up reference data cache")
+    finally:
+        db.close()
@@ -0,0 +1,154 @@
+"""
+Sản phẩm tương tự theo nội dung (content-based), không cần lịch sử bán hàng
+
+Job rebuild_similar_products():
+1. Đọc tên, mô tả (Product) + loại da, thành phần (ProductType) của sản phẩm đang bán
+2. Tách token, dựng ma trận TF-IDF thưa (CSR, sản phẩm x term) đã chuẩn hóa L2
+3. Cosine = X @ X.T, tính theo từng khối dòng (bộ nhớ giới hạn theo khối), top K mỗi dòng
+   lấy bằng argpartition thay vì sắp xếp cả dòng
+4. Lưu top K vào product_similarities; API chỉ đọc lại, không tính toán theo request
+"""
+import logging
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.config import settings
+from app.models.product import Product
+from app.models.productType import ProductType
+from app.repositories.product_repository import ProductRepository
+from app.repositories.product_similarity_repository import ProductSimilarityRepository
+from app.schemas.response.product import ProductCardResponse
+
+logger = logging.getLogger("app")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Trọng số theo trường: tên sản phẩm quan trọng hơn mô tả
+NAME_WEIGHT = 2
+# Term xuất hiện ở quá nhiều sản phẩm gần như không phân biệt được gì, không tính vào cosine
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Số sản phẩm mỗi khối khi nhân ma trận (khối cosine dày: _BLOCK_ROWS x số sản phẩm x 8 byte)
+_BLOCK_ROWS = 256
+
+
+def get_similar_products(db: Session, product_id: str, limit: int = 10) -> List[ProductCardResponse]:
+    similar_ids = ProductSimilarityRepository(db).get_similar_ids(product_id, limit)
+    cards = ProductRepository(db).get_cards_by_ids(similar_ids)
+    return [ProductCardResponse(**card) for card in cards]
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall((text or "").lower()) if len(token) > 1 and not token.isdigit()]
+
+
+def _load_documents(db: Session) -> Dict[str, Counter]:
+    """Trả về {product_id: Counter(term)} cho các sản phẩm đang bán"""
+    documents: Dict[str, Counter] = {}
+    products = db.query(Product.id, Product.name, Product.description).filter(
+        Product.deleted_at.is_(None),
+        Product.is_active == True
+    ).all()
+    for product_id, name, description in products:
+        terms = Counter()
+        for token in _tokenize(name):
+            terms[token] += NAME_WEIGHT
+        terms.update(_tokenize(description))
+        documents[product_id] = terms
+
+    variants = db.query(ProductType.product_id, ProductType.skin_type, ProductType.ingredients)\
+        .join(Product, Product.id == ProductType.product_id)\
+        .filter(
+            ProductType.deleted_at.is_(None),
+            Product.deleted_at.is_(None),
+            Product.is_active == True
+        ).all()
+    for product_id, skin_type, ingredients in variants:
+        terms = documents.get(product_id)
+        if terms is None:
+            continue
+        # Loại da / thành phần được thêm cả dạng nguyên cụm (VD: "ing:niacinamide") để khớp chính xác
+        for skin in re.split(r"[,;/]", skin_type or ""):
+            if skin.strip():
+                terms["skin:" + skin.strip().lower()] += 1
+        for ingredient in re.split(r"[,;]", ingredients or ""):
+            if ingredient.strip():
+                terms["ing:" + ingredient.strip().lower()] += 1
+        terms.update(_tokenize(ingredients))
+    return documents
+
+
+def build_similarity_index(db: Session, top_k: int) -> List[Tuple[str, str, float]]:
+    """Returns: [(product_id, similar_product_id, cosine)] top K cho mỗi sản phẩm"""
+    documents = _load_documents(db)
+    total = len(documents)
+    if total < 2 or top_k < 1:
+        return []
+
+    # Ma trận tần suất thưa CSR: dòng = sản phẩm, cột = term
+    product_ids = list(documents)
+    vocabulary: Dict[str, int] = {}
+    rows, cols, counts = [], [], []
+    for row, terms in enumerate(documents.values()):
+        for term, count in terms.items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+    cols = np.asarray(cols, dtype=np.int64)
+    shape = (total, len(vocabulary))
+
+    # TF-IDF (tf dạng log) chuẩn hóa L2
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + total) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(np.asarray(counts, dtype=np.float64))) * idf[cols]
+    matrix = sparse.csr_matrix((weights, (rows, cols)), shape=shape)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sparse.diags(1 / norms) @ matrix
+
+    # Term xuất hiện ở quá nhiều sản phẩm không tính vào cosine (vẫn tính trong chuẩn hóa)
+    max_df = max(2, int(total * MAX_DOCUMENT_FREQUENCY))
+    matrix = (matrix @ sparse.diags((document_frequency <= max_df).astype(np.float64))).tocsr()
+    matrix.eliminate_zeros()
+    transposed = matrix.T.tocsc()
+
+    k = min(top_k, total - 1)
+    result = []
+    for start in range(0, total, _BLOCK_ROWS):
+        # Cosine của 1 khối dòng với mọi sản phẩm: 1 phép nhân ma trận thưa, ra mảng dày (khối x tổng)
+        scores = (matrix[start:start + _BLOCK_ROWS] @ transposed).toarray()
+        block_rows = np.arange(scores.shape[0])
+        scores[block_rows, start + block_rows] = 0  # bỏ chính nó
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for offset in block_rows:
+            product_id = product_ids[start + offset]
+            for other, score in zip(top[offset], top_scores[offset]):
+                if score > 0:
+                    result.append((product_id, product_ids[other], round(float(score), 6)))
+    return result
+
+
+def rebuild_similar_products() -> dict:
+    """Job định kỳ: tính lại toàn bộ chỉ mục sản phẩm tương tự, thay thế trong 1 transaction"""
+    db = database.SessionLocal()
+    try:
+        rows = build_similarity_index(db, settings.SIMILAR_PRODUCTS_TOP_K)
+        stored = ProductSimilarityRepository(db).replace_all(rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info("Similar products rebuilt: %s pairs stored", stored)
+    return {"pairs": stored}
@@ -0,0 +1,159 @@
+"""
+Cấp slug duy nhất cho brand / category
+
+- Slug gốc = slugify(tên). Lần đầu cấp: slug gốc; các lần sau: "<gốc>-2", "<gốc>-3"...
+- Hậu tố lấy từ bảng slug_counters (khóa + tăng 1 dòng) thay vì kéo toàn bộ slug "<gốc>-%" về Python
+  mỗi lần tạo. Quét prefix trên index slug chỉ chạy 1 lần khi khởi tạo bộ đếm của slug gốc đó.
+- Hậu tố nhận được vẫn kiểm tra lại bằng 1 truy vấn `slug ==` trên index: "<gốc>-n" có thể đã bị
+  tên khác chiếm (vd "iPhone 4" -> "iphone-4") hoặc slug đặt tay, khi đó lấy hậu tố kế tiếp
+- Import hàng loạt dùng slug gốc làm khóa gộp (tên trùng -> dùng lại bản ghi chưa xóa), xem get_or_create_by_slug
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from slugify import slugify
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.mixins import generate_uuid_str
+from app.repositories.slug_counter_repository import SlugCounterRepository
+
+# Số lần thử lại khi insert đụng unique index do request khác vừa tạo cùng slug
+_INSERT_RETRIES = 3
+
+
+@lru_cache(maxsize=4096)
+def slugify_name(value: str) -> str:
+    return slugify(value or "", lowercase=True) or "n-a"
+
+
+def allocate_slug(db: Session, model, name: str, exclude_id: Optional[str] = None) -> str:
+    """
+    Cấp slug duy nhất cho `name` trong bảng của `model` (Brand, Category).
+    Hậu tố từ bộ đếm đã bị slug đặt tay / bản ghi khác chiếm thì lấy tiếp hậu tố sau tới khi trống.
+
+    - **exclude_id**: bản ghi đang đổi tên; giữ slug hiện tại nếu nó đúng bằng slug gốc mới,
+      hoặc tên cũ đã slugify ra đúng slug gốc mới (chỉ đổi hoa thường / dấu câu)
+    """
+    base = slugify_name(name)
+    if exclude_id:
+        current = db.query(model.slug, model.name).filter(model.id == exclude_id).first()
+        if current and current.slug and (current.slug == base or slugify_name(current.name) == base):
+            return current.slug
+
+    counters = SlugCounterRepository(db)
+    while True:
+        suffix = counters.next_suffix(
+            model.__tablename__, base, lambda: _max_existing_suffix(db, model, base)
+        )
+        candidate = base if suffix == 1 else f"{base}-{suffix}"
+        if not _is_taken(db, model, candidate, exclude_id):
+            return candidate
+
+
+def get_or_create_by_slug(
+    db: Session,
+    model,
+    names: Iterable[Optional[str]],
+    cache: Dict[str, str],
+    created_by: Optional[str] = None,
+) -> List[str]:
+    """
+    Nạp {slug gốc: id} cho các tên vào `cache`, tạo mới (1 INSERT executemany) những slug chưa có.
+    Chỉ dùng lại bản ghi chưa xóa; slug gốc đang bị bản ghi đã xóa mềm giữ thì bản ghi mới nhận slug
+    có hậu tố (allocate_slug), key trong cache vẫn là slug gốc.
+    Insert đụng unique index (import khác vừa tạo cùng slug) thì đọc lại và thử với phần còn thiếu.
+    Returns: ID các bản ghi đã tạo
+    """
+    wanted = {}
+    for name in names:
+        if name:
+            wanted.setdefault(slugify_name(name), name)
+
+    created: List[str] = []
+    for attempt in range(_INSERT_RETRIES):
+        missing = [slug for slug in wanted if slug not in cache]
+        if not missing:
+            break
+        for record_id, slug in db.query(model.id, model.slug).filter(
+            model.slug.in_(missing),
+            model.deleted_at.is_(None)
+        ).all():
+            cache[slug] = record_id
+
+        missing = [slug for slug in missing if slug not in cache]
+        taken = _find_taken_by_deleted(db, model, missing, cache)
+        missing = [slug for slug in missing if slug not in cache]
+        if not missing:
+            break
+
+        new_rows = [
+            {
+                "id": generate_uuid_str(),
+                "name": wanted[base],
+                "slug": allocate_slug(db, model, wanted[base]) if base in taken else base,
+                "created_by": created_by,
+                "_base": base,
+            }
+            for base in missing
+        ]
+        try:
+            with db.begin_nested():
+                db.execute(
+                    insert(model.__table__),
+                    [{key: value for key, value in row.items() if key != "_base"} for row in new_rows]
+                )
+        except IntegrityError:
+            if attempt == _INSERT_RETRIES - 1:
+                raise
+            continue
+        cache.update({row["_base"]: row["id"] for row in new_rows})
+        created = [row["id"] for row in new_rows]
+        break
+    return created
+
+
+def _find_taken_by_deleted(db: Session, model, bases: List[str], cache: Dict[str, str]) -> set:
+    """
+    Slug gốc chỉ còn bản ghi đã xóa mềm giữ. Nếu lần import trước đã tạo bản ghi thay thế
+    (slug "<gốc>-n", tên slugify ra đúng slug gốc) thì nạp bản ghi đó vào `cache`.
+    Returns: các slug gốc không dùng được làm slug cho bản ghi mới
+    """
+    if not bases:
+        return set()
+    taken = {slug for (slug,) in db.query(model.slug).filter(model.slug.in_(bases)).all()}
+    for base in taken:
+        rows = db.query(model.id, model.name, model.slug).filter(
+            model.slug.like(base + "-%"),
+            model.deleted_at.is_(None)
+        ).all()
+        for record_id, name, slug in rows:
+            if _suffix_of(slug, base) is not None and slugify_name(name) == base:
+                cache[base] = record_id
+                break
+    return taken
+
+
+def _is_taken(db: Session, model, slug: str, exclude_id: Optional[str] = None) -> bool:
+    """Slug đã có bản ghi khác dùng (kể cả bản ghi đã xóa mềm, vì unique index vẫn giữ)"""
+    query = db.query(model.id).filter(model.slug == slug)
+    if exclude_id:
+        query = query.filter(model.id != exclude_id)
+    return query.first() is not None
+
+
+def _suffix_of(slug: str, base: str) -> Optional[int]:
+    """Hậu tố số của slug dạng "<base>-n", None nếu không khớp"""
+    prefix = base + "-"
+    if slug.startswith(prefix) and slug[len(prefix):].isdigit():
+        return int(slug[len(prefix):])
+    return None
+
+
+def _max_existing_suffix(db: Session, model, base: str) -> int:
+    """Hậu tố lớn nhất đang dùng (quét prefix trên index slug, LIKE không bọc hàm nên dùng được index)"""
+    highest = 1 if db.query(model.id).filter(model.slug == base).first() else 0
+    rows = db.query(model.slug).filter(model.slug.like(base + "-%")).all()
+    suffixes = [suffix for suffix in (_suffix_of(slug, base) for (slug,) in rows) if suffix is not None]
+    return max([highest, *suffixes])
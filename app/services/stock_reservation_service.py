@@ -0,0 +1,72 @@
+"""
+Giữ hàng cho đơn SePay chưa thanh toán
+
+- Tồn kho bị trừ ngay khi tạo đơn (UPDATE có điều kiện), nên `stock` luôn là số lượng còn bán được
+  (= tồn thực tế − hàng đang giữ). Đơn SePay kèm các dòng stock_reservations có hạn thanh toán.
+- Thanh toán thành công / chuyển COD: giữ hàng chuyển committed. Hủy: released.
+- release_expired_reservations quét giữ hàng hết hạn theo index (status, expires_at), hủy đơn còn
+  pending qua CheckoutService.cancel_expired_orders (UPDATE gộp mỗi lô) và đóng giữ hàng còn sót.
+  Được gọi sau bước hủy đơn theo created_at trong job payment_expiry_service.expire_unpaid_sepay_orders.
+"""
+from datetime import datetime
+
+from app.core import database
+from app.core.config import settings
+from app.models.order import Order
+from app.repositories.stock_reservation_repository import (
+    StockReservationRepository,
+    RESERVATION_RELEASED,
+)
+from app.services.checkout_service import CheckoutService
+
+
+def release_expired_reservations() -> dict:
+    """
+    Trả lại kho cho các giữ hàng đã hết hạn, theo lô STOCK_RESERVATION_BATCH_SIZE.
+    Mỗi lô là 1 transaction riêng; đơn đã thanh toán / đã hủy ở nơi khác thì chỉ đóng giữ hàng.
+    """
+    report = {"reservations": 0, "orders_cancelled": 0, "units_released": 0}
+    batch_size = settings.STOCK_RESERVATION_BATCH_SIZE
+    db = database.SessionLocal()
+    try:
+        while True:
+            batch = _release_batch(db, datetime.now(), batch_size)
+            for key, value in batch.items():
+                report[key] += value
+            if batch["reservations"] < batch_size:
+                break
+    finally:
+        db.close()
+    return report
+
+
+def _release_batch(db, now: datetime, limit: int) -> dict:
+    repo = StockReservationRepository(db)
+    try:
+        rows = repo.get_expired_active(now, limit)
+        if not rows:
+            return {"reservations": 0, "orders_cancelled": 0, "units_released": 0}
+
+        # Khóa các đơn còn chờ thanh toán để không tranh chấp với webhook SePay đang xác nhận cùng đơn
+        order_ids = list({order_id for _, order_id, _, _ in rows})
+        pending = {
+            order_id
+            for (order_id,) in db.query(Order.id).filter(
+                Order.id.in_(order_ids),
+                Order.status == "pending",
+                Order.payment_method == "SEPAY",
+            ).with_for_update().all()
+        }
+
+        units_released = CheckoutService(db).cancel_expired_orders(list(pending)) if pending else 0
+        repo.mark([reservation_id for reservation_id, _, _, _ in rows], RESERVATION_RELEASED)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "reservations": len(rows),
+        "orders_cancelled": len(pending),
+        "units_released": units_released,
+    }
@@ -4,7 +4,9 @@ from app.models.type import Type
 from app.models.typeValue import TypeValue
 from app.repositories.type_repository import TypeRepository
 from app.repositories.type_value_repository import TypeValueRepository
+from app.repositories.cache_version_repository import TYPES_VERSION
 from app.schemas.request.type import TypeCreate, TypeUpdate, TypeValueCreate, TypeValueUpdate
+from app.services import reference_data_service
 
 
 def get_type(db: Session, type_id: str) -> Optional[Type]:
@@ -19,18 +21,26 @@ def get_types(db: Session, skip: int = 0, limit: int = 100, q: Optional[str] = N
 
 def create_type(db: Session, type_in: TypeCreate, created_by: Optional[str] = None) -> Type:
     repo = TypeRepository(db)
-    return repo.create(type_in.dict(), created_by=created_by)
+    obj = repo.create(type_in.dict(), created_by=created_by)
+    reference_data_service.invalidate(db, TYPES_VERSION)
+    return obj
 
 
 def update_type(db: Session, type_id: str, type_in: TypeUpdate, updated_by: Optional[str] = None) -> Optional[Type]:
     repo = TypeRepository(db)
     data = type_in.dict(exclude_unset=True)
-    return repo.update(type_id, data, updated_by=updated_by)
+    obj = repo.update(type_id, data, updated_by=updated_by)
+    if obj:
+        reference_data_service.invalidate(db, TYPES_VERSION)
+    return obj
 
 
 def delete_type(db: Session, type_id: str, deleted_by: Optional[str] = None) -> bool:
     repo = TypeRepository(db)
-    return repo.delete(type_id, deleted_by=deleted_by)
+    ok = repo.delete(type_id, deleted_by=deleted_by)
+    if ok:
+        reference_data_service.invalidate(db, TYPES_VERSION)
+    return ok
 
 
 # TypeValue operations
@@ -52,15 +62,23 @@ def create_type_value(db: Session, type_id: str, value_in: TypeValueCreate, crea
     repo = TypeValueRepository(db)
     data = value_in.dict()
     data["type_id"] = type_id
-    return repo.create(data, created_by=created_by)
+    obj = repo.create(data, created_by=created_by)
+    reference_data_service.invalidate(db, TYPES_VERSION)
+    return obj
 
 
 def update_type_value(db: Session, value_id: str, value_in: TypeValueUpdate, updated_by: Optional[str] = None) -> Optional[TypeValue]:
     repo = TypeValueRepository(db)
     data = value_in.dict(exclude_unset=True)
-    return repo.update(value_id, data, updated_by=updated_by)
+    obj = repo.update(value_id, data, updated_by=updated_by)
+    if obj:
+        reference_data_service.invalidate(db, TYPES_VERSION)
+    return obj
 
 
 def delete_type_value(db: Session, value_id: str, deleted_by: Optional[str] = None) -> bool:
     repo = TypeValueRepository(db)
-    return repo.delete(value_id, deleted_by=deleted_by)
+    ok = repo.delete(value_id, deleted_by=deleted_by)
+    if ok:
+        reference_data_service.invalidate(db, TYPES_VERSION)
+    return ok
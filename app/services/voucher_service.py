@@ -1,8 +1,10 @@
 from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models.voucher import Voucher
+from app.repositories.cache_version_repository import VOUCHERS_VERSION
 from app.repositories.voucher_repository import VoucherRepository
 from app.schemas.request.voucher import VoucherCreate, VoucherUpdate
+from app.services import reference_data_service
 
 
 def get_voucher(db: Session, voucher_id: str) -> Optional[Voucher]:
@@ -43,17 +45,25 @@ def get_vouchers(
 def create_voucher(db: Session, voucher_in: VoucherCreate, created_by: Optional[str] = None) -> Voucher:
     """Tạo voucher mới (sử dụng repository)"""
     voucher_repo = VoucherRepository(db)
-    return voucher_repo.create(voucher_in.dict(), created_by=created_by)
+    voucher = voucher_repo.create(voucher_in.dict(), created_by=created_by)
+    reference_data_service.invalidate(db, VOUCHERS_VERSION)
+    return voucher
 
 
 def update_voucher(db: Session, voucher_id: str, voucher_in: VoucherUpdate, updated_by: Optional[str] = None) -> Optional[Voucher]:
     """Cập nhật voucher (sử dụng repository)"""
     voucher_repo = VoucherRepository(db)
     update_data = voucher_in.dict(exclude_unset=True)
-    return voucher_repo.update(voucher_id, update_data, updated_by=updated_by)
+    voucher = voucher_repo.update(voucher_id, update_data, updated_by=updated_by)
+    if voucher:
+        reference_data_service.invalidate(db, VOUCHERS_VERSION)
+    return voucher
 
 
 def soft_delete_voucher(db: Session, voucher_id: str, deleted_by: Optional[str] = None) -> bool:
     """Soft delete voucher (sử dụng repository)"""
     voucher_repo = VoucherRepository(db)
-    return voucher_repo.delete(voucher_id, deleted_by=deleted_by)
\ No newline at end of file
+    ok = voucher_repo.delete(voucher_id, deleted_by=deleted_by)
+    if ok:
+        reference_data_service.invalidate(db, VOUCHERS_VERSION)
+    return ok
\ No newline at end of file
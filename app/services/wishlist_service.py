@@ -2,7 +2,10 @@ from typing import Optional, Tuple, List
 from sqlalchemy.orm import Session
 from app.models.wishlist import Wishlist
 from app.models.wishlistItem import WishlistItem
+from app.models.productType import ProductType
+from app.repositories.product_stat_repository import ProductStatRepository
 from app.repositories.wishlist_repository import WishlistRepository, WishlistItemRepository
+from app.services.recommendation_service import mark_user_dirty
 from app.schemas.request.wishlist import WishlistItemCreate
 
 
@@ -44,10 +47,15 @@ def add_wishlist_item(
     if existing:
         raise ValueError("Sản phẩm đã có trong danh sách yêu thích")
     
+    # Cập nhật counter yêu thích, commit chung với item mới trong repo.create
+    _add_favorite(db, item_in.product_type_id, 1)
+
     # Create new item
     data = item_in.dict()
     data["wishlist_id"] = wishlist_id
-    return repo.create(data, created_by=created_by)
+    item = repo.create(data, created_by=created_by)
+    _mark_owner_dirty(db, wishlist_id)
+    return item
 
 
 def list_wishlist_items(db: Session, wishlist_id: str, skip: int = 0, limit: int = 100) -> Tuple[List[WishlistItem], int]:
@@ -59,7 +67,13 @@ def list_wishlist_items(db: Session, wishlist_id: str, skip: int = 0, limit: int
 def remove_wishlist_item(db: Session, item_id: str, deleted_by: Optional[str] = None) -> bool:
     """Soft delete wishlist item"""
     repo = WishlistItemRepository(db)
-    return repo.delete(item_id, deleted_by=deleted_by)
+    item = repo.get(item_id)
+    if not item:
+        return False
+    _add_favorite(db, item.product_type_id, -1)
+    deleted = repo.delete(item_id, deleted_by=deleted_by)
+    _mark_owner_dirty(db, item.wishlist_id)
+    return deleted
 
 
 def get_wishlist_item(db: Session, item_id: str) -> Optional[WishlistItem]:
@@ -67,3 +81,15 @@ def get_wishlist_item(db: Session, item_id: str) -> Optional[WishlistItem]:
     repo = WishlistItemRepository(db)
     return repo.get(item_id)
 
+
+def _add_favorite(db: Session, product_type_id: str, delta: int) -> None:
+    """Cộng / trừ lượt yêu thích của sản phẩm chứa biến thể (chưa commit)"""
+    product_id = db.query(ProductType.product_id).filter(ProductType.id == product_type_id).scalar()
+    if product_id:
+        ProductStatRepository(db).add_favorites({product_id: delta})
+
+
+def _mark_owner_dirty(db: Session, wishlist_id: str) -> None:
+    """Wishlist thay đổi -> tính lại gợi ý cá nhân của chủ wishlist ở lần refresh kế tiếp"""
+    user_id = db.query(Wishlist.user_id).filter(Wishlist.id == wishlist_id).scalar()
+    mark_user_dirty(user_id)
@@ -0,0 +1,234 @@
+"""
+So sánh serialize response: đường cũ (handler trả BaseResponse, FastAPI validate lại theo response_model
+rồi jsonable_encoder + json.dumps) với render_json (TypeAdapter cache + dump_json).
+
+Các response đo: lịch sử đơn hàng, list sản phẩm (/products, view detail và card), list thông báo của user.
+
+    python -m tests.benchmarks.bench_responses [kích thước] [số vòng]
+"""
+import asyncio
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Union
+
+import tests.conftest  # noqa: F401  (biến môi trường cho Settings)
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import render_json
+from app.schemas.request.notification import NotificationListResponse
+from app.schemas.response.base import BaseResponse
+from app.schemas.response.order import OrderHistoryResponse
+from app.schemas.response.pagination import PaginatedResponse
+from app.schemas.response.product import ProductCardResponse, ProductDetailResponse
+
+_NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def build_orders(size: int = 20, items_per_order: int = 5) -> dict:
+    """Dữ liệu giống GET /orders/my-orders: list dict đơn hàng kèm item"""
+    return {
+        "items": [
+            {
+                "id": f"order-{i}",
+                "user_id": "user-1",
+                "status": "pending",
+                "payment_method": "COD",
+                "total_amount": 500000.0,
+                "discount_amount": 0.0,
+                "final_amount": 500000.0,
+                "created_at": _NOW,
+                "updated_at": _NOW,
+                "items": [
+                    {
+                        "id": f"detail-{i}-{j}",
+                        "product_type_id": f"pt-{j}",
+                        "number": 1,
+                        "price": 100000.0,
+                        "product_type": {"id": f"pt-{j}", "volume": "50ml", "image_path": None, "product_name": "Son"},
+                    }
+                    for j in range(items_per_order)
+                ],
+            }
+            for i in range(size)
+        ],
+        "total": size,
+        "skip": 0,
+        "limit": size,
+    }
+
+
+def build_product_details(size: int = 20, variants_per_product: int = 3) -> dict:
+    """Dữ liệu giống GET /products?view=detail: sản phẩm kèm brand, category, biến thể và giá trị biến thể"""
+    return {
+        "items": [
+            {
+                "id": f"product-{i}",
+                "name": f"Son môi {i}",
+                "description": "Son lì lâu trôi",
+                "thumbnail": f"/uploads/products/{i}.jpg",
+                "is_active": True,
+                "brand": {"id": "brand-1", "name": "Brand", "image_path": None, "description": None},
+                "category": {"id": "category-1", "name": "Son", "image_path": None, "description": None},
+                "product_types": [
+                    {
+                        "id": f"pt-{i}-{j}",
+                        "image_path": None,
+                        "price": 200000.0,
+                        "discount_price": 180000.0,
+                        "stock": 10,
+                        "volume": "3.5g",
+                        "ingredients": "dầu jojoba, sáp ong",
+                        "usage": "thoa trực tiếp",
+                        "skin_type": "mọi loại da",
+                        "origin": "Hàn Quốc",
+                        "type_value_id": f"tv-{j}",
+                        "type_value": {"id": f"tv-{j}", "name": f"Màu {j}", "type": {"id": "type-1", "name": "Màu"}},
+                    }
+                    for j in range(variants_per_product)
+                ],
+            }
+            for i in range(size)
+        ],
+        "total": size,
+        "skip": 0,
+        "limit": size,
+    }
+
+
+def build_product_cards(size: int = 20) -> dict:
+    """Dữ liệu giống GET /products?view=card"""
+    return {
+        "items": [
+            {
+                "id": f"product-{i}",
+                "name": f"Son môi {i}",
+                "thumbnail": f"/uploads/products/{i}.jpg",
+                "description": "Son lì lâu trôi",
+                "brand_name": "Brand",
+                "category_name": "Son",
+                "min_price": 200000.0,
+                "max_price": 250000.0,
+                "min_discount_price": 180000.0,
+                "avg_rating": 4.5,
+                "review_count": 12,
+                "total_sold": 30,
+                "favorite_count": 7,
+            }
+            for i in range(size)
+        ],
+        "total": size,
+        "skip": 0,
+        "limit": size,
+    }
+
+
+def build_notifications(size: int = 20) -> dict:
+    """Dữ liệu giống GET /notifications: thông báo của user kèm nội dung thông báo"""
+    return {
+        "items": [
+            {
+                "id": f"user-notification-{i}",
+                "user_id": "user-1",
+                "notification_id": f"notification-{i}",
+                "is_read": i % 2 == 0,
+                "read_at": _NOW if i % 2 == 0 else None,
+                "created_at": _NOW,
+                "notification": {
+                    "id": f"notification-{i}",
+                    "title": "Đơn hàng đã được xác nhận",
+                    "content": f"Đơn hàng #{i} của bạn đã được xác nhận.",
+                    "type": "order",
+                    "order_id": f"order-{i}",
+                    "created_at": _NOW,
+                },
+            }
+            for i in range(size)
+        ],
+        "total": size,
+        "skip": 0,
+        "limit": size,
+        "unread_count": size // 2,
+    }
+
+
+@dataclass(frozen=True)
+class Case:
+    response_type: Any  # Kiểu truyền vào render_json (handler hiện tại)
+    response_model: Any  # response_model khai báo trên route (đường cũ validate lại theo kiểu này)
+    message: str
+    build: Callable[[int], dict]
+
+
+_PRODUCT_LIST_MODEL = BaseResponse[PaginatedResponse[Union[ProductDetailResponse, ProductCardResponse]]]
+
+CASES = {
+    "orders": Case(
+        BaseResponse[OrderHistoryResponse], BaseResponse[OrderHistoryResponse],
+        "Lấy lịch sử đơn hàng thành công.", build_orders,
+    ),
+    "products_detail": Case(
+        BaseResponse[PaginatedResponse[ProductDetailResponse]], _PRODUCT_LIST_MODEL,
+        "Lấy danh sách sản phẩm thành công.", build_product_details,
+    ),
+    "products_card": Case(
+        BaseResponse[PaginatedResponse[ProductCardResponse]], _PRODUCT_LIST_MODEL,
+        "Lấy danh sách sản phẩm thành công.", build_product_cards,
+    ),
+    "notifications": Case(
+        BaseResponse[NotificationListResponse], BaseResponse[NotificationListResponse],
+        "Lấy danh sách thông báo thành công.", build_notifications,
+    ),
+}
+
+_response_fields = {
+    name: create_model_field("Response", case.response_model, mode="serialization")
+    for name, case in CASES.items()
+}
+
+
+async def legacy_render(name: str, data: dict) -> bytes:
+    """Đường cũ: BaseResponse trong handler -> serialize_response theo response_model -> JSONResponse"""
+    case = CASES[name]
+    content = case.response_type(success=True, message=case.message, data=data)
+    encoded = await serialize_response(field=_response_fields[name], response_content=content)
+    return JSONResponse(encoded).body
+
+
+def fast_render(name: str, data: dict) -> bytes:
+    case = CASES[name]
+    return render_json(case.response_type, message=case.message, data=data)
+
+
+def run(name: str, size: int = 20, rounds: int = 500) -> dict:
+    data = CASES[name].build(size)
+
+    async def legacy_loop():
+        for _ in range(rounds):
+            await legacy_render(name, data)
+
+    started = time.perf_counter()
+    asyncio.run(legacy_loop())
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fast_render(name, data)
+    fast = time.perf_counter() - started
+
+    return {"legacy_ms": legacy / rounds * 1000, "fast_ms": fast / rounds * 1000, "speedup": legacy / fast}
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    for name in CASES:
+        result = run(name, size, rounds)
+        print(
+            f"{name}: {size} item x {rounds} vòng: BaseResponse {result['legacy_ms']:.3f} ms, "
+            f"render_json {result['fast_ms']:.3f} ms, nhanh hơn x{result['speedup']:.1f}"
+        )
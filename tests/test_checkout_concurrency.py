@@ -0,0 +1,66 @@
+"""
+Nhiều người cùng mua 1 biến thể còn ít hàng (user-045): trừ kho bằng UPDATE có điều kiện
+nên không bán quá tồn kho, đúng số đơn thành công bằng số hàng còn lại.
+Mỗi thread dùng session riêng trên cùng file SQLite.
+"""
+import threading
+
+from sqlalchemy.exc import OperationalError
+
+from app.models.order import Order
+from app.models.productType import ProductType
+from app.schemas.request.checkout import CheckoutItemRequest
+from app.services.checkout_service import CheckoutService
+
+BUYERS = 20
+# SQLite chỉ cho 1 writer, thread bị "database is locked" thì thử lại (không phải lỗi của checkout)
+_LOCK_RETRIES = 20
+
+
+def test_concurrent_checkout_never_oversells(session_factory, catalog):
+    variant_id = catalog["variant_ids"][0]
+    barrier = threading.Barrier(BUYERS)
+    succeeded, rejected, errors = [], [], []
+
+    def buy(index):
+        db = session_factory()
+        try:
+            barrier.wait()
+            for _ in range(_LOCK_RETRIES):
+                try:
+                    order = CheckoutService(db).create_order(
+                        catalog["user_id"],
+                        [CheckoutItemRequest(cart_item_id=f"ci{index}", product_type_id=variant_id, quantity=1)],
+                        catalog["address_id"],
+                        "COD",
+                    )
+                    succeeded.append(order.id)
+                    return
+                except OperationalError:
+                    db.rollback()
+                except Exception as exc:
+                    db.rollback()
+                    rejected.append(str(exc))
+                    return
+            errors.append(index)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=buy, args=(i,)) for i in range(BUYERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = session_factory()
+    try:
+        stock = db.query(ProductType.stock).filter(ProductType.id == variant_id).scalar()
+        orders = db.query(Order).count()
+    finally:
+        db.close()
+
+    assert errors == []
+    assert len(succeeded) == 5
+    assert len(rejected) == BUYERS - 5
+    assert stock == 0
+    assert orders == 5
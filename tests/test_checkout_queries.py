@@ -0,0 +1,49 @@
+"""
+Số câu SQL của checkout không phụ thuộc số item trong đơn (user-044):
+load biến thể 1 query, trừ kho 1 UPDATE executemany, chi tiết đơn 1 INSERT executemany.
+"""
+import pytest
+
+from app.schemas.request.checkout import CheckoutItemRequest
+from app.services.checkout_service import CheckoutService
+
+
+def _items(variant_ids, count):
+    return [
+        CheckoutItemRequest(cart_item_id=f"ci{i}", product_type_id=variant_ids[i], quantity=1)
+        for i in range(count)
+    ]
+
+
+def _count(query_counter, fn):
+    with query_counter() as statements:
+        fn()
+    return len(statements)
+
+
+def test_preview_order_query_count_is_constant(db, catalog, query_counter):
+    service = CheckoutService(db)
+    variant_ids = catalog["variant_ids"]
+    service.preview_order(_items(variant_ids, 1))  # nạp cache trong bộ nhớ trước khi đếm
+
+    one = _count(query_counter, lambda: service.preview_order(_items(variant_ids, 1)))
+    many = _count(query_counter, lambda: service.preview_order(_items(variant_ids, 5)))
+
+    assert one == many
+
+
+@pytest.mark.parametrize("payment_method", ["COD", "SEPAY"])
+def test_create_order_query_count_is_constant(db, catalog, query_counter, payment_method):
+    service = CheckoutService(db)
+    variant_ids = catalog["variant_ids"]
+
+    def create(count):
+        return lambda: service.create_order(
+            catalog["user_id"], _items(variant_ids, count), catalog["address_id"], payment_method
+        )
+
+    create(1)()
+    one = _count(query_counter, create(1))
+    many = _count(query_counter, create(5))
+
+    assert one == many
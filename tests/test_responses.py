@@ -0,0 +1,12 @@
+import asyncio
+import json
+
+import pytest
+
+from tests.benchmarks.bench_responses import CASES, fast_render, legacy_render
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_render_json_matches_response_model_serialization(name):
+    data = CASES[name].build(3)
+    assert json.loads(fast_render(name, data)) == json.loads(asyncio.run(legacy_render(name, data)))